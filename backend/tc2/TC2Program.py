@@ -3,15 +3,19 @@ from __future__ import annotations
 import os
 import time as pytime
 import traceback
-from datetime import datetime
+from datetime import datetime, date
 from multiprocessing import Process
 from threading import Thread
 
 from tc2.account.data_stream.AccountDataStream import AccountDataStream
 from tc2.data.data_storage.mongo.MongoManager import MongoManager
 from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.data.data_storage.TickArchive import TickArchive
+from tc2.data.data_storage.CandleFileCache import CandleFileCache
+from tc2.data.data_storage.mongo.workers.MongoPriceWorker import MongoPriceWorker
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
+from tc2.data.stock_data_collection.ModelTrainingPipeline import ModelTrainingPipeline
 from tc2.data.stock_data_collection.PolygonDataCollector import PolygonDataCollector
 from tc2.env.EnvType import EnvType
 from tc2.env.ExecEnv import ExecEnv
@@ -150,6 +154,16 @@ class TC2Program(Loggable):
             self.warn_main(traceback.format_exc())
             self.shutdown()
 
+        # Start the process that launches health checks and visual generation.
+        try:
+            self.info_main('Starting background job launcher')
+            self.start_background_jobs()
+            self.info_main('Started background job launcher')
+        except Exception:
+            self.error_main('Failed to start background job launcher:')
+            self.warn_main(traceback.format_exc())
+            self.shutdown()
+
         # Init manager class and refresher thread for visualization.
         try:
             self.info_main('Initializing visuals (graphs, charts, etc.) generation components')
@@ -208,6 +222,14 @@ class TC2Program(Loggable):
                                        mongo=live_mongo,
                                        redis=live_redis)
 
+        # Archive raw trades collected from polygon.io, if an archive directory is configured.
+        if self.live_env.get_setting('tick_archive.dir') != '':
+            live_data_collector.tick_archive = TickArchive(self.live_env.get_setting('tick_archive.dir'))
+
+        # Cache valid days' candles on disk for every process to share, if a cache directory is configured.
+        if self.live_env.get_setting('candle_cache.dir') != '':
+            MongoPriceWorker.use_candle_file_cache(CandleFileCache(self.live_env.get_setting('candle_cache.dir')))
+
         # Set Alpaca credentials as environment variables so we don't have to pass them around.
         live_trading = True if Settings.get_endpoint(self.live_env) == BrokerEndpoint.LIVE else False
         os.environ['APCA_API_BASE_URL'] = 'https://api.alpaca.markets' \
@@ -268,6 +290,20 @@ class TC2Program(Loggable):
             for _ in range(warm_up_days + catch_up_days + 1):
                 day_date = catch_up_env.time().get_prev_mkt_day(day_date)
 
+            # Look up which days have valid data using the completeness index, rather than loading every day.
+            price_index = catch_up_env.mongo().load_price_index(Settings.get_symbols(catch_up_env),
+                                                                start_date=day_date,
+                                                                end_date=catch_up_env.time().now().date())
+
+            def is_day_valid(symbol: str, check_date: date) -> bool:
+                valid = price_index[symbol.upper()].get(check_date, False)
+                if valid is None:
+                    # The day was saved before its validity was indexed, so validate and index it now
+                    valid = catch_up_env.mongo().index_symbol_day(
+                        catch_up_env.mongo().load_symbol_day(symbol, check_date))
+                    price_index[symbol.upper()][check_date] = valid
+                return valid
+
             # Check that each day [t-31, t-4] has valid data.
             symbols_reset = []
             for _ in range(warm_up_days):
@@ -279,9 +315,8 @@ class TC2Program(Loggable):
                     if symbol in symbols_reset:
                         continue
 
-                    # Load the day's data and validate it.
-                    day_data = catch_up_env.mongo().load_symbol_day(symbol, day_date)
-                    if not SymbolDay.validate_candles(day_data.candles):
+                    # Check whether the day's data is valid.
+                    if not is_day_valid(symbol, day_date):
                         catch_up_env.info_process('{} missing price data on {}. Resetting its model data'
                                                   .format(symbol, day_date))
                         catch_up_model_feeder.reset_models([symbol])
@@ -294,50 +329,55 @@ class TC2Program(Loggable):
             for _ in range(warm_up_days + catch_up_days + 1 if len(symbols_reset) != 0 else catch_up_days + 1):
                 day_date = catch_up_env.time().get_prev_mkt_day(day_date)
 
-            # Use price data to train models.
+            # Find the days on which each reset symbol is missing price data.
+            train_dates = []
             for _ in range(warm_up_days + catch_up_days if len(symbols_reset) != 0 else catch_up_days):
-
-                # Go through each reset symbol.
-                for symbol in symbols_reset:
-
-                    # Load mongo price data if present.
-                    start_instant = pytime.monotonic()
-                    day_data = catch_up_env.mongo().load_symbol_day(symbol, day_date)
-
-                    # Collect polygon-rest price data if necessary.
-                    if not SymbolDay.validate_candles(day_data.candles):
-                        try:
-                            day_data = catch_up_env.data_collector().collect_candles_for_day(day_date, symbol)
-                        except Exception as e:
-                            catch_up_env.error_process('Error collecting polygon-rest data:')
-                            catch_up_env.warn_process(traceback.format_exc())
-                    collection_time = pytime.monotonic() - start_instant
-
-                    # Validate data.
-                    validation_debugger = []
-                    if day_data is not None and SymbolDay.validate_candles(day_data.candles,
-                                                                           debug_output=validation_debugger):
-                        # Save data
-                        catch_up_env.redis().reset_day_difficulty(symbol, day_date)
-                        catch_up_env.mongo().save_symbol_day(day_data)
-
-                        # Use data to train models for symbol on day.
-                        start_instant = pytime.monotonic()
-                        catch_up_model_feeder.train_models(symbol=symbol,
-                                                           day_date=day_date,
-                                                           day_data=day_data,
-                                                           stable=True)
-                        train_time = pytime.monotonic() - start_instant
-                        catch_up_env.info_process(f'Catch-up for {symbol} on {day_date:%m-%d-%Y}: collection took '
-                                                  f'{collection_time:.2f}s;  training took {train_time:.2f}s')
-                    else:
-                        catch_up_env.redis().incr_day_difficulty(symbol, day_date)
-                        catch_up_env.warn_process(f'Couldn\'t collect catch-up data for {symbol} on {day_date}: '
-                                                  f'{"null" if day_date is None else len(day_data.candles)} candles')
-                        catch_up_env.warn_process('\n'.join(validation_debugger))
-
-                # Move to the next day.
+                train_dates.append(day_date)
                 day_date = catch_up_env.time().get_next_mkt_day(day_date)
+            missing_symbol_days = []
+            for train_date in train_dates:
+                for symbol in symbols_reset:
+                    if not is_day_valid(symbol, train_date):
+                        missing_symbol_days.append((symbol, train_date))
+
+            # Collect all missing polygon-rest price data at once, saving each symbol-day as soon as it arrives.
+            start_instant = pytime.monotonic()
+            try:
+                for symbol, missing_date, day_data in catch_up_env.data_collector().collect_candles_for_days(
+                        missing_symbol_days):
+                    try:
+                        validation_debugger = []
+                        if day_data is not None and SymbolDay.validate_candles(day_data.candles,
+                                                                               debug_output=validation_debugger):
+                            catch_up_env.redis().reset_day_difficulty(symbol, missing_date)
+                            catch_up_env.mongo().save_symbol_day(day_data)
+                        else:
+                            catch_up_env.redis().incr_day_difficulty(symbol, missing_date)
+                            catch_up_env.warn_process(f'Couldn\'t collect catch-up data for {symbol} on '
+                                                      f'{missing_date}: '
+                                                      f'{"null" if day_data is None else len(day_data.candles)} '
+                                                      f'candles')
+                            catch_up_env.warn_process('\n'.join(validation_debugger))
+                    except Exception as e:
+                        catch_up_env.error_process(f'Error saving catch-up data for {symbol} on {missing_date}:')
+                        catch_up_env.warn_process(traceback.format_exc())
+            except Exception as e:
+                catch_up_env.error_process('Error collecting polygon-rest data:')
+                catch_up_env.warn_process(traceback.format_exc())
+            catch_up_env.info_process(f'Catch-up collected {len(missing_symbol_days)} missing symbol-days in '
+                                      f'{pytime.monotonic() - start_instant:.2f}s')
+
+            # Use price data to train models, training many symbols at once.
+            start_instant = pytime.monotonic()
+            training_pipeline = ModelTrainingPipeline(catch_up_env)
+            try:
+                results = training_pipeline.train(
+                    symbol_days=[(symbol, train_date) for train_date in train_dates for symbol in symbols_reset],
+                    stable=True)
+            finally:
+                training_pipeline.close()
+            catch_up_env.info_process(f'Catch-up trained models on {sum(results.values())} of {len(results)} '
+                                      f'symbol-days in {pytime.monotonic() - start_instant:.2f}s')
 
             # Determine whether or not we have yesterday's cached data for at least one symbol.
             unstable_data_present = False
@@ -363,7 +403,7 @@ class TC2Program(Loggable):
             # Allow processes to resume now that data_collector is not busy.
             catch_up_env.mark_data_as_loaded()
             msg = f'Trading and strategy optimization enabled (catch up task took ' \
-                  f'{(pytime.monotonic() - catch_up_start_moment) / 3600:.2f} hrs)'
+                  f'{(pytime.monotonic() - catch_up_start_moment) / 60:.1f} mins)'
             catch_up_env.info_main(msg)
             catch_up_env.info_process(msg)
 
@@ -396,6 +436,14 @@ class TC2Program(Loggable):
         self.optimizations_process = Process(target=self.strategy_optimizer.start)
         self.optimizations_process.start()
 
+    def start_background_jobs(self) -> None:
+        """
+        Starts the single-threaded process from which health checks and visual generation are forked.
+        This is done before the refresher threads start, since they schedule jobs on it.
+        """
+        from webpanel import shared
+        shared.health_check_scheduler.start()
+
     def init_visualization(self) -> None:
         """
         Schedules visuals to update continuously.
@@ -431,6 +479,13 @@ class TC2Program(Loggable):
         except Exception:
             traceback.print_exc()
 
+        try:
+            # Stop process that launches health checks and visual generation.
+            from webpanel import shared
+            shared.health_check_scheduler.stop()
+        except Exception:
+            traceback.print_exc()
+
         try:
             # Stop thread that generates visuals.
             self.visuals_refresher.stop()
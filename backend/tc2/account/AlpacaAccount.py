@@ -18,6 +18,7 @@ from tc2.data.data_structs.account_data.Position import Position
 from tc2.data.data_structs.account_data.RoundTripTrade import RoundTripTrade
 from tc2.env.ExecEnv import ExecEnv
 from tc2.log.LogFeed import LogFeed
+from tc2.metrics.Metrics import Metrics
 
 
 class AlpacaAccount(AbstractAccount):
@@ -71,10 +72,14 @@ class AlpacaAccount(AbstractAccount):
             limit = self.round_down(limit, 2)
             self.cancel_open_orders([symbol])
             pytime.sleep(0.2)
+            submit_start = Metrics.start()
             self.rest_client.submit_order(symbol=symbol, qty=qty, side='buy', type='limit', limit_price=limit,
                                           time_in_force='day')
+            Metrics.record_since('alpaca.submit_order', submit_start)
+            Metrics.incr('alpaca.orders_placed')
             self.last_buy_order_time = self.time().now()
         except Exception as e:
+            Metrics.record_event('alpaca.order_errors', self.redis())
             self.error_process(f'Error placing limit-buy order on Alpaca for {qty} {symbol} at ${limit:.2f}:')
             self.warn_process(traceback.format_exc())
             return False
@@ -90,10 +95,14 @@ class AlpacaAccount(AbstractAccount):
             limit = self.round_up(limit, 2)
             self.cancel_open_orders([symbol])
             pytime.sleep(0.2)
+            submit_start = Metrics.start()
             self.rest_client.submit_order(symbol=symbol, qty=qty, side='sell', type='limit', limit_price=limit,
                                           time_in_force='day')
+            Metrics.record_since('alpaca.submit_order', submit_start)
+            Metrics.incr('alpaca.orders_placed')
             self.last_sell_order_time = self.time().now()
         except Exception as e:
+            Metrics.record_event('alpaca.order_errors', self.redis())
             self.error_process(f'Error placing limit-sell order on Alpaca for {qty} {symbol} at ${limit:.2f}:')
             self.warn_process(traceback.format_exc())
             return False
@@ -104,9 +113,13 @@ class AlpacaAccount(AbstractAccount):
             price = self.round_down(price, 2)
             self.cancel_open_orders([symbol])
             pytime.sleep(0.2)
+            submit_start = Metrics.start()
             self.rest_client.submit_order(symbol=symbol, qty=qty, side='sell', type='stop', time_in_force='day',
                                           stop_price=price)
+            Metrics.record_since('alpaca.submit_order', submit_start)
+            Metrics.incr('alpaca.orders_placed')
         except Exception as e:
+            Metrics.record_event('alpaca.order_errors', self.redis())
             self.error_process(f'Error placing stop order on Alpaca for {qty} {symbol} at ${price:.2f}:')
             self.warn_process(traceback.format_exc())
             return False
@@ -193,6 +206,7 @@ class AlpacaAccount(AbstractAccount):
                 strategy_start=strategy_start if strategy_start else self.time().now() - timedelta(seconds=20),
                 symbols=symbols)
             update_get_time_ms = (pytime.monotonic() - update_get_start) * 1000.0
+            Metrics.record('account.get_next_update', update_get_time_ms)
             if update_get_time_ms > 50:
                 # print(f'took {update_get_time_ms:.0f}ms to get update '
                 #       f'(is unseen: {"yes" if update is not None else "no"})')
@@ -216,6 +230,11 @@ class AlpacaAccount(AbstractAccount):
             if update.update_type is StreamUpdateType.ACCT_INFO or update.get_symbol() in symbols:
                 self.preprocess_stream_update(update)
                 update_preprocess_time_ms = (pytime.monotonic() - update_preprocess_start) * 1000.0
+                Metrics.record('account.preprocess_update', update_preprocess_time_ms)
+                if update.update_type is StreamUpdateType.CANDLE:
+                    # Time between the candle's second ending and the strategy receiving it
+                    Metrics.record('account.candle_age',
+                                   (self.time().now() - update.update_moment).total_seconds() * 1000.0 - 1000.0)
                 if update_preprocess_time_ms > 50:
                     print(f'took {update_preprocess_time_ms:.0f}ms to preprocess update')
                 return update
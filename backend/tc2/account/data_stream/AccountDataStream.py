@@ -15,6 +15,7 @@ from tc2.data.data_structs.account_data.AccountInfo import AccountInfo
 from tc2.data.data_structs.account_data.Order import Order
 from tc2.data.data_structs.price_data.Candle import Candle
 from tc2.log.LogFeed import LogFeed, LogLevel
+from tc2.metrics.Metrics import Metrics
 from tc2.util.date_util import DATE_TIME_FORMAT
 
 
@@ -234,6 +235,11 @@ class AccountDataStream:
                         close=data.close,
                         volume=data.volume)
 
+        # Record how long after the candle's second ended it reached us
+        if Metrics.enabled:
+            Metrics.incr('stream.candles_received')
+            Metrics.record('stream.candle_delay', (datetime.now() - moment).total_seconds() * 1000.0 - 1000.0)
+
         # Signal the running strategy to respond to this new price data
         cls._queue_update(moment=moment,
                           update_type=StreamUpdateType.CANDLE,
@@ -285,6 +291,8 @@ class AccountDataStream:
         Adds an update to the stream's queue.
         """
 
+        queue_start = Metrics.start()
+
         # Create a StreamUpdate object
         update = StreamUpdate(update_moment=moment,
                               update_type=update_type,
@@ -302,3 +310,5 @@ class AccountDataStream:
                 cls._livestream_updates.pop(0)
         elif len(cls._livestream_updates) > 600:
             cls._queue_initially_filled.value = True
+
+        Metrics.record_since('stream.queue_update', queue_start)
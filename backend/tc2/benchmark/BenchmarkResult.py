@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+
+
+class BenchmarkResult:
+    """
+    The timing of a single benchmark case.
+    Contains the case's name, the number of operations performed per round, and the fastest round's duration,
+    or the error that made the case fail.
+    """
+
+    name: str
+    ops: int
+    best_secs: Optional[float]
+    mean_secs: Optional[float]
+    error: Optional[str]
+
+    def __init__(self, name: str, ops: int, best_secs: Optional[float], mean_secs: Optional[float],
+                 error: Optional[str] = None) -> None:
+        self.name = name
+        self.ops = ops
+        self.best_secs = best_secs
+        self.mean_secs = mean_secs
+        self.error = error
+
+    @classmethod
+    def failure(cls, name: str, ops: int, error: str) -> 'BenchmarkResult':
+        """Returns the result of a case that raised an error instead of finishing."""
+        return BenchmarkResult(name=name, ops=ops, best_secs=None, mean_secs=None, error=error)
+
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def ops_per_sec(self) -> float:
+        """Throughput of the fastest round, which is the least affected by noise from other processes."""
+        if self.failed():
+            return 0.0
+        return self.ops / max(self.best_secs, 1e-9)
+
+    def __str__(self) -> str:
+        if self.failed():
+            return f'{self.name:<32} FAILED: {self.error}'
+        return f'{self.name:<32} {self.ops_per_sec():>12.2f} ops/s   ' \
+               f'best {self.best_secs * 1000:>10.1f}ms   mean {self.mean_secs * 1000:>10.1f}ms   ({self.ops} ops)'
+
+    def to_json(self) -> Dict[str, any]:
+        return {
+            'name': self.name,
+            'ops': self.ops,
+            'best_secs': self.best_secs,
+            'mean_secs': self.mean_secs,
+            'ops_per_sec': self.ops_per_sec(),
+            'error': self.error
+        }
+
+    @classmethod
+    def from_json(cls, result_json: Dict[str, any]) -> 'BenchmarkResult':
+        return BenchmarkResult(name=result_json['name'],
+                               ops=result_json['ops'],
+                               best_secs=result_json['best_secs'],
+                               mean_secs=result_json['mean_secs'],
+                               error=result_json.get('error'))
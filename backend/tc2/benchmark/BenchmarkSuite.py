@@ -0,0 +1,200 @@
+import time as pytime
+import traceback
+from datetime import date, datetime, timedelta, time
+from typing import Callable, List
+
+from tc2.benchmark import benchmark_fixtures
+from tc2.benchmark.BenchmarkResult import BenchmarkResult
+from tc2.benchmark.LocalMongoManager import LocalMongoManager
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.data.data_storage.mongo.MongoManager import MongoManager
+from tc2.data.data_storage.redis.MemoryRedisManager import MemoryRedisManager
+from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.data.data_storage.storage_backends import create_mongo_manager, create_redis_manager
+from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
+from tc2.data.stock_data_collection.PolygonDataCollector import PolygonDataCollector
+from tc2.env.EnvType import EnvType
+from tc2.env.ExecEnv import ExecEnv
+from tc2.env.TimeEnv import TimeEnv
+from tc2.log.LogFeed import LogFeed
+from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
+from tc2.stock_analysis.strategy_models.breakout1_strategy.Breakout1Model import Breakout1Model
+from tc2.strategy.execution.simulated.StrategySimulator import StrategySimulator
+from tc2.strategy.strategies.cycle.CycleStrategy import CycleStrategy
+from tc2.util import candle_util
+from tc2.util.market_util import OPEN_TIME
+
+# The last day of the benchmark's fixtures; fixed so that synthetic fixtures are identical across runs
+DEFAULT_END_DATE = date(year=2020, month=3, day=10)
+
+
+class BenchmarkSuite:
+    """
+    Times the program's hot paths on a fixed set of SymbolDay fixtures.
+
+    No environment uses the database servers, so timings don't depend on them and the benchmarks can't touch
+    real data. The source environment stores fixtures in in-memory stand-ins for MongoDB collections behind the
+    regular mongo workers, while the simulated environment uses the in-memory backends that simulations use.
+    Fixtures are loaded from recorded files when available, and generated synthetically otherwise.
+    """
+
+    logfeed: LogFeed
+    symbols: List[str]
+    days: List[date]
+    rounds: int
+    fixtures_dir: str
+
+    # Environment holding every fixture, which plays the role of the live environment
+    source_env: ExecEnv
+
+    # Environment into which simulations and model training write their data
+    sim_env: ExecEnv
+
+    # Fixtures, in the order of self.symbols and then self.days
+    day_datas: List[SymbolDay]
+
+    def __init__(self,
+                 logfeed: LogFeed,
+                 symbols: List[str],
+                 num_days: int = 6,
+                 end_date: date = DEFAULT_END_DATE,
+                 rounds: int = 3,
+                 fixtures_dir: str = benchmark_fixtures.FIXTURES_DIR) -> None:
+        """
+        :param num_days: the number of market days of fixtures to use, ending at (and including) end_date
+        :param rounds: the number of times to run each case; its fastest round is reported
+        """
+        self.logfeed = logfeed
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.rounds = max(1, rounds)
+        self.fixtures_dir = fixtures_dir
+
+        # Find the market days to use
+        time_env = TimeEnv(datetime.combine(end_date, time(hour=12)))
+        self.days = [end_date]
+        while len(self.days) < max(3, num_days):
+            self.days.insert(0, time_env.get_prev_mkt_day(self.days[0]))
+
+    def setup(self) -> None:
+        """Creates the benchmark's environments and stores the fixtures in the source environment."""
+        self.source_env = self._create_env(EnvType.BENCHMARK, datetime.combine(self.days[-1], time(hour=12)),
+                                           mongo=LocalMongoManager(self.logfeed, EnvType.BENCHMARK),
+                                           redis=MemoryRedisManager(self.logfeed, EnvType.BENCHMARK))
+        self.sim_env = self._create_env(EnvType.SIMULATION, datetime.combine(self.days[-2], OPEN_TIME),
+                                        mongo=create_mongo_manager(self.logfeed, EnvType.SIMULATION),
+                                        redis=create_redis_manager(self.logfeed, EnvType.SIMULATION))
+
+        self.day_datas = []
+        for symbol in self.symbols:
+            for day_date in self.days:
+                day_data = benchmark_fixtures.load_or_generate(symbol, day_date, self.fixtures_dir)
+                self.source_env.mongo().save_symbol_day(day_data)
+                self.day_datas.append(day_data)
+
+    def run(self) -> List[BenchmarkResult]:
+        """Runs every benchmark case and returns their timings, including a failed result for each case that raised."""
+        results = [
+            self._time_case('load_symbol_day', len(self.day_datas), self._bench_load_symbol_day,
+                            before_round=self.source_env.mongo().clear_cached_days),
+            self._time_case('load_symbol_day (cached)', len(self.day_datas), self._bench_load_symbol_day),
+            self._time_case('validate_candles', len(self.day_datas), self._bench_validate_candles),
+            self._time_case('aggregate_minute_candles', len(self.day_datas), self._bench_aggregate_minute_candles),
+            self._time_case('find_mins_maxs', len(self.day_datas), self._bench_find_mins_maxs),
+            self._time_case('Breakout1Model.calculate_output', len(self.symbols), self._bench_breakout1_model),
+            self._time_case('ModelFeeder.train_models', len(self.day_datas), self._bench_train_models,
+                            before_round=self._prepare_sim_env),
+            self._time_case('StrategySimulator.run', len(self.symbols), self._bench_simulation)
+        ]
+        return results
+
+    """
+    Benchmark cases...
+    """
+
+    def _bench_load_symbol_day(self) -> None:
+        for day_data in self.day_datas:
+            self.source_env.mongo().load_symbol_day(day_data.symbol, day_data.day_date)
+
+    def _bench_validate_candles(self) -> None:
+        for day_data in self.day_datas:
+            SymbolDay.validate_candles(day_data.candles)
+
+    def _bench_aggregate_minute_candles(self) -> None:
+        for day_data in self.day_datas:
+            candle_util.aggregate_minute_candles(day_data.candles)
+
+    def _bench_find_mins_maxs(self) -> None:
+        for day_data in self.day_datas:
+            # Use the last hour of the day, similar in length to the trendlines the models search
+            hour_start = day_data.candles[-1].moment - timedelta(hours=1)
+            candle_util.find_mins_maxs([candle for candle in day_data.candles if candle.moment >= hour_start])
+
+    def _bench_breakout1_model(self) -> None:
+        model = Breakout1Model(env=self.source_env, model_type=AnalysisModelType.BREAKOUT1_MODEL)
+        for symbol in self.symbols:
+            model.calculate_output(symbol)
+
+    def _prepare_sim_env(self) -> None:
+        """Resets the simulated environment and gives it every fixture, so models can load previous days' data."""
+        self.sim_env.reset_dbs()
+        for day_data in self.day_datas:
+            self.sim_env.mongo().save_symbol_day(day_data)
+
+    def _bench_train_models(self) -> None:
+        model_feeder = ModelFeeder(self.sim_env)
+        for day_data in self.day_datas:
+            model_feeder.train_models(symbol=day_data.symbol,
+                                      day_date=day_data.day_date,
+                                      day_data=day_data,
+                                      stable=True)
+
+    def _bench_simulation(self) -> None:
+        # StrategySimulator also copies the day after the simulated day, so simulate the second-to-last day
+        for symbol in self.symbols:
+            self.sim_env.time().set_moment(datetime.combine(self.days[-2], OPEN_TIME))
+            strategy = CycleStrategy(env=self.sim_env, symbols=[symbol])
+            StrategySimulator(strategy, self.source_env).run(warmup_days=len(self.days) - 1)
+
+    """
+    Private methods...
+    """
+
+    def _time_case(self,
+                   name: str,
+                   ops: int,
+                   case: Callable[[], None],
+                   before_round: Callable[[], None] = None) -> BenchmarkResult:
+        """Runs the case self.rounds times and returns the timing of its fastest round, or its error if it fails."""
+        durations = []
+        for _ in range(self.rounds):
+            try:
+                if before_round is not None:
+                    before_round()
+                start_instant = pytime.perf_counter()
+                case()
+                durations.append(pytime.perf_counter() - start_instant)
+            except Exception as e:
+                print(f'Benchmark case {name} failed:')
+                traceback.print_exc()
+                return BenchmarkResult.failure(name=name, ops=ops, error=f'{type(e).__name__}: {e}')
+        return BenchmarkResult(name=name,
+                               ops=ops,
+                               best_secs=min(durations),
+                               mean_secs=sum(durations) / len(durations))
+
+    def _create_env(self,
+                    env_type: EnvType,
+                    moment: datetime,
+                    mongo: MongoManager,
+                    redis: RedisManager) -> ExecEnv:
+        """Returns an execution environment using the given database managers."""
+        time_env = TimeEnv(moment)
+        env = ExecEnv(self.logfeed, self.logfeed)
+        env.setup_first_time(env_type=env_type,
+                             time=time_env,
+                             data_collector=PolygonDataCollector(logfeed_program=self.logfeed,
+                                                                 logfeed_process=self.logfeed,
+                                                                 time_env=time_env),
+                             mongo=mongo,
+                             redis=redis)
+        return env
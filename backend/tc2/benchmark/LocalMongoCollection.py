@@ -0,0 +1,89 @@
+import copy
+from typing import Dict, List, Optional
+
+
+class LocalDeleteResult:
+    """Mirrors the deleted_count attribute of pymongo's DeleteResult."""
+
+    deleted_count: int
+
+    def __init__(self, deleted_count: int) -> None:
+        self.deleted_count = deleted_count
+
+
+class LocalMongoCollection:
+    """
+    An in-memory stand-in for the subset of pymongo's Collection API used by the mongo workers.
+    Queries match documents whose fields equal every field in the query, or satisfy its $in/$gte/$lte operators;
+    projections behave like pymongo's.
+
+    Documents are deep-copied on the way in and out, so callers can't mutate stored data,
+    just like with a real database.
+    """
+
+    _docs: List[Dict[str, any]]
+    _next_id: int
+
+    def __init__(self) -> None:
+        self._docs = []
+        self._next_id = 0
+
+    def find(self, query: Dict[str, any], projection: Optional[Dict[str, int]] = None) -> List[Dict[str, any]]:
+        return [self._project(doc, projection) for doc in self._docs if self._matches(doc, query)]
+
+    def find_one(self, query: Dict[str, any], projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, any]]:
+        for doc in self._docs:
+            if self._matches(doc, query):
+                return self._project(doc, projection)
+        return None
+
+    def replace_one(self, query: Dict[str, any], new_doc: Dict[str, any], upsert: bool = False) -> None:
+        for i, doc in enumerate(self._docs):
+            if self._matches(doc, query):
+                self._docs[i] = dict(copy.deepcopy(new_doc), _id=doc['_id'])
+                return
+        if upsert:
+            self._next_id += 1
+            self._docs.append(dict(copy.deepcopy(new_doc), _id=self._next_id))
+
+    def update_one(self, query: Dict[str, any], update: Dict[str, Dict[str, any]]) -> None:
+        for doc in self._docs:
+            if self._matches(doc, query):
+                doc.update(copy.deepcopy(update.get('$set', {})))
+                return
+
+    def delete_one(self, query: Dict[str, any]) -> LocalDeleteResult:
+        for i, doc in enumerate(self._docs):
+            if self._matches(doc, query):
+                del self._docs[i]
+                return LocalDeleteResult(1)
+        return LocalDeleteResult(0)
+
+    def delete_many(self, query: Dict[str, any]) -> LocalDeleteResult:
+        docs_before = len(self._docs)
+        self._docs = [doc for doc in self._docs if not self._matches(doc, query)]
+        return LocalDeleteResult(docs_before - len(self._docs))
+
+    @staticmethod
+    def _matches(doc: Dict[str, any], query: Dict[str, any]) -> bool:
+        for key, val in query.items():
+            if key not in doc:
+                return False
+            if not isinstance(val, dict):
+                if doc[key] != val:
+                    return False
+                continue
+            for operator, operand in val.items():
+                if operator == '$in' and doc[key] not in operand:
+                    return False
+                if operator == '$gte' and not doc[key] >= operand:
+                    return False
+                if operator == '$lte' and not doc[key] <= operand:
+                    return False
+        return True
+
+    @staticmethod
+    def _project(doc: Dict[str, any], projection: Optional[Dict[str, int]]) -> Dict[str, any]:
+        if projection is None:
+            return copy.deepcopy(doc)
+        return {key: copy.deepcopy(val) for key, val in doc.items() if key == '_id' or projection.get(key, 0)}
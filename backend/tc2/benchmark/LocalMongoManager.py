@@ -0,0 +1,44 @@
+from tc2.benchmark.LocalMongoCollection import LocalMongoCollection
+from tc2.data.data_storage.mongo.MongoManager import MongoManager
+from tc2.data.data_storage.mongo.workers.MongoNeuralWorker import MongoNeuralWorker
+from tc2.data.data_storage.mongo.workers.MongoPriceWorker import MongoPriceWorker
+
+
+class LocalMongoManager(MongoManager):
+    """
+    A MongoManager whose workers read and write in-memory collections instead of a MongoDB server.
+    The workers themselves are unchanged, so benchmarks still measure their (de)serialization costs.
+    """
+
+    def connect(self,
+                user: str = '',
+                password: str = '',
+                ip: str = '',
+                port: str = '') -> bool:
+        """Creates empty in-memory collections; the connection parameters are ignored."""
+        self.client = None
+        self.db = None
+        self.candle_collection_secondly = LocalMongoCollection()
+        self.candle_collection_daily = LocalMongoCollection()
+        self.neural_collection = LocalMongoCollection()
+
+        # Create workers
+        self.price_worker = MongoPriceWorker(logfeed_program=self.logfeed_program,
+                                             candle_collection_secondly=self.candle_collection_secondly,
+                                             candle_collection_daily=self.candle_collection_daily,
+                                             neural_collection=self.neural_collection,
+                                             env_type=self.env_type)
+        self.neural_worker = MongoNeuralWorker(logfeed_program=self.logfeed_program,
+                                               candle_collection_secondly=self.candle_collection_secondly,
+                                               candle_collection_daily=self.candle_collection_daily,
+                                               neural_collection=self.neural_collection,
+                                               env_type=self.env_type)
+
+        # Forget days cached from any previous collections
+        self.price_worker.clear_cached_days()
+
+        self._connected = True
+        return True
+
+    def shutdown(self) -> None:
+        pass
@@ -0,0 +1,97 @@
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.util.date_util import DATE_FORMAT
+from tc2.util.market_util import OPEN_TIME, OPEN_DURATION
+
+# The folder containing recorded SymbolDay fixtures, one file per (symbol, day)
+FIXTURES_DIR = 'benchmarks/fixtures'
+
+
+def generate_symbol_day(symbol: str,
+                        day_date: date,
+                        fill_rate: float = 0.85) -> SymbolDay:
+    """
+    Generates a synthetic day of second-resolution candles that passes SymbolDay.validate_candles().
+    The same (symbol, day_date) always generates the same candles, so benchmark runs are comparable.
+
+    :param fill_rate: the fraction of market seconds that have a candle
+    """
+    rng = random.Random(f'{symbol}_{day_date:{DATE_FORMAT}}')
+    price = 20 + rng.random() * 180
+    open_moment = datetime.combine(day_date, OPEN_TIME)
+    candles = []
+    for sec in range(int(OPEN_DURATION)):
+        # Volatility and volume are highest near the open and close, like real markets
+        day_progress = sec / OPEN_DURATION
+        activity = 1 + 3 * (abs(day_progress - 0.5) * 2) ** 4
+        next_price = max(0.5, price * (1 + rng.gauss(0, 0.0003 * activity)))
+        if rng.random() > fill_rate:
+            price = next_price
+            continue
+        high = max(price, next_price) * (1 + abs(rng.gauss(0, 0.0001 * activity)))
+        low = min(price, next_price) * (1 - abs(rng.gauss(0, 0.0001 * activity)))
+        candles.append(Candle(moment=open_moment + timedelta(seconds=sec),
+                              open=round(price, 2),
+                              high=round(high, 2),
+                              low=round(low, 2),
+                              close=round(next_price, 2),
+                              volume=1 + int(rng.expovariate(1 / (200 * activity)))))
+        price = next_price
+    return SymbolDay(symbol, day_date, candles)
+
+
+def fixture_path(symbol: str,
+                 day_date: date,
+                 fixtures_dir: str = FIXTURES_DIR) -> str:
+    return f'{fixtures_dir}/{symbol.upper()}_{day_date:{DATE_FORMAT}}.txt'
+
+
+def save_fixture(day_data: SymbolDay,
+                 fixtures_dir: str = FIXTURES_DIR) -> None:
+    """Writes the day's candles to a fixture file, one encoded candle per line."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    with open(fixture_path(day_data.symbol, day_data.day_date, fixtures_dir), 'w') as file:
+        file.write('\n'.join(str(candle) for candle in day_data.candles))
+
+
+def load_fixture(symbol: str,
+                 day_date: date,
+                 fixtures_dir: str = FIXTURES_DIR) -> Optional[SymbolDay]:
+    """Returns the recorded SymbolDay, or None if no fixture file exists for it."""
+    path = fixture_path(symbol, day_date, fixtures_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        candles = [Candle.from_str(line.strip()) for line in file if len(line.strip()) > 0]
+    return SymbolDay(symbol, day_date, candles)
+
+
+def load_or_generate(symbol: str,
+                     day_date: date,
+                     fixtures_dir: str = FIXTURES_DIR) -> SymbolDay:
+    """Returns the recorded fixture for the day if there is one; otherwise a synthetic one."""
+    day_data = load_fixture(symbol, day_date, fixtures_dir)
+    return day_data if day_data is not None else generate_symbol_day(symbol, day_date)
+
+
+def record_fixtures(env: 'ExecEnv',
+                    symbols: List[str],
+                    dates: List[date],
+                    fixtures_dir: str = FIXTURES_DIR) -> int:
+    """
+    Copies days of data from the environment's mongo database into fixture files.
+    :return: the number of fixtures recorded
+    """
+    num_recorded = 0
+    for symbol in symbols:
+        for day_date in dates:
+            day_data = env.mongo().load_symbol_day(symbol, day_date)
+            if len(day_data.candles) > 0:
+                save_fixture(day_data, fixtures_dir)
+                num_recorded += 1
+    return num_recorded
@@ -0,0 +1,160 @@
+"""
+Runs the benchmark suite and reports throughput regressions against an earlier commit's results.
+
+Usage (from the backend folder):
+    python -m tc2.benchmark.run_benchmarks [--symbols SPY TXN] [--days 6] [--rounds 3] [--baseline <commit or file>]
+
+Results are saved to benchmarks/results/<commit>.json so later commits can be compared against them.
+Exits with status 1 if any case failed, if a case in the baseline is missing from the current results,
+or if any case's throughput dropped by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import List, Optional, Dict
+
+from tc2.benchmark.BenchmarkResult import BenchmarkResult
+from tc2.benchmark.BenchmarkSuite import BenchmarkSuite
+from tc2.log.LogFeed import LogFeed, LogCategory
+from tc2.util.date_util import DATE_TIME_FORMAT
+
+# The folder in which each commit's benchmark results are saved
+RESULTS_DIR = 'benchmarks/results'
+
+# The default fraction by which a case's throughput can drop before it is considered a regression
+DEFAULT_TOLERANCE = 0.1
+
+
+def current_commit() -> str:
+    """Returns the short hash of the checked-out commit, marked dirty if there are uncommitted changes."""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                         stderr=subprocess.DEVNULL).decode('utf-8').strip()
+        changes = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                          stderr=subprocess.DEVNULL).decode('utf-8').strip()
+        return commit + '-dirty' if len(changes) > 0 else commit
+    except Exception:
+        return 'unknown'
+
+
+def save_results(commit: str,
+                 results: List[BenchmarkResult]) -> str:
+    """Saves the results to the commit's results file and returns its path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = f'{RESULTS_DIR}/{commit}.json'
+    with open(path, 'w') as file:
+        json.dump({
+            'commit': commit,
+            'moment': datetime.now().strftime(DATE_TIME_FORMAT),
+            'python': platform.python_version(),
+            'machine': platform.node(),
+            'results': [result.to_json() for result in results]
+        }, file, indent=2)
+    return path
+
+
+def load_results(baseline: str) -> Optional[Dict[str, BenchmarkResult]]:
+    """
+    :param baseline: a results file path, or a commit hash whose results were saved in RESULTS_DIR
+    :return: a dict mapping each case's name to its result, or None if the baseline's results can't be found
+    """
+    path = baseline if os.path.exists(baseline) else f'{RESULTS_DIR}/{baseline}.json'
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        results_json = json.load(file)
+    return {result_json['name']: BenchmarkResult.from_json(result_json) for result_json in results_json['results']}
+
+
+def find_regressions(baseline_results: Dict[str, BenchmarkResult],
+                     results: List[BenchmarkResult],
+                     tolerance: float) -> List[str]:
+    """
+    Prints a comparison of each case's throughput and returns the names of cases that regressed,
+    including cases in the baseline that are missing from the current results.
+    """
+    regressions = []
+    for result in results:
+        if result.failed():
+            continue
+        if result.name not in baseline_results:
+            print(f'{result.name:<32} (no baseline)')
+            continue
+        if baseline_results[result.name].failed():
+            print(f'{result.name:<32} (baseline failed)')
+            continue
+        change = result.ops_per_sec() / baseline_results[result.name].ops_per_sec() - 1
+        regressed = change < -tolerance
+        print(f'{result.name:<32} {change * 100:>+8.1f}%{"   REGRESSION" if regressed else ""}')
+        if regressed:
+            regressions.append(result.name)
+    result_names = {result.name for result in results}
+    for name in baseline_results:
+        if name not in result_names:
+            print(f'{name:<32} MISSING')
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Times hot paths on SymbolDay fixtures using in-memory databases.')
+    parser.add_argument('--symbols', nargs='+', default=['SPY'], help='symbols whose fixtures to use')
+    parser.add_argument('--days', type=int, default=6, help='number of market days of fixtures (at least 3)')
+    parser.add_argument('--rounds', type=int, default=3, help='times to run each case; the fastest is reported')
+    parser.add_argument('--baseline', default=None, help='commit hash or results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='fractional throughput drop allowed before a case counts as a regression')
+    args = parser.parse_args()
+
+    # Create the log folder, which won't exist yet on a fresh checkout
+    os.makedirs(f'logs/{LogCategory.OPTIMIZATION.value}', exist_ok=True)
+
+    # Run the benchmarks, closing the logfeed afterwards so its writer thread and manager process don't outlive us
+    logfeed = LogFeed(LogCategory.OPTIMIZATION, structured=False)
+    try:
+        return run(args, logfeed)
+    finally:
+        logfeed.close()
+
+
+def run(args: argparse.Namespace, logfeed: LogFeed) -> int:
+    """Runs the benchmarks, saves their results, and returns the exit code after comparing them to the baseline."""
+    suite = BenchmarkSuite(logfeed=logfeed,
+                           symbols=args.symbols,
+                           num_days=args.days,
+                           rounds=args.rounds)
+    suite.setup()
+    results = suite.run()
+    for result in results:
+        print(str(result))
+
+    # Save the results
+    commit = current_commit()
+    print(f'Saved results to {save_results(commit, results)}')
+
+    # Report failed cases, which shouldn't pass the gate just because they produced no timing
+    failures = [result.name for result in results if result.failed()]
+    if len(failures) > 0:
+        print(f'{len(failures)} case(s) failed: {", ".join(failures)}')
+
+    # Compare the results to the baseline
+    if args.baseline is None:
+        return 1 if len(failures) > 0 else 0
+    baseline_results = load_results(args.baseline)
+    if baseline_results is None:
+        print(f'Could not find benchmark results for baseline "{args.baseline}"')
+        return 1
+    print(f'Throughput change since {args.baseline}:')
+    regressions = find_regressions(baseline_results, results, args.tolerance)
+    if len(regressions) > 0:
+        print(f'{len(regressions)} case(s) regressed by more than {args.tolerance * 100:.0f}%: {", ".join(regressions)}')
+        return 1
+    return 1 if len(failures) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
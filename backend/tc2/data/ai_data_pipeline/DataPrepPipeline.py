@@ -1,20 +1,24 @@
 from typing import Optional, List
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
 from tc2.stock_analysis.AbstractNeuralModel import AbstractNeuralModel
 from tc2.env.ExecEnv import ExecEnv
-from tc2.data.data_structs.neural_data.NeuralExample import NeuralExample
+from tc2.data.data_structs.neural_data.NeuralExampleMatrix import NeuralExampleMatrix
 
 
 class DataPrepPipeline(ExecEnv):
     """
     Contains functions to load, normalize, and export AI training data.
     Intended for use in feeding an AI model.
+    Examples are loaded as packed matrices and processed with vectorized operations, so millions of examples
+    can be prepared without any per-example Python work.
     """
 
     symbol: str
+    output_names: List[str]
     df_raw: Optional[DataFrame]
     df: Optional[DataFrame]
 
@@ -22,54 +26,76 @@ class DataPrepPipeline(ExecEnv):
         super().__init__(env.logfeed_program, env.logfeed_process)
         self.clone_same_thread(env)
         self.symbol = symbol
+        self.output_names = []
+        self.df_raw = None
         self.df = None
 
     def _create_dataframe(self, feature_names: List[str], output_names: List[str],
-                          examples: List[NeuralExample]) -> DataFrame:
+                          matrix: NeuralExampleMatrix) -> DataFrame:
         """
-        Loads raw model input data into this pipeline's df_raw DataFrame.
+        Loads raw model input data into a DataFrame with a 'time' column, a column per feature, and a column
+        per output.
         :param feature_names: a list naming model features (e.g. price_1)
-        :param feature_names: a list naming model outputs (e.g. predicted_profit)
-        :param examples: a list of NeuralExample objects, each containing n_features inputs and n_outputs outputs
+        :param output_names: a list naming model outputs (e.g. predicted_profit)
+        :param matrix: the examples, each containing n_features inputs and n_outputs outputs
         """
 
         # Ensure all examples contain the expected number of inputs and outputs
         num_features = len(feature_names)
         num_outputs = len(output_names)
-        for neural_example in examples:
-            if len(neural_example.inputs) != num_features:
-                raise ValueError('Each feature name must correspond to an input ({0} != {1}'
-                                 .format(num_features, len(neural_example.inputs)))
-            if len(neural_example.outputs) != num_outputs:
-                raise ValueError('All output name must correspond to an output ({0} != {1})'
-                                 .format(num_outputs, len(neural_example.outputs)))
+        if len(matrix) > 0 and matrix.inputs.shape[1] != num_features:
+            raise ValueError('Each feature name must correspond to an input ({0} != {1}'
+                             .format(num_features, matrix.inputs.shape[1]))
+        if len(matrix) > 0 and matrix.outputs.shape[1] != num_outputs:
+            raise ValueError('All output name must correspond to an output ({0} != {1})'
+                             .format(num_outputs, matrix.outputs.shape[1]))
 
-        # Collect data into a dictionary object
-        df_data = {'date': []}
-        for i in range(0, len(feature_names)):
-            feature_name = feature_names[i]
-            df_data[feature_name] = []
-        for neural_example in examples:
-            df_data['time'].append(neural_example.time)
-            for i in range(0, len(feature_names)):
-                feature_name = feature_names[i]
-                df_data[feature_name].append(neural_example.inputs[i])
-
-        # Load the pandas DataFrame using our dict object
-        return pd.DataFrame(data=df_data)
+        # Load the pandas DataFrame straight from the example matrices
+        df = pd.concat([pd.DataFrame({'time': matrix.times}),
+                        pd.DataFrame(matrix.inputs.reshape(len(matrix), num_features), columns=feature_names),
+                        pd.DataFrame(matrix.outputs.reshape(len(matrix), num_outputs), columns=output_names)],
+                       axis=1, copy=False)
+        return df
 
     def get_all_data(self, model: AbstractNeuralModel) -> DataFrame:
         """
         Loads training data from mongo and puts it into a pandas DataFrame.
         """
-        examples = self.mongo().load_example_collection(self.symbol, model.model_type.value)
-        self.df_raw = self._create_dataframe(model.feature_names, model.output_names, examples)
+        matrix = self.mongo().load_example_matrix(self.symbol, model.model_type)
+        self.output_names = model.output_names
+        self.df_raw = self._create_dataframe(model.feature_names, model.output_names, matrix)
         return self.df_raw
 
-    def normalize_distribution(self, bins: int = 5) -> None:
+    def normalize_distribution(self, bins: int = 5) -> DataFrame:
         """
         Returns a DataFrame containing an equal number of examples for each class.
         If the model performs regression, this ensures an equal distribution across the given number of bins.
+
+        Models with several outputs are treated as classifiers, with each example belonging to the class of its
+        largest output. Models with one output are treated as regressors, with each example belonging to one of
+        the equal-width bins spanning the output's range. Each class is randomly sampled down to the size of the
+        smallest non-empty class.
         """
-        # TODO
-        pass
+        if self.df_raw is None or len(self.df_raw) == 0:
+            self.df = self.df_raw
+            return self.df
+
+        # Assign each example to a class
+        outputs = self.df_raw[self.output_names].to_numpy()
+        if outputs.shape[1] > 1:
+            classes = np.argmax(outputs, axis=1)
+        else:
+            bin_edges = np.linspace(outputs[:, 0].min(), outputs[:, 0].max(), bins + 1)
+            classes = np.clip(np.digitize(outputs[:, 0], bin_edges[1:-1]), 0, bins - 1)
+
+        # Rank each example within its class in a random order
+        order = np.lexsort((np.random.random(len(classes)), classes))
+        class_counts = np.bincount(classes)
+        class_starts = np.concatenate(([0], np.cumsum(class_counts)[:-1]))
+        ranks = np.empty(len(classes), dtype=np.int64)
+        ranks[order] = np.arange(len(classes)) - class_starts[classes[order]]
+
+        # Keep the same number of examples from each class, in their original order
+        examples_per_class = class_counts[class_counts > 0].min()
+        self.df = self.df_raw[ranks < examples_per_class].reset_index(drop=True)
+        return self.df
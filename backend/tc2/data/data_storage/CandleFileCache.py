@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from tc2.env.EnvType import EnvType
+
+# The formats of the month directories and day files in which candles are cached
+CACHE_MONTH_FORMAT = '%Y-%m'
+CACHE_DATE_FORMAT = '%Y-%m-%d'
+
+
+class CandleFileCache:
+    """
+    An on-disk cache of stable days' second-resolution candles, shared by every process on the machine,
+    so that days which won't change needn't be queried from mongo and decoded again.
+
+    Each symbol-day is stored as an uncompressed .npy file (grouped into one directory per symbol per month)
+    containing an (n, 6) array of [seconds since midnight, open, high, low, close, volume]. Loads memory-map the
+    file, so reading a day costs no decoding and its pages come from the OS page cache when it was recently read
+    by any process. (Each process still builds its own Candle objects from the array.)
+    """
+
+    cache_dir: str
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+
+    def save_candles(self, env_type: EnvType, symbol: str, day: date, candle_array: np.ndarray) -> None:
+        """Caches the symbol's candles on the day, replacing any previously cached candles."""
+        path = self._path(env_type, symbol, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a unique temporary file first so readers never see a partially-written file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                np.save(cache_file, np.ascontiguousarray(candle_array, dtype=np.float64))
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def load_candles(self, env_type: EnvType, symbol: str, day: date) -> Optional[np.ndarray]:
+        """
+        Returns the symbol's cached candle array on the day as a read-only memory map,
+        or None if the day isn't cached.
+        Raises an error if the cached file can't be read; it should then be dropped using drop_day().
+        """
+        try:
+            candle_array = np.load(self._path(env_type, symbol, day), mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        if candle_array.ndim != 2 or candle_array.shape[1] != 6:
+            raise ValueError(f'Cached candle array has shape {candle_array.shape} instead of (n, 6)')
+        return candle_array
+
+    def drop_day(self, env_type: EnvType, symbol: str, day: date) -> None:
+        """Removes the symbol's cached candles on the day, if any."""
+        try:
+            os.remove(self._path(env_type, symbol, day))
+        except FileNotFoundError:
+            pass
+
+    def drop_symbol(self, env_type: EnvType, symbol: str) -> None:
+        """Removes all of the symbol's cached candles."""
+        shutil.rmtree(os.path.join(self.cache_dir, env_type.value, symbol.upper()), ignore_errors=True)
+
+    def clear(self, env_type: EnvType) -> None:
+        """Removes all candles cached from the environment's database."""
+        shutil.rmtree(os.path.join(self.cache_dir, env_type.value), ignore_errors=True)
+
+    def _path(self, env_type: EnvType, symbol: str, day: date) -> str:
+        return os.path.join(self.cache_dir, env_type.value, symbol.upper(), day.strftime(CACHE_MONTH_FORMAT),
+                            day.strftime(CACHE_DATE_FORMAT) + '.npy')
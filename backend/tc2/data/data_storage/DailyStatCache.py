@@ -0,0 +1,49 @@
+import threading
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from tc2.data.data_structs.price_data.DailyStats import DailyStats
+
+
+class DailyStatCache:
+    """
+    Remembers each symbol's DailyStats over recently-requested ranges of days, so models scoring the same symbols
+    again needn't reload their daily candles. A symbol's entries are invalidated whenever any of its days is saved
+    or removed through the price worker that owns the cache. Only complete ranges are cached, so a range that is
+    missing a day is reloaded until the day is saved (possibly by another process).
+    """
+
+    # Max number of ranges to remember per symbol; older ranges are forgotten first
+    MAX_RANGES_PER_SYMBOL = 8
+
+    def __init__(self) -> None:
+        # Private variables
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[Tuple[date, date, int], DailyStats]] = {}
+
+    def get(self, symbol: str, key: Tuple[date, date, int]) -> Optional[DailyStats]:
+        """
+        :param key: the (first day, last day, number of days) of the range
+        :return: the range's cached stats, or None if they aren't cached
+        """
+        with self._lock:
+            return self._stats.get(symbol.upper(), {}).get(key)
+
+    def put(self, symbol: str, key: Tuple[date, date, int], stats: DailyStats) -> None:
+        """Caches the stats of a complete range."""
+        with self._lock:
+            symbol_stats = self._stats.setdefault(symbol.upper(), {})
+            symbol_stats.pop(key, None)
+            symbol_stats[key] = stats
+            while len(symbol_stats) > self.MAX_RANGES_PER_SYMBOL:
+                del symbol_stats[next(iter(symbol_stats))]
+
+    def invalidate(self, symbol: str) -> None:
+        """Forgets all of the symbol's cached stats."""
+        with self._lock:
+            self._stats.pop(symbol.upper(), None)
+
+    def clear(self) -> None:
+        """Forgets all cached stats."""
+        with self._lock:
+            self._stats = {}
@@ -0,0 +1,102 @@
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Tuple
+
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.env.EnvType import EnvType
+
+
+class SymbolDayCache:
+    """
+    Remembers recently-loaded SymbolDays so the same days needn't be decoded from mongo again, evicting the least
+    recently used days once the cached days' estimated size exceeds a byte limit. A day is invalidated whenever
+    it's saved or removed through a price worker in this process. Since other processes can save days too, only
+    days with valid candles are cached; these are historical days that won't be collected again.
+
+    Cached days are shared by every caller, so they are frozen (see SymbolDay.freeze()) when cached: modifying
+    their candles, candle lists, or lookup arrays raises an error.
+    """
+
+    # Max estimated size of all cached days
+    MAX_BYTES = 256 * 1024 * 1024
+
+    # Estimated size of a SymbolDay's lazily-built second index, and of its features per candle
+    DAY_OVERHEAD_BYTES = 256 * 1024
+    FEATURE_BYTES_PER_CANDLE = 6 * 8
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+
+        # Private variables
+        self._lock = threading.Lock()
+        self._days: 'OrderedDict[Tuple[EnvType, str, date], Tuple[SymbolDay, int]]' = OrderedDict()
+        self._num_bytes = 0
+
+    def get(self, env_type: EnvType, symbol: str, day: date) -> Optional[SymbolDay]:
+        """Returns the cached day, or None if it isn't cached."""
+        key = (env_type, symbol.upper(), day)
+        with self._lock:
+            entry = self._days.get(key)
+            if entry is None:
+                return None
+            self._days.move_to_end(key)
+            return entry[0]
+
+    def put(self, env_type: EnvType, day_data: SymbolDay) -> None:
+        """
+        Freezes and caches the day, evicting the least recently used days if the cache grows too large.
+        The day must not be modified afterwards.
+        """
+        num_bytes = self.estimate_bytes(day_data)
+        if num_bytes > self.max_bytes:
+            return
+        day_data.freeze()
+        key = (env_type, day_data.symbol.upper(), day_data.day_date)
+        with self._lock:
+            self._remove(key)
+            self._days[key] = (day_data, num_bytes)
+            self._num_bytes += num_bytes
+            while self._num_bytes > self.max_bytes:
+                self._remove(next(iter(self._days)))
+
+    def invalidate(self, env_type: EnvType, symbol: str, day: Optional[date] = None) -> None:
+        """Forgets the symbol's cached day, or all of its cached days if no day is given."""
+        symbol = symbol.upper()
+        with self._lock:
+            if day is not None:
+                self._remove((env_type, symbol, day))
+                return
+            for key in [key for key in self._days if key[0] is env_type and key[1] == symbol]:
+                self._remove(key)
+
+    def clear(self, env_type: EnvType) -> None:
+        """Forgets all cached days loaded from the environment's database."""
+        with self._lock:
+            for key in [key for key in self._days if key[0] is env_type]:
+                self._remove(key)
+
+    def size_bytes(self) -> int:
+        """Returns the estimated size of all cached days."""
+        return self._num_bytes
+
+    @classmethod
+    def estimate_bytes(cls, day_data: SymbolDay) -> int:
+        """
+        Estimates the memory used by the day once its lookup structures are built,
+        assuming its candles all have about the same size.
+        """
+        if len(day_data.candles) == 0:
+            return cls.DAY_OVERHEAD_BYTES
+        candle = day_data.candles[0]
+        candle_bytes = sys.getsizeof(candle) + sys.getsizeof(candle.__dict__) + sys.getsizeof(candle.moment) \
+            + sum(sys.getsizeof(value) for value in (candle.open, candle.high, candle.low, candle.close,
+                                                     candle.volume)) + cls.FEATURE_BYTES_PER_CANDLE
+        return cls.DAY_OVERHEAD_BYTES + sys.getsizeof(day_data.candles) + len(day_data.candles) * candle_bytes
+
+    def _remove(self, key: Tuple[EnvType, str, date]) -> None:
+        """Forgets the cached day, if any. Must be called while holding the lock."""
+        entry = self._days.pop(key, None)
+        if entry is not None:
+            self._num_bytes -= entry[1]
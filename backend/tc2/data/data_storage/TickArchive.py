@@ -0,0 +1,95 @@
+import os
+import struct
+import zipfile
+from datetime import date, datetime
+from typing import Optional, Tuple, List
+
+import numpy as np
+
+from tc2.data.data_storage.TickArchiveWriter import TickArchiveWriter
+
+# The format of the date in each archive file's name
+ARCHIVE_DATE_FORMAT = '%Y-%m-%d'
+
+# The size (in bytes) of a zip entry's fixed-length local file header
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+class TickArchive:
+    """
+    An on-disk archive of raw trades, kept so candles can be re-aggregated without downloading trades again.
+
+    Each symbol-day is stored in its own .npz file containing three columns: timestamps (epoch nanoseconds),
+    prices, and sizes. Compressed archives are smaller but must be decompressed when loaded; uncompressed archives
+    store each column as a plain zip entry, so loads memory-map the columns instead of reading them.
+    """
+
+    archive_dir: str
+    compress: bool
+
+    def __init__(self, archive_dir: str, compress: bool = True) -> None:
+        self.archive_dir = archive_dir
+        self.compress = compress
+
+    def save_ticks(self, symbol: str, day: date, timestamps_ns: np.ndarray, prices: np.ndarray,
+                   sizes: np.ndarray) -> None:
+        """Saves the symbol's trades on the day, replacing any previously archived trades."""
+        writer = self.open_writer(symbol, day)
+        try:
+            writer.append(timestamps_ns, prices, sizes)
+        except Exception:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def open_writer(self, symbol: str, day: date) -> TickArchiveWriter:
+        """
+        Returns a writer to which the symbol's trades on the day can be appended a batch at a time.
+        The trades replace any previously archived trades once the writer is committed.
+        """
+        return TickArchiveWriter(self._path(symbol, day), self.compress)
+
+    def load_ticks(self, symbol: str, day: date) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Returns the symbol's (timestamps, prices, sizes) on the day, or None if they aren't archived.
+        Columns that were saved uncompressed are returned as read-only memory maps.
+        """
+        path = self._path(symbol, day)
+        if not os.path.exists(path):
+            return None
+        with zipfile.ZipFile(path) as archive_zip:
+            entries = {entry.filename: entry for entry in archive_zip.infolist()}
+            if all(entry.compress_type == zipfile.ZIP_STORED for entry in entries.values()):
+                return tuple(self._mmap_column(path, entries[f'{column}.npy']) for column in ['t', 'p', 's'])
+        with np.load(path) as columns:
+            return columns['t'], columns['p'], columns['s']
+
+    def get_archived_days(self, symbol: str) -> List[date]:
+        """Returns the days on which the symbol's trades are archived, in ascending order."""
+        symbol_dir = os.path.join(self.archive_dir, symbol.upper())
+        if not os.path.isdir(symbol_dir):
+            return []
+        return sorted(datetime.strptime(filename[:-len('.npz')], ARCHIVE_DATE_FORMAT).date()
+                      for filename in os.listdir(symbol_dir) if filename.endswith('.npz'))
+
+    def _path(self, symbol: str, day: date) -> str:
+        return os.path.join(self.archive_dir, symbol.upper(), day.strftime(ARCHIVE_DATE_FORMAT) + '.npz')
+
+    @staticmethod
+    def _mmap_column(path: str, entry: zipfile.ZipInfo) -> np.ndarray:
+        """Memory-maps an uncompressed .npy entry of a .npz file."""
+        with open(path, 'rb') as archive_file:
+            archive_file.seek(entry.header_offset)
+            local_header = archive_file.read(_ZIP_LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+            archive_file.seek(entry.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+            version = np.lib.format.read_magic(archive_file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(archive_file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(archive_file)
+            data_offset = archive_file.tell()
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=shape,
+                         order='F' if fortran_order else 'C')
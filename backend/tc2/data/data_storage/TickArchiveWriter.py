@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import List, BinaryIO
+
+import numpy as np
+
+# The name and dtype of each column stored in an archive file
+ARCHIVE_COLUMNS = [('t', np.int64), ('p', np.float64), ('s', np.int64)]
+
+# The number of bytes to copy at once when moving a column into the archive
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class TickArchiveWriter:
+    """
+    Writes one symbol-day's trades to a TickArchive file incrementally, so trades needn't all be held in memory.
+
+    Each appended batch of trades is written straight to a temporary file per column in the archive's directory.
+    Committing copies the columns, chunk by chunk, into the .npz file that TickArchive.load_ticks() reads.
+    Aborting (or committing) removes the temporary files.
+    """
+
+    path: str
+    compress: bool
+    num_ticks: int
+    _column_paths: List[str]
+    _column_files: List[BinaryIO]
+
+    def __init__(self, path: str, compress: bool) -> None:
+        """
+        Do NOT instantiate a TickArchiveWriter object directly.
+        Instead, use TickArchive.open_writer().
+        """
+        self.path = path
+        self.compress = compress
+        self.num_ticks = 0
+        self._column_paths = []
+        self._column_files = []
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            for column, dtype in ARCHIVE_COLUMNS:
+                fd, column_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=f'.{column}.tmp')
+                self._column_paths.append(column_path)
+                self._column_files.append(os.fdopen(fd, 'wb'))
+        except Exception:
+            self.abort()
+            raise
+
+    def append(self, timestamps_ns: np.ndarray, prices: np.ndarray, sizes: np.ndarray) -> None:
+        """Writes the next batch of trades, which must come after any already appended, to disk."""
+        if not len(timestamps_ns) == len(prices) == len(sizes):
+            raise ValueError('Each trade must have a timestamp, price, and size ({0}, {1}, {2})'
+                             .format(len(timestamps_ns), len(prices), len(sizes)))
+        for column_file, (column, dtype), values in zip(self._column_files, ARCHIVE_COLUMNS,
+                                                        [timestamps_ns, prices, sizes]):
+            column_file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self.num_ticks += len(timestamps_ns)
+
+    def commit(self) -> None:
+        """Saves the appended trades to the archive, replacing any previously archived trades."""
+        try:
+            for column_file in self._column_files:
+                column_file.close()
+
+            # Write to a temporary file first so readers never see a partially-written archive
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.npz.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as archive_file:
+                    self._write_archive(archive_file)
+                os.replace(temp_path, self.path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        """Discards the appended trades."""
+        for column_file in self._column_files:
+            column_file.close()
+        for column_path in self._column_paths:
+            try:
+                os.remove(column_path)
+            except FileNotFoundError:
+                pass
+        self._column_files = []
+        self._column_paths = []
+
+    def _write_archive(self, archive_file: BinaryIO) -> None:
+        """Writes each column to the archive file as a .npy entry, in the same format as np.savez()."""
+        compression = zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(archive_file, mode='w', compression=compression, allowZip64=True) as archive_zip:
+            for column_path, (column, dtype) in zip(self._column_paths, ARCHIVE_COLUMNS):
+                with archive_zip.open(f'{column}.npy', mode='w', force_zip64=True) as entry_file, \
+                        open(column_path, 'rb') as column_file:
+                    np.lib.format.write_array_header_1_0(entry_file, {
+                        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                        'fortran_order': False,
+                        'shape': (self.num_ticks,)})
+                    shutil.copyfileobj(column_file, entry_file, _COPY_BUFFER_SIZE)
@@ -0,0 +1,87 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import pymongo
+from redis import Redis
+
+"""
+A per-process registry of database clients, shared by every MongoManager and RedisManager in the process.
+
+pymongo's MongoClient and redis-py's Redis are thread-safe and keep their own connection pools, so threads can share
+one client per server instead of each opening new connections. Clients are not safe to use after os.fork(),
+so a process that inherits the registry from its parent starts with an empty one.
+"""
+
+_lock = threading.Lock()
+
+# (env type, user, password, ip, port) -> mongo client
+_mongo_clients: Dict[Tuple[str, str, str, str, str], pymongo.MongoClient] = {}
+
+# (env type, ip, port) -> redis client
+_redis_clients: Dict[Tuple[str, str, str], Redis] = {}
+
+
+def get_mongo_client(env_type_name: str,
+                     user: str,
+                     password: str,
+                     ip: str,
+                     port: str) -> Tuple[pymongo.MongoClient, bool]:
+    """
+    Returns this process's mongo client for the environment type and server, creating it if necessary.
+    :return: the client, and whether it was just created (i.e. hasn't been verified yet)
+    """
+    key = (env_type_name, user, password, ip, port)
+    with _lock:
+        client = _mongo_clients.get(key)
+        if client is not None:
+            return client, False
+        client = _mongo_clients[key] = pymongo.MongoClient(f'mongodb://{user}:{password}@{ip}:{port}')
+        return client, True
+
+
+def get_redis_client(env_type_name: str,
+                     ip: str,
+                     port: str) -> Tuple[Redis, bool]:
+    """
+    Returns this process's redis client for the environment type and server, creating it if necessary.
+    :return: the client, and whether it was just created (i.e. hasn't been verified yet)
+    """
+    key = (env_type_name, ip, port)
+    with _lock:
+        client = _redis_clients.get(key)
+        if client is not None:
+            return client, False
+        client = _redis_clients[key] = Redis(host=ip, port=port)
+        return client, True
+
+
+def discard_client(client: any) -> None:
+    """Removes a client from the registry (e.g. after it failed verification) so the next request creates another."""
+    with _lock:
+        for clients in (_mongo_clients, _redis_clients):
+            for key in [key for key, pooled_client in clients.items() if pooled_client is client]:
+                del clients[key]
+
+
+def close_clients() -> None:
+    """Closes and forgets every client owned by this process."""
+    with _lock:
+        for client in list(_mongo_clients.values()) + list(_redis_clients.values()):
+            try:
+                client.close()
+            except Exception:
+                pass
+        _mongo_clients.clear()
+        _redis_clients.clear()
+
+
+def _forget_inherited_clients() -> None:
+    """Empties the registry in a newly-forked child process, whose inherited clients belong to its parent."""
+    global _lock
+    _lock = threading.Lock()
+    _mongo_clients.clear()
+    _redis_clients.clear()
+
+
+os.register_at_fork(after_in_child=_forget_inherited_clients)
@@ -0,0 +1,42 @@
+from tc2.data.data_storage.mongo.MongoManager import MongoManager
+from tc2.data.data_storage.mongo.workers.MemoryNeuralWorker import MemoryNeuralWorker
+from tc2.data.data_storage.mongo.workers.MemoryPriceWorker import MemoryPriceWorker
+from tc2.util.synchronization import synchronized_on_mongo
+
+
+class MemoryMongoManager(MongoManager):
+    """
+    A MongoManager that keeps its data in this process's memory instead of on the MongoDB server.
+    Each instance has its own data, so environments using it never see or clear each other's data.
+    """
+
+    price_worker: MemoryPriceWorker
+    neural_worker: MemoryNeuralWorker
+
+    def connect(self,
+                user: str = '',
+                password: str = '',
+                ip: str = '',
+                port: str = '') -> bool:
+        """Creates the in-memory workers; the connection parameters are ignored."""
+        self.client = None
+        self.price_worker = MemoryPriceWorker(logfeed_program=self.logfeed_program,
+                                              env_type=self.env_type)
+        self.neural_worker = MemoryNeuralWorker(logfeed_program=self.logfeed_program,
+                                                env_type=self.env_type)
+        self._connected = True
+        return True
+
+    @synchronized_on_mongo
+    def drop_symbol(self,
+                    symbol: str) -> None:
+        self.price_worker.drop_symbol(symbol)
+        self.neural_worker.drop_symbol(symbol)
+
+    def clear_db(self) -> None:
+        """Removes all candle data and analysis/ai data from memory."""
+        self.price_worker.clear()
+        self.neural_worker.clear()
+
+    def shutdown(self) -> None:
+        pass
@@ -1,13 +1,20 @@
 import os
 import traceback
 from datetime import date
-from typing import Optional, List
+from typing import Optional, List, Dict, Union
 
+import numpy as np
 import pymongo
 
+from tc2.data.data_storage import client_pool
 from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
 from tc2.data.data_structs.neural_data.NeuralExample import NeuralExample
+from tc2.data.data_structs.neural_data.NeuralExampleMatrix import NeuralExampleMatrix
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
+from tc2.data.data_structs.price_data.Candle import Candle
 from tc2.data.data_structs.price_data.DailyCandle import DailyCandle
+from tc2.data.data_structs.price_data.DailyStats import DailyStats
+from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.env.EnvType import EnvType
 from tc2.log.LogFeed import LogFeed
@@ -43,18 +50,27 @@ class MongoManager(Loggable):
                 password: str,
                 ip: str,
                 port: str) -> bool:
-        """Return false if there was a problem initializing the connection."""
+        """
+        Return false if there was a problem initializing the connection.
+        The client is shared with every MongoManager of the same EnvType in this process, and it is only tested
+        the first time it is used.
+        """
         try:
-            self.client = pymongo.MongoClient(
-                f'mongodb://{user}:{password}@{ip}:{port}')
+            self.client, new_client = client_pool.get_mongo_client(self.env_type.value, user, password, ip, port)
 
-            # Test accessing a document collection
             # noinspection PyTypeChecker
             self.db = self.client["stocks_" + self.env_type.value]
             self.candle_collection_secondly = self.db["candle_dates_secondly"]
             self.candle_collection_daily = self.db["candle_dates_daily"]
             self.neural_collection = self.db["ai_datetimes"]
-            self.candle_collection_secondly.find_one({"symbol": 'TEST', "date": 'TEST'})
+
+            if new_client:
+                # Test accessing a document collection
+                self.candle_collection_secondly.find_one({"symbol": 'TEST', "date": 'TEST'})
+
+                # Index daily documents so the completeness index can be queried by symbol and date range
+                self.candle_collection_daily.create_index([("symbol", pymongo.ASCENDING),
+                                                           ("date", pymongo.ASCENDING)])
 
             # Create workers
             self.price_worker = MongoPriceWorker(logfeed_program=self.logfeed_program,
@@ -70,6 +86,7 @@ class MongoManager(Loggable):
 
             self._connected = True
         except Exception:
+            client_pool.discard_client(getattr(self, 'client', None))
             self.error_main(f'Could not initialize connection to MongoDB in #{self._pid}:')
             self.warn_main(traceback.format_exc())
             return False
@@ -94,13 +111,67 @@ class MongoManager(Loggable):
                         debug_output: Optional[List[str]] = None) -> SymbolDay:
         return self.price_worker.load_symbol_day(symbol, day, debug_output)
 
+    @synchronized_on_mongo
+    def load_bars(self,
+                  symbol: str,
+                  day: date,
+                  resolution: BarResolution) -> List[Union[Candle, MinuteCandle]]:
+        return self.price_worker.load_bars(symbol, day, resolution)
+
+    @synchronized_on_mongo
+    def load_price_index(self,
+                         symbols: List[str],
+                         start_date: date,
+                         end_date: date) -> Dict[str, Dict[date, Optional[bool]]]:
+        return self.price_worker.load_price_index(symbols, start_date, end_date)
+
+    @synchronized_on_mongo
+    def index_symbol_day(self,
+                         day_data: SymbolDay) -> bool:
+        return self.price_worker.index_symbol_day(day_data)
+
     @synchronized_on_mongo
     def load_aggregate_candle(self,
                               symbol: str,
                               day: date,
-                              debug_output: Optional[List[str]]) -> Optional[DailyCandle]:
+                              debug_output: Optional[List[str]] = None) -> Optional[DailyCandle]:
         return self.price_worker.load_aggregate_candle(symbol, day, debug_output)
 
+    @synchronized_on_mongo
+    def load_aggregate_candles(self,
+                               symbol: str,
+                               start_date: date,
+                               end_date: date) -> np.ndarray:
+        return self.price_worker.load_aggregate_candles(symbol, start_date, end_date)
+
+    @synchronized_on_mongo
+    def load_daily_stats(self,
+                         symbol: str,
+                         days: List[date]) -> Optional[DailyStats]:
+        return self.price_worker.load_daily_stats(symbol, days)
+
+    @synchronized_on_mongo
+    def clear_cached_days(self) -> None:
+        self.price_worker.clear_cached_days()
+
+    @synchronized_on_mongo
+    def load_sim_outcomes(self,
+                          symbol: str,
+                          start_date: date,
+                          end_date: date,
+                          sim_name: str,
+                          sim_params: str) -> Dict[date, np.ndarray]:
+        return self.price_worker.load_sim_outcomes(symbol, start_date, end_date, sim_name, sim_params)
+
+    @synchronized_on_mongo
+    def save_sim_outcomes(self,
+                          symbol: str,
+                          day: date,
+                          sim_name: str,
+                          sim_params: str,
+                          outcomes: List[int]) -> None:
+        return self.price_worker.save_sim_outcomes(symbol, day, sim_name, sim_params, outcomes)
+
     @synchronized_on_mongo
     def save_symbol_day(self,
                         day_data: SymbolDay,
@@ -142,6 +213,19 @@ class MongoManager(Loggable):
                                examples: List[NeuralExample]) -> None:
         return self.neural_worker.save_neural_collection(symbol, model_type, examples)
 
+    @synchronized_on_mongo
+    def load_example_matrix(self,
+                            symbol: str,
+                            model_type: AnalysisModelType) -> NeuralExampleMatrix:
+        return self.neural_worker.load_example_matrix(symbol, model_type)
+
+    @synchronized_on_mongo
+    def save_example_matrix(self,
+                            symbol: str,
+                            model_type: AnalysisModelType,
+                            matrix: NeuralExampleMatrix) -> None:
+        return self.neural_worker.save_example_matrix(symbol, model_type, matrix)
+
     @synchronized_on_mongo
     def drop_neural_collection(self,
                                symbol: Optional[str],
@@ -157,11 +241,13 @@ class MongoManager(Loggable):
         self.candle_collection_secondly.delete_many({})
         self.candle_collection_daily.delete_many({})
         self.neural_collection.delete_many({})
+        self.price_worker.clear_cached_days()
         if self.env_type is EnvType.LIVE:
             self.error_main(f'Cleared all candles from LIVE environment')
 
     def shutdown(self) -> None:
+        """Closes every pooled database client in this process, including those used by other managers."""
         try:
-            self.client.close()
+            client_pool.close_clients()
         except Exception:
             traceback.print_exc()
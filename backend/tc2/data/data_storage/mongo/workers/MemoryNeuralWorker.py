@@ -0,0 +1,53 @@
+from typing import Optional, Dict, Tuple
+
+from tc2.data.data_storage.mongo.workers.MongoNeuralWorker import MongoNeuralWorker
+from tc2.data.data_structs.neural_data.NeuralExampleMatrix import NeuralExampleMatrix
+from tc2.env.EnvType import EnvType
+from tc2.log.LogFeed import LogFeed
+from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
+
+
+class MemoryNeuralWorker(MongoNeuralWorker):
+    """
+    Implements MongoNeuralWorker's functionality using NumPy arrays held in this process's memory.
+    """
+
+    # (symbol, model type) -> the pair's examples
+    _examples: Dict[Tuple[str, str], NeuralExampleMatrix]
+
+    def __init__(self, logfeed_program: LogFeed, env_type: EnvType):
+        super().__init__(logfeed_program=logfeed_program,
+                         candle_collection_secondly=None,
+                         candle_collection_daily=None,
+                         neural_collection=None,
+                         env_type=env_type)
+        self._examples = {}
+
+    def load_example_matrix(self, symbol: str, model_type: AnalysisModelType) -> NeuralExampleMatrix:
+        """Returns the (symbol, model) pair's examples, sorted by time."""
+        return self._examples.get((symbol.upper(), model_type.value), NeuralExampleMatrix.empty())
+
+    def save_example_matrix(self, symbol: str, model_type: AnalysisModelType, matrix: NeuralExampleMatrix) -> None:
+        """
+        Replaces the (symbol, model) pair's examples with the matrix's.
+        """
+        self._examples[(symbol.upper(), model_type.value)] = matrix
+
+    def drop_neural_collection(self, symbol: Optional[str], model_type: AnalysisModelType) -> None:
+        """
+        :param symbol: set to None to drop all symbols
+        Deletes a model's training data.
+        """
+        for key in list(self._examples.keys()):
+            if key[1] == model_type.value and (symbol is None or key[0] == symbol.upper()):
+                del self._examples[key]
+
+    def drop_symbol(self, symbol: str) -> None:
+        """Deletes every model's training data on the symbol."""
+        for key in list(self._examples.keys()):
+            if key[0] == symbol.upper():
+                del self._examples[key]
+
+    def clear(self) -> None:
+        """Deletes all training data."""
+        self._examples = {}
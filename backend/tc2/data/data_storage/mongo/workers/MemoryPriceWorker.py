@@ -0,0 +1,221 @@
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Union, Tuple
+
+import numpy as np
+
+from tc2.data.data_storage.CandleFileCache import CandleFileCache
+from tc2.data.data_storage.DailyStatCache import DailyStatCache
+from tc2.data.data_storage.mongo.workers.MongoPriceWorker import MongoPriceWorker
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
+from tc2.data.data_structs.price_data.DailyCandle import DailyCandle
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.env.EnvType import EnvType
+from tc2.log.LogFeed import LogFeed
+from tc2.util.candle_util import bar_array_to_candles
+from tc2.util.date_util import DATE_FORMAT
+
+
+class MemoryPriceWorker(MongoPriceWorker):
+    """
+    Implements MongoPriceWorker's functionality using NumPy arrays held in this process's memory.
+
+    Each day's candles are stored as an (n, 6) array of [seconds since midnight, open, high, low, close, volume],
+    which costs far less to save and load than encoding every candle as a string.
+    Like MongoDB, candle moments are truncated to the second and loads return new objects.
+    """
+
+    # Symbol -> date -> day's candles array
+    _candle_arrays: Dict[str, Dict[date, np.ndarray]]
+
+    # Symbol -> date -> [open, high, low, close, volume]
+    _daily_arrays: Dict[str, Dict[date, np.ndarray]]
+
+    # Symbol -> date -> whether the day's candles were valid when saved
+    _valid_days: Dict[str, Dict[date, bool]]
+
+    # Symbol -> date -> resolution -> day's bars array
+    _bar_arrays: Dict[str, Dict[date, Dict[BarResolution, np.ndarray]]]
+
+    # Symbol -> date -> simulation name -> (simulation params, outcomes array)
+    _sim_outcomes: Dict[str, Dict[date, Dict[str, Tuple[str, np.ndarray]]]]
+
+    # Cache of daily stats computed from this worker's data
+    _daily_stat_cache: DailyStatCache
+
+    def __init__(self, logfeed_program: LogFeed, env_type: EnvType):
+        super().__init__(logfeed_program=logfeed_program,
+                         candle_collection_secondly=None,
+                         candle_collection_daily=None,
+                         neural_collection=None,
+                         env_type=env_type)
+        self._candle_arrays = {}
+        self._daily_arrays = {}
+        self._valid_days = {}
+        self._bar_arrays = {}
+        self._sim_outcomes = {}
+        self._daily_stat_cache = DailyStatCache()
+
+    def get_dates_on_file(self, symbol: str, start_date: date, end_date: date,
+                          debug_output: Optional[List[str]] = None) -> List[date]:
+        """Returns a list of date objects for which we have data for the symbol."""
+        dates = sorted(day_date for day_date in self._candle_arrays.get(symbol.upper(), {}).keys()
+                       if start_date <= day_date <= end_date)
+        if debug_output is not None:
+            debug_output.append('memory dates found: ' +
+                                ', '.join([day_date.strftime(DATE_FORMAT) for day_date in dates]))
+        return dates
+
+    def load_price_index(self, symbols: List[str], start_date: date,
+                         end_date: date) -> Dict[str, Dict[date, Optional[bool]]]:
+        """Returns the validity of each symbol's days on file between start_date and end_date (inclusive)."""
+        return {symbol.upper(): {day_date: valid
+                                 for day_date, valid in self._valid_days.get(symbol.upper(), {}).items()
+                                 if start_date <= day_date <= end_date}
+                for symbol in symbols}
+
+    def index_symbol_day(self, day_data: SymbolDay) -> bool:
+        """Records whether the day's candles are valid."""
+        valid = SymbolDay.validate_candles(day_data.candles)
+        if day_data.day_date in self._candle_arrays.get(day_data.symbol.upper(), {}):
+            self._valid_days.setdefault(day_data.symbol.upper(), {})[day_data.day_date] = valid
+        return valid
+
+    def load_symbol_day(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> SymbolDay:
+        """Converts the day's stored candles array into a SymbolDay object."""
+        return SymbolDay(symbol, day, self._get_candles_for_day(symbol, day, debug_output))
+
+    def load_bars(self, symbol: str, day: date, resolution: BarResolution) -> List[Union[Candle, MinuteCandle]]:
+        """Converts the day's stored bars array at the given resolution into a list of candles."""
+        if resolution is BarResolution.SECOND:
+            return self._get_candles_for_day(symbol, day)
+        bar_array = self._bar_arrays.get(symbol.upper(), {}).get(day, {}).get(resolution)
+        return [] if bar_array is None else bar_array_to_candles(bar_array, day)
+
+    def load_aggregate_candle(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> Optional[DailyCandle]:
+        """Converts the day's stored aggregate array into a DailyCandle object."""
+        daily_array = self._daily_arrays.get(symbol.upper(), {}).get(day)
+        if daily_array is None:
+            return None
+        day_open, day_high, day_low, day_close, day_volume = daily_array.tolist()
+        return DailyCandle(day_date=day, open=day_open, high=day_high, low=day_low, close=day_close,
+                           volume=int(day_volume))
+
+    def load_aggregate_candles(self, symbol: str, start_date: date, end_date: date) -> np.ndarray:
+        """
+        Stacks the symbol's stored aggregate arrays between start_date and end_date (inclusive).
+        :return: an (n, 6) array of [date ordinal, open, high, low, close, volume], sorted by date
+        """
+        daily_arrays = self._daily_arrays.get(symbol.upper(), {})
+        days = sorted(day_date for day_date in daily_arrays if start_date <= day_date <= end_date)
+        if len(days) == 0:
+            return np.zeros((0, 6), dtype=np.float64)
+        return np.column_stack(([day_date.toordinal() for day_date in days],
+                                np.vstack([daily_arrays[day_date] for day_date in days]))).astype(np.float64)
+
+    def load_sim_outcomes(self, symbol: str, start_date: date, end_date: date, sim_name: str,
+                          sim_params: str) -> Dict[date, np.ndarray]:
+        """Returns the saved outcomes of the named simulation on each day in the range, if saved using sim_params."""
+        return {day_date: day_outcomes[sim_name][1]
+                for day_date, day_outcomes in self._sim_outcomes.get(symbol.upper(), {}).items()
+                if start_date <= day_date <= end_date and day_outcomes.get(sim_name, ('',))[0] == sim_params}
+
+    def save_sim_outcomes(self, symbol: str, day: date, sim_name: str, sim_params: str,
+                          outcomes: List[int]) -> None:
+        """Stores the outcomes of the named simulation on the day, until the day is saved again."""
+        if day in self._daily_arrays.get(symbol.upper(), {}):
+            self._sim_outcomes.setdefault(symbol.upper(), {}).setdefault(day, {})[sim_name] = \
+                (sim_params, np.array(outcomes, dtype=np.int8))
+
+    def save_symbol_day(self, day_data: SymbolDay, debug_output: Optional[List[str]] = None) -> None:
+        """
+        Saves the day's data in memory, or removes it if day_data.candles is empty.
+        """
+
+        # Make candle moments timezone-naive
+        for candle in day_data.candles:
+            if candle.moment.tzinfo is not None:
+                candle.moment = candle.moment.replace(tzinfo=None)
+        self._daily_stat_cache.invalidate(day_data.symbol)
+
+        if len(day_data.candles) == 0:
+            self._drop_day_data(day_data.symbol, day_data.day_date, debug_output)
+            return
+
+        # Save secondly candles, discarding outcomes simulated using the previous candles
+        self._update_secondly_candles(day_data, debug_output)
+        self._sim_outcomes.get(day_data.symbol.upper(), {}).pop(day_data.day_date, None)
+
+        # Calculate and save daily candle
+        daily_candle = day_data.create_daily_candle()
+        self._daily_arrays.setdefault(day_data.symbol.upper(), {})[day_data.day_date] = np.array(
+            [daily_candle.open, daily_candle.high, daily_candle.low, daily_candle.close, daily_candle.volume],
+            dtype=np.float64)
+
+        # Aggregate and save bars
+        self._bar_arrays.setdefault(day_data.symbol.upper(), {})[day_data.day_date] = \
+            self._aggregate_stored_bars(day_data)
+
+        # Index the day's validity
+        self._valid_days.setdefault(day_data.symbol.upper(), {})[day_data.day_date] = \
+            SymbolDay.validate_candles(day_data.candles)
+
+    def drop_symbol(self, symbol: str) -> None:
+        """Clears the symbol's price data."""
+        if self.env_type is EnvType.LIVE:
+            self.error_main('dropping {} on all days'.format(symbol))
+        self._candle_arrays.pop(symbol.upper(), None)
+        self._daily_arrays.pop(symbol.upper(), None)
+        self._valid_days.pop(symbol.upper(), None)
+        self._bar_arrays.pop(symbol.upper(), None)
+        self._sim_outcomes.pop(symbol.upper(), None)
+        self._daily_stat_cache.invalidate(symbol)
+
+    def clear(self) -> None:
+        """Deletes all price data."""
+        self._candle_arrays = {}
+        self._daily_arrays = {}
+        self._valid_days = {}
+        self._bar_arrays = {}
+        self._sim_outcomes = {}
+        self._daily_stat_cache.clear()
+
+    def _stat_cache(self) -> DailyStatCache:
+        """Returns this worker's own cache, since other workers' data is separate."""
+        return self._daily_stat_cache
+
+    def _file_cache(self) -> Optional[CandleFileCache]:
+        """Returns None, since this worker's data is already in memory."""
+        return None
+
+    def _get_candles_for_day(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> List[Candle]:
+        """Returns a list of new Candle objects for the symbol on the date."""
+        candles_array = self._candle_arrays.get(symbol.upper(), {}).get(day)
+        if candles_array is None:
+            if debug_output is not None:
+                debug_output.append('memory._get_candles_for_day returning empty list')
+            return []
+        midnight = datetime.combine(day, datetime.min.time())
+        return [Candle(moment=midnight + timedelta(seconds=secs), open=candle_open, high=candle_high,
+                       low=candle_low, close=candle_close, volume=int(volume))
+                for secs, candle_open, candle_high, candle_low, candle_close, volume in candles_array.tolist()]
+
+    def _update_secondly_candles(self, day_data: SymbolDay, debug_output: Optional[List[str]] = None) -> None:
+        """Inserts or replaces the given candles on the given date."""
+        self._candle_arrays.setdefault(day_data.symbol.upper(), {})[day_data.day_date] = day_data.to_candle_array()
+
+    def _drop_day_data(self,
+                       symbol: str,
+                       day: date,
+                       debug_output: Optional[List[str]] = None) -> None:
+        """Deletes a date's second- and daily-resolution data."""
+        self._candle_arrays.get(symbol.upper(), {}).pop(day, None)
+        self._daily_arrays.get(symbol.upper(), {}).pop(day, None)
+        self._valid_days.get(symbol.upper(), {}).pop(day, None)
+        self._bar_arrays.get(symbol.upper(), {}).pop(day, None)
+        self._sim_outcomes.get(symbol.upper(), {}).pop(day, None)
+        self._daily_stat_cache.invalidate(symbol)
+        if debug_output is not None:
+            debug_output.append('memory._drop_day_data dropped {} on {}/{}/{}'
+                                .format(symbol, day.month, day.day, day.year))
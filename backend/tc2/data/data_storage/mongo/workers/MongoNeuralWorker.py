@@ -1,70 +1,84 @@
-from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+import numpy as np
 
 from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
 from tc2.data.data_storage.mongo.workers.AbstractMongoWorker import AbstractMongoWorker
 from tc2.data.data_structs.neural_data.NeuralExample import NeuralExample
+from tc2.data.data_structs.neural_data.NeuralExampleMatrix import NeuralExampleMatrix
+from tc2.metrics.Metrics import timed
 
 
 class MongoNeuralWorker(AbstractMongoWorker):
     """
     Contains functionality for saving and loading neural network training data.
+
+    Each (symbol, model) pair's examples are stored as packed matrices split into chunks of rows, each chunk in its
+    own document to stay well under MongoDB's document size limit. Examples saved one document per example by
+    older versions are still loaded.
     """
 
+    # Max size (in bytes) of the packed rows stored in each chunk document
+    MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+    @timed('mongo.load_example_collection')
     def load_example_collection(self, symbol: str, model_type: AnalysisModelType) -> List[NeuralExample]:
-        """Queries MongoDB for a list of examples for the day and puts them into a SymbolDay object."""
-        examples = []
-        for example_time in self._get_example_times_on_file(symbol, model_type):
-            inputs = self._get_example_inputs(symbol, model_type, example_time)
-            outputs = self._get_example_outputs(symbol, model_type, example_time)
-            examples.append(NeuralExample(example_time, inputs, outputs))
-        examples.sort(key=lambda example_to_sort: example_to_sort.time)
-        return examples
+        """Queries MongoDB for the (symbol, model) pair's examples, sorted by time."""
+        return self.load_example_matrix(symbol, model_type).to_examples()
+
+    @timed('mongo.load_example_matrix')
+    def load_example_matrix(self, symbol: str, model_type: AnalysisModelType) -> NeuralExampleMatrix:
+        """Queries MongoDB for the (symbol, model) pair's examples and unpacks them straight into matrices."""
+        query = {"symbol": symbol.upper(), "model_type": model_type.value}
+        chunk_docs = []
+        legacy_docs = []
+        for doc in self.neural_collection.find(query):
+            if 'chunk' in doc:
+                chunk_docs.append(doc)
+            elif 'time' in doc:
+                legacy_docs.append(doc)
 
+        # Unpack each chunk of packed rows
+        chunk_docs.sort(key=lambda doc_to_sort: doc_to_sort['chunk'])
+        matrices = [self._unpack_chunk(doc) for doc in chunk_docs]
+
+        # Convert examples saved one per document
+        if len(legacy_docs) > 0:
+            matrices.append(NeuralExampleMatrix.from_examples([
+                NeuralExample(doc['time'],
+                              [float(input_feature) for input_feature in doc['inputs']],
+                              [float(output_neuron) for output_neuron in doc['outputs']])
+                for doc in legacy_docs]))
+
+        return NeuralExampleMatrix.concatenate(matrices)
+
+    @timed('mongo.save_neural_collection')
     def save_neural_collection(self, symbol: str, model_type: AnalysisModelType, examples: List[NeuralExample]) -> None:
         """
         Saves the examples in MongoDB, or clears the (symbol, model) pair from MongoDB.
         """
-        self.drop_neural_collection(symbol, model_type)
-        for example in examples:
-            self._update_neural_example(symbol, model_type, example)
+        self.save_example_matrix(symbol, model_type, NeuralExampleMatrix.from_examples(examples))
 
-    def _get_example_times_on_file(self, symbol: str, model_type: AnalysisModelType) -> List[datetime]:
-        """Returns a list of datetime objects for which we have AI training data."""
-        query = {"symbol": symbol.upper(), "model_type": model_type.value}
-        requested_fields = {"datetime": 1}
-        responses = self.neural_collection.find(query, requested_fields)
-        if responses is None:
-            return []
-        example_datetimes = []
-        for doc in responses:
-            example_datetimes.append(doc['date'])
-        example_datetimes.sort()
-        return example_datetimes
-
-    def _get_example_inputs(self, symbol: str, model_type: AnalysisModelType, example_time: datetime) -> List[float]:
-        query = {"symbol": symbol.upper(), "model_type": model_type.value, "time": example_time}
-        requested_fields = {"inputs": 1}
-        response = self.neural_collection.find_one(query, requested_fields)
-        if response is None or response == {}:
-            return []
-        return [float(input_feature) for input_feature in response['inputs']]
-
-    def _get_example_outputs(self, symbol: str, model_type: AnalysisModelType, example_time: datetime) -> List[float]:
-        query = {"symbol": symbol.upper(), "model_type": model_type.value, "time": example_time}
-        requested_fields = {"outputs": 1}
-        response = self.neural_collection.find_one(query, requested_fields)
-        if response is None or response == {}:
-            return []
-        return [float(output_neuron) for output_neuron in response['outputs']]
-
-    def _update_neural_example(self, symbol: str, model_type: AnalysisModelType, example: NeuralExample) -> None:
-        """Inserts or replaces the given training example on the given date."""
-        query = {"symbol": symbol.upper(), "model_type": model_type.value, "time": example.time}
-        new_doc = {"symbol": symbol.upper(), "model_type": model_type.value, "time": example.time,
-                   "inputs": [str(neural_input) for neural_input in example.inputs],
-                   "outputs": [str(output) for output in example.outputs]}
-        self.neural_collection.replace_one(query, new_doc, upsert=True)
+    @timed('mongo.save_example_matrix')
+    def save_example_matrix(self, symbol: str, model_type: AnalysisModelType, matrix: NeuralExampleMatrix) -> None:
+        """
+        Replaces the (symbol, model) pair's examples with the matrix's, storing its rows in packed chunks.
+        """
+        self.drop_neural_collection(symbol, model_type)
+        row_bytes = 8 + 4 * (matrix.inputs.shape[1] + matrix.outputs.shape[1])
+        chunk_rows = max(1, self.MAX_CHUNK_BYTES // row_bytes)
+        for chunk, start_row in enumerate(range(0, len(matrix), chunk_rows)):
+            end_row = start_row + chunk_rows
+            self.neural_collection.replace_one(
+                {"symbol": symbol.upper(), "model_type": model_type.value, "chunk": chunk},
+                {"symbol": symbol.upper(), "model_type": model_type.value, "chunk": chunk,
+                 "num_rows": len(matrix.times[start_row:end_row]),
+                 "num_inputs": matrix.inputs.shape[1],
+                 "num_outputs": matrix.outputs.shape[1],
+                 "times": matrix.times[start_row:end_row].astype(np.int64).tobytes(),
+                 "inputs": np.ascontiguousarray(matrix.inputs[start_row:end_row]).tobytes(),
+                 "outputs": np.ascontiguousarray(matrix.outputs[start_row:end_row]).tobytes()},
+                upsert=True)
 
     def drop_neural_collection(self, symbol: Optional[str], model_type: AnalysisModelType) -> None:
         """
@@ -76,4 +90,14 @@ class MongoNeuralWorker(AbstractMongoWorker):
             query = {"symbol": symbol.upper(), "model_type": model_type.value}
         else:
             query = {"model_type": model_type.value}
-        self.neural_collection.delete_one(query)
+        self.neural_collection.delete_many(query)
+
+    @staticmethod
+    def _unpack_chunk(doc: Dict[str, any]) -> NeuralExampleMatrix:
+        """Converts a chunk document's packed rows into a matrix without copying them row by row."""
+        num_rows = doc['num_rows']
+        return NeuralExampleMatrix(np.frombuffer(doc['times'], dtype=np.int64).astype('datetime64[us]'),
+                                   np.frombuffer(doc['inputs'], dtype=np.float32).reshape(num_rows,
+                                                                                         doc['num_inputs']),
+                                   np.frombuffer(doc['outputs'], dtype=np.float32).reshape(num_rows,
+                                                                                          doc['num_outputs']))
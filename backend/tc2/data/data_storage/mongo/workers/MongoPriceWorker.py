@@ -1,14 +1,25 @@
+import traceback
 from datetime import date, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Union
+
+import numpy as np
 
 from tc2.env.EnvType import EnvType
+from tc2.data.data_storage.CandleFileCache import CandleFileCache
+from tc2.data.data_storage.DailyStatCache import DailyStatCache
+from tc2.data.data_storage.SymbolDayCache import SymbolDayCache
 from tc2.data.data_storage.mongo.workers.AbstractMongoWorker import AbstractMongoWorker
 from tc2.util.data_constants import START_DATE
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.data.data_structs.price_data.DailyCandle import DailyCandle
+from tc2.data.data_structs.price_data.DailyStats import DailyStats
 from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
+from tc2.util.candle_util import aggregate_bar_array, bar_array_to_candles
 from tc2.util.date_util import date_to_datetime, datetime_to_date, DATE_FORMAT
 from tc2.util.synchronization import synchronized_on_mongo
+from tc2.metrics.Metrics import timed
 
 
 class MongoPriceWorker(AbstractMongoWorker):
@@ -16,6 +27,27 @@ class MongoPriceWorker(AbstractMongoWorker):
     Contains functionality for saving and loading stock market price data.
     """
 
+    # Resolutions at which bars are aggregated and stored alongside each day's daily candle
+    STORED_BAR_RESOLUTIONS = [BarResolution.MINUTE, BarResolution.FIVE_MINUTES]
+
+    # EnvType -> cache of daily stats, shared by every MongoPriceWorker in the process
+    _daily_stat_caches: Dict[EnvType, DailyStatCache] = {}
+
+    # Cache of recently-loaded days, shared by every MongoPriceWorker in the process
+    _symbol_day_cache = SymbolDayCache()
+
+    # On-disk cache of valid days' candles, shared by every process, or None if not configured
+    _candle_file_cache: Optional[CandleFileCache] = None
+
+    # Environments whose valid days are cached on disk; other environments' data is copied and reset too often
+    FILE_CACHED_ENV_TYPES = [EnvType.LIVE]
+
+    @classmethod
+    def use_candle_file_cache(cls, candle_file_cache: Optional[CandleFileCache]) -> None:
+        """Makes every MongoPriceWorker in this process (and processes forked from it) use the on-disk cache."""
+        cls._candle_file_cache = candle_file_cache
+
+    @timed('mongo.get_dates_on_file')
     def get_dates_on_file(self, symbol: str, start_date: date, end_date: date,
                           debug_output: Optional[List[str]] = None) -> List[date]:
         """Returns a list of date objects for which we have data for the symbol."""
@@ -40,13 +72,83 @@ class MongoPriceWorker(AbstractMongoWorker):
                                 ', '.join([day_date.strftime(DATE_FORMAT) for day_date in dates]))
         return dates
 
+    @timed('mongo.load_price_index')
+    def load_price_index(self, symbols: List[str], start_date: date,
+                         end_date: date) -> Dict[str, Dict[date, Optional[bool]]]:
+        """
+        Returns the completeness index of each symbol's days on file between start_date and end_date (inclusive),
+        using a single query. Each day on file maps to whether its candles were valid when saved, or to None if the
+        day was saved before its validity was indexed (see index_symbol_day()). Days not on file are omitted.
+        """
+        query = {"symbol": {"$in": [symbol.upper() for symbol in symbols]},
+                 "date": {"$gte": date_to_datetime(start_date), "$lte": date_to_datetime(end_date)}}
+        requested_fields = {"symbol": 1, "date": 1, "valid": 1}
+        index = {symbol.upper(): {} for symbol in symbols}
+        for doc in self.candle_collection_daily.find(query, requested_fields):
+            index[doc['symbol']][datetime_to_date(doc['date'])] = doc.get('valid')
+        return index
+
+    def index_symbol_day(self, day_data: SymbolDay) -> bool:
+        """
+        Records the validity of a day that was saved before its validity was indexed.
+        :return: whether the day's candles are valid
+        """
+        valid = SymbolDay.validate_candles(day_data.candles)
+        if len(day_data.candles) > 0:
+            self._update_aggregate_candle(day_data.symbol, day_data.create_daily_candle(),
+                                          valid=valid, num_candles=len(day_data.candles),
+                                          bar_arrays=self._aggregate_stored_bars(day_data))
+        return valid
+
+    @timed('mongo.load_symbol_day')
     def load_symbol_day(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> SymbolDay:
-        """Queries MongoDB for a list of secondly candles for the day and puts them into a SymbolDay object."""
-        candles = self._get_candles_for_day(symbol, day, debug_output)
-        return SymbolDay(symbol, day, candles)
+        """
+        Queries MongoDB for a list of secondly candles for the day and puts them into a SymbolDay object.
+        Days with valid data are cached, so the returned day's candles must not be modified.
+        """
+        day_data = self._day_cache().get(self.env_type, symbol, day)
+        if day_data is not None:
+            return day_data
+
+        # Check the on-disk cache, which only contains valid days
+        day_data = self._load_cached_candles(symbol, day)
+        if day_data is not None:
+            self._day_cache().put(self.env_type, day_data)
+            return day_data
 
+        # Query mongo, caching the day if it's valid
+        day_data = SymbolDay(symbol, day, self._get_candles_for_day(symbol, day, debug_output))
+        if SymbolDay.validate_candles(day_data.candles):
+            self._day_cache().put(self.env_type, day_data)
+            self._cache_candles(day_data)
+        return day_data
+
+    @timed('mongo.load_bars')
+    def load_bars(self, symbol: str, day: date, resolution: BarResolution) -> List[Union[Candle, MinuteCandle]]:
+        """
+        Returns the symbol's bars on the day at the given resolution, in chronological order: Candles at second
+        resolution, or MinuteCandles (each starting at its bar's minute) at longer resolutions.
+        Bars are read from the daily document, so only one row per bar is loaded.
+        """
+        if resolution is BarResolution.SECOND:
+            return self._get_candles_for_day(symbol, day)
+        bars_field = self._bars_field(resolution)
+        query = {"symbol": symbol.upper(), "date": date_to_datetime(day)}
+        response = self.candle_collection_daily.find_one(query, {bars_field: 1})
+        if response is None:
+            return []
+
+        # Aggregate days saved before bars (with their candle stats) were stored
+        bars = [MinuteCandle.from_str(encoded_bar) for encoded_bar in response.get(bars_field, [])]
+        if bars_field not in response or not all(bar.has_candle_stats() for bar in bars):
+            return bar_array_to_candles(aggregate_bar_array(self._get_candles_for_day(symbol, day),
+                                                            resolution.length_secs()), day)
+
+        return bars
+
+    @timed('mongo.load_aggregate_candle')
     @synchronized_on_mongo
-    def load_aggregate_candle(self, symbol: str, day: date, debug_output: Optional[List[str]]) -> Optional[DailyCandle]:
+    def load_aggregate_candle(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> Optional[DailyCandle]:
         """Queries MongoDB for the day's aggregate candle, and puts it into a DailyCandle object."""
         query = {"symbol": symbol.upper(), "date": date_to_datetime(day)}
         requested_fields = {"candle": 1}
@@ -59,6 +161,91 @@ class MongoPriceWorker(AbstractMongoWorker):
         else:
             return DailyCandle.from_str(response['candle'])
 
+    @timed('mongo.load_aggregate_candles')
+    def load_aggregate_candles(self, symbol: str, start_date: date, end_date: date) -> np.ndarray:
+        """
+        Returns the symbol's daily candles between start_date and end_date (inclusive), using a single query.
+        :return: an (n, 6) array of [date ordinal, open, high, low, close, volume], sorted by date
+        """
+        query = {"symbol": symbol.upper(),
+                 "date": {"$gte": date_to_datetime(start_date), "$lte": date_to_datetime(end_date)}}
+        requested_fields = {"date": 1, "candle": 1}
+        rows = []
+        for doc in self.candle_collection_daily.find(query, requested_fields):
+            if doc.get('candle', '') == '':
+                continue
+            candle_comps = doc['candle'].split(DailyCandle.COMP_SPLITTER)
+            rows.append([datetime_to_date(doc['date']).toordinal()] + [float(comp) for comp in candle_comps[1:6]])
+        daily_array = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return daily_array[np.argsort(daily_array[:, 0], kind='stable')]
+
+    def load_daily_stats(self, symbol: str, days: List[date]) -> Optional[DailyStats]:
+        """
+        Returns the high, low, and mean volume of the symbol's daily candles on the given (chronological) days,
+        or None if any of the days is missing a daily candle. Stats are cached until one of the symbol's days is
+        saved or removed.
+        """
+        if len(days) == 0:
+            return None
+        cache_key = (days[0], days[-1], len(days))
+        stats = self._stat_cache().get(symbol, cache_key)
+        if stats is not None:
+            return stats
+
+        # Load the range's candles and ensure every requested day has one
+        daily_array = self.load_aggregate_candles(symbol, days[0], days[-1])
+        daily_array = daily_array[np.isin(daily_array[:, 0], [day_date.toordinal() for day_date in days])]
+        if len(daily_array) != len(days):
+            return None
+
+        stats = DailyStats.from_daily_array(daily_array)
+        self._stat_cache().put(symbol, cache_key, stats)
+        return stats
+
+    def clear_cached_days(self) -> None:
+        """Forgets all days and daily stats cached from this worker's database."""
+        self._day_cache().clear(self.env_type)
+        if self._file_cache() is not None:
+            try:
+                self._file_cache().clear(self.env_type)
+            except Exception:
+                self.warn_main(f'Couldn\'t clear the {self.env_type.value} candle file cache:')
+                self.warn_main(traceback.format_exc())
+        self.clear_daily_stats()
+
+    def clear_daily_stats(self) -> None:
+        """Forgets every cached DailyStats (e.g. after the database was wiped)."""
+        self._stat_cache().clear()
+
+    @timed('mongo.load_sim_outcomes')
+    def load_sim_outcomes(self, symbol: str, start_date: date, end_date: date, sim_name: str,
+                          sim_params: str) -> Dict[date, np.ndarray]:
+        """
+        Returns the outcomes of the named simulation on each of the symbol's days between start_date and end_date
+        (inclusive), using a single query. Days whose outcomes weren't saved using the same params are omitted.
+        """
+        outcomes_field = self._sim_outcomes_field(sim_name)
+        query = {"symbol": symbol.upper(),
+                 "date": {"$gte": date_to_datetime(start_date), "$lte": date_to_datetime(end_date)}}
+        requested_fields = {"date": 1, outcomes_field: 1}
+        outcomes = {}
+        for doc in self.candle_collection_daily.find(query, requested_fields):
+            saved_outcomes = doc.get(outcomes_field)
+            if saved_outcomes is not None and saved_outcomes.get('params') == sim_params:
+                outcomes[datetime_to_date(doc['date'])] = np.array(saved_outcomes['outcomes'], dtype=np.int8)
+        return outcomes
+
+    def save_sim_outcomes(self, symbol: str, day: date, sim_name: str, sim_params: str,
+                          outcomes: List[int]) -> None:
+        """
+        Stores the outcomes of the named simulation on the symbol's day alongside its daily candle, so the day
+        needn't be simulated again. The outcomes are discarded whenever the day is saved again.
+        """
+        query = {"symbol": symbol.upper(), "date": date_to_datetime(day)}
+        self.candle_collection_daily.update_one(query, {"$set": {self._sim_outcomes_field(sim_name): {
+            "params": sim_params, "outcomes": [int(outcome) for outcome in outcomes]}}})
+
+    @timed('mongo.save_symbol_day')
     def save_symbol_day(self, day_data: SymbolDay, debug_output: Optional[List[str]] = None) -> None:
         """
         Saves the day's data in MongoDB, or removes it if day_data.candles is empty.
@@ -66,7 +253,10 @@ class MongoPriceWorker(AbstractMongoWorker):
 
         # Make candle moments timezone-naive
         for candle in day_data.candles:
-            candle.moment = candle.moment.replace(tzinfo=None)
+            if candle.moment.tzinfo is not None:
+                candle.moment = candle.moment.replace(tzinfo=None)
+        self._stat_cache().invalidate(day_data.symbol)
+        self._day_cache().invalidate(self.env_type, day_data.symbol, day_data.day_date)
 
         # Save candles
 
@@ -88,7 +278,18 @@ class MongoPriceWorker(AbstractMongoWorker):
             # Data present: calculate and save daily candle
             if debug_output is not None:
                 debug_output.append('mongo.save_symbol_day: saving daily candle for {}'.format(day_data.symbol))
-            self._update_aggregate_candle(day_data.symbol, day_data.create_daily_candle(), debug_output)
+            valid = SymbolDay.validate_candles(day_data.candles)
+            self._update_aggregate_candle(day_data.symbol, day_data.create_daily_candle(),
+                                          valid=valid,
+                                          num_candles=len(day_data.candles),
+                                          bar_arrays=self._aggregate_stored_bars(day_data),
+                                          debug_output=debug_output)
+
+            # Cache valid data on disk, or remove any stale copy of it
+            if valid:
+                self._cache_candles(day_data)
+            else:
+                self._drop_cached_candles(day_data.symbol, day_data.day_date)
 
     def remove_price_data_before(self, symbol: str, cutoff_date: date,
                                  debug_output: Optional[List[str]] = None) -> None:
@@ -117,6 +318,9 @@ class MongoPriceWorker(AbstractMongoWorker):
         self.candle_collection_secondly.delete_many(query)
         self.candle_collection_daily.delete_many(query)
         self.neural_collection.delete_many(query)
+        self._stat_cache().invalidate(symbol)
+        self._day_cache().invalidate(self.env_type, symbol)
+        self._drop_cached_candles(symbol)
 
     def _get_candles_for_day(self, symbol: str, day: date, debug_output: Optional[List[str]] = None) -> List[Candle]:
         """
@@ -151,24 +355,112 @@ class MongoPriceWorker(AbstractMongoWorker):
     def _update_aggregate_candle(self,
                                  symbol: str,
                                  day_data: DailyCandle,
+                                 valid: bool,
+                                 num_candles: int,
+                                 bar_arrays: Dict[BarResolution, np.ndarray],
                                  debug_output: Optional[List[str]] = None) -> None:
-        """Inserts or replaces the given daily-resolution candle on the given date."""
+        """
+        Inserts or replaces the given daily-resolution candle on the given date, along with the day's bars.
+        The document also serves as the day's entry in the completeness index, recording whether the day's
+        secondly candles are valid so they needn't be loaded to find out.
+        """
         query = {"symbol": symbol.upper(), "date": date_to_datetime(day_data.day_date)}
         new_doc = {"symbol": symbol.upper(), "date": date_to_datetime(day_data.day_date),
-                   "candle": str(day_data)}
+                   "candle": str(day_data), "valid": valid, "num_candles": num_candles}
+        for resolution, bar_array in bar_arrays.items():
+            new_doc[self._bars_field(resolution)] = [str(bar) for bar in
+                                                     bar_array_to_candles(bar_array, day_data.day_date)]
         self.candle_collection_daily.replace_one(query, new_doc, upsert=True)
 
+    def _aggregate_stored_bars(self, day_data: SymbolDay) -> Dict[BarResolution, np.ndarray]:
+        """Aggregates the day's candles into bars at each stored resolution."""
+        return {resolution: aggregate_bar_array(day_data.candles, resolution.length_secs())
+                for resolution in self.STORED_BAR_RESOLUTIONS}
+
+    def _stat_cache(self) -> DailyStatCache:
+        """Returns the cache of daily stats loaded from this worker's database."""
+        cache = MongoPriceWorker._daily_stat_caches.get(self.env_type)
+        if cache is None:
+            cache = MongoPriceWorker._daily_stat_caches.setdefault(self.env_type, DailyStatCache())
+        return cache
+
+    def _day_cache(self) -> SymbolDayCache:
+        """Returns the cache of days loaded from this worker's database."""
+        return MongoPriceWorker._symbol_day_cache
+
+    def _file_cache(self) -> Optional[CandleFileCache]:
+        """Returns the on-disk cache of days loaded from this worker's database, or None if it isn't cached."""
+        return MongoPriceWorker._candle_file_cache if self.env_type in self.FILE_CACHED_ENV_TYPES else None
+
+    def _load_cached_candles(self, symbol: str, day: date) -> Optional[SymbolDay]:
+        """
+        Returns the symbol's day from the on-disk cache, or None if it isn't cached there.
+        Unreadable cache files are logged and removed, so the day is loaded from mongo instead.
+        """
+        if self._file_cache() is None:
+            return None
+        try:
+            candle_array = self._file_cache().load_candles(self.env_type, symbol, day)
+            return None if candle_array is None else SymbolDay.from_candle_array(symbol, day, candle_array)
+        except Exception:
+            self.warn_main(f'Couldn\'t read cached {symbol} candles on {day:%m-%d-%Y}; loading them from mongo:')
+            self.warn_main(traceback.format_exc())
+            self._drop_cached_candles(symbol, day)
+            return None
+
+    def _cache_candles(self, day_data: SymbolDay) -> None:
+        """Saves the valid day in the on-disk cache, logging any error instead of raising it."""
+        if self._file_cache() is None:
+            return
+        try:
+            self._file_cache().save_candles(self.env_type, day_data.symbol, day_data.day_date,
+                                            day_data.to_candle_array())
+        except Exception:
+            self.warn_main(f'Couldn\'t cache {day_data.symbol} candles on {day_data.day_date:%m-%d-%Y}:')
+            self.warn_main(traceback.format_exc())
+            self._drop_cached_candles(day_data.symbol, day_data.day_date)
+
+    def _drop_cached_candles(self, symbol: str, day: Optional[date] = None) -> None:
+        """
+        Removes the symbol's day (or all its days, if day is None) from the on-disk cache,
+        logging any error instead of raising it.
+        """
+        if self._file_cache() is None:
+            return
+        try:
+            if day is None:
+                self._file_cache().drop_symbol(self.env_type, symbol)
+            else:
+                self._file_cache().drop_day(self.env_type, symbol, day)
+        except Exception:
+            self.warn_main(f'Couldn\'t remove cached {symbol} candles from the candle file cache:')
+            self.warn_main(traceback.format_exc())
+
+    @staticmethod
+    def _bars_field(resolution: BarResolution) -> str:
+        """Returns the name of the daily document's field containing bars at the given resolution."""
+        return f'bars_{resolution.value}'
+
+    @staticmethod
+    def _sim_outcomes_field(sim_name: str) -> str:
+        """Returns the name of the daily document's field containing the named simulation's outcomes."""
+        return f'outcomes_{sim_name}'
+
     def _drop_day_data(self,
                        symbol: str,
                        day: date,
                        debug_output: Optional[List[str]] = None) -> None:
         """
         Deletes a date (containing a list of candles) from mongo, including both second- and daily-resolution data.
+        Deleting the daily-resolution document also removes the day from the completeness index.
         This function is not synchronized because it is assumed the the outermost function calling it is synchronized.
         """
         query = {"symbol": symbol.upper(), "date": date_to_datetime(day)}
         num_deleted = self.candle_collection_secondly.delete_many(query).deleted_count
         num_deleted += self.candle_collection_daily.delete_many(query).deleted_count
+        self._stat_cache().invalidate(symbol)
+        self._day_cache().invalidate(self.env_type, symbol, day)
+        self._drop_cached_candles(symbol, day)
         if debug_output is not None:
             debug_output.append('mongo._drop_day_data dropped {} document(s) for {} on {}/{}/{}'
                                 .format(num_deleted, symbol, day.month, day.day, day.year))
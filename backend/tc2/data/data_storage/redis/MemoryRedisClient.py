@@ -0,0 +1,149 @@
+from typing import Dict, List, Optional, Union
+
+from tc2.data.data_storage.redis.MemoryRedisPipeline import MemoryRedisPipeline
+
+
+class MemoryRedisClient:
+    """
+    Implements the subset of redis-py's Redis API used by the redis workers, using dicts in this process's memory.
+    Like redis-py, values are stored and returned as bytes.
+    """
+
+    _strings: Dict[str, bytes]
+    _hashes: Dict[str, Dict[bytes, bytes]]
+    _lists: Dict[str, List[bytes]]
+    _sorted_sets: Dict[str, Dict[bytes, float]]
+
+    def __init__(self) -> None:
+        self._strings = {}
+        self._hashes = {}
+        self._lists = {}
+        self._sorted_sets = {}
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def pipeline(self, transaction: bool = True) -> MemoryRedisPipeline:
+        """Returns a pipeline that runs its queued commands against this client when executed."""
+        return MemoryRedisPipeline(self)
+
+    def flushdb(self) -> bool:
+        self._strings = {}
+        self._hashes = {}
+        self._lists = {}
+        self._sorted_sets = {}
+        return True
+
+    def delete(self, *keys: str) -> int:
+        num_deleted = 0
+        for key in keys:
+            for store in (self._strings, self._hashes, self._lists, self._sorted_sets):
+                if key in store:
+                    del store[key]
+                    num_deleted += 1
+        return num_deleted
+
+    """
+    Strings...
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._strings.get(key)
+
+    def set(self, key: str, value: Union[str, bytes, int, float]) -> bool:
+        self._strings[key] = self._encode(value)
+        return True
+
+    """
+    Hashes...
+    """
+
+    def hget(self, key: str, field: Union[str, bytes]) -> Optional[bytes]:
+        return self._hashes.get(key, {}).get(self._encode(field))
+
+    def hset(self, key: str, field: Union[str, bytes], value: Union[str, bytes, int, float]) -> int:
+        hash_map = self._hashes.setdefault(key, {})
+        is_new = self._encode(field) not in hash_map
+        hash_map[self._encode(field)] = self._encode(value)
+        return 1 if is_new else 0
+
+    def hdel(self, key: str, *fields: Union[str, bytes]) -> int:
+        hash_map = self._hashes.get(key, {})
+        num_deleted = 0
+        for field in fields:
+            if hash_map.pop(self._encode(field), None) is not None:
+                num_deleted += 1
+        return num_deleted
+
+    def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return dict(self._hashes.get(key, {}))
+
+    """
+    Lists...
+    """
+
+    def llen(self, key: str) -> int:
+        return len(self._lists.get(key, []))
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        values = self._lists.get(key, [])
+        end = len(values) + end + 1 if end < 0 else end + 1
+        return values[start:end]
+
+    def rpush(self, key: str, *values: Union[str, bytes, int, float]) -> int:
+        values_list = self._lists.setdefault(key, [])
+        values_list.extend(self._encode(value) for value in values)
+        return len(values_list)
+
+    def lrem(self, key: str, count: int, value: Union[str, bytes, int, float]) -> int:
+        values = self._lists.get(key, [])
+        encoded_value = self._encode(value)
+        if count < 0:
+            values.reverse()
+        kept, num_removed = [], 0
+        for existing_value in values:
+            if existing_value == encoded_value and (count == 0 or num_removed < abs(count)):
+                num_removed += 1
+            else:
+                kept.append(existing_value)
+        if count < 0:
+            kept.reverse()
+        self._lists[key] = kept
+        return num_removed
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        values = self._lists.get(key, [])
+        end = len(values) + end + 1 if end < 0 else end + 1
+        self._lists[key] = values[start:end]
+        return True
+
+    """
+    Sorted sets...
+    """
+
+    def zadd(self, key: str, mapping: Dict[Union[str, bytes], float]) -> int:
+        sorted_set = self._sorted_sets.setdefault(key, {})
+        num_added = 0
+        for member, score in mapping.items():
+            if self._encode(member) not in sorted_set:
+                num_added += 1
+            sorted_set[self._encode(member)] = float(score)
+        return num_added
+
+    def zcount(self, key: str, min_score: Union[str, float], max_score: Union[str, float]) -> int:
+        return sum(1 for score in self._sorted_sets.get(key, {}).values()
+                   if float(min_score) <= score <= float(max_score))
+
+    def zremrangebyscore(self, key: str, min_score: Union[str, float], max_score: Union[str, float]) -> int:
+        sorted_set = self._sorted_sets.get(key, {})
+        removed = [member for member, score in sorted_set.items() if float(min_score) <= score <= float(max_score)]
+        for member in removed:
+            del sorted_set[member]
+        return len(removed)
+
+    @staticmethod
+    def _encode(value: Union[str, bytes, int, float]) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode('utf-8')
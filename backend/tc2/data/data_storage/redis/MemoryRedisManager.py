@@ -0,0 +1,43 @@
+from tc2.data.data_storage.redis.MemoryRedisClient import MemoryRedisClient
+from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.data.data_storage.redis.workers.RedisCandlesWorker import RedisCandlesWorker
+from tc2.data.data_storage.redis.workers.RedisCollectionWorker import RedisCollectionWorker
+from tc2.data.data_storage.redis.workers.RedisHealthWorker import RedisHealthWorker
+from tc2.data.data_storage.redis.workers.RedisMetricsWorker import RedisMetricsWorker
+from tc2.data.data_storage.redis.workers.RedisModelsWorker import RedisModelsWorker
+from tc2.data.data_storage.redis.workers.RedisSettingsWorker import RedisSettingsWorker
+from tc2.data.data_storage.redis.workers.RedisStrategiesWorker import RedisStrategiesWorker
+from tc2.data.data_storage.redis.workers.RedisVisualsWorker import RedisVisualsWorker
+
+
+class MemoryRedisManager(RedisManager):
+    """
+    A RedisManager whose workers use a client that keeps data in this process's memory instead of on the Redis server.
+    Each instance has its own data, so environments using it never see or clear each other's data.
+    """
+
+    client: MemoryRedisClient
+
+    def connect(self,
+                ip: str = '',
+                port: str = '') -> bool:
+        """Creates an empty in-memory client; the connection parameters are ignored."""
+        self.client = MemoryRedisClient()
+        self._connected = True
+
+        # Initialize workers
+        self.candles_worker = RedisCandlesWorker(self.logfeed_program, self.client, self.env_type)
+        self.health_worker = RedisHealthWorker(self.logfeed_program, self.client, self.env_type)
+        self.models_worker = RedisModelsWorker(self.logfeed_program, self.client, self.env_type)
+        self.strategies_worker = RedisStrategiesWorker(self.logfeed_program, self.client, self.env_type)
+        self.visuals_worker = RedisVisualsWorker(self.logfeed_program, self.client, self.env_type)
+        self.collection_worker = RedisCollectionWorker(self.logfeed_program, self.client, self.env_type)
+        self.settings_worker = RedisSettingsWorker(self.logfeed_program, self.client, self.env_type)
+        self.metrics_worker = RedisMetricsWorker(self.logfeed_program, self.client, self.env_type)
+        return True
+
+    def clear_db(self) -> None:
+        """
+        Deletes all data stored in the environment.
+        """
+        self.client.flushdb()
@@ -0,0 +1,30 @@
+from typing import List, Callable
+
+
+class MemoryRedisPipeline:
+    """
+    Mirrors redis-py's Pipeline for a MemoryRedisClient.
+    Commands are queued by calling the client's methods on the pipeline, and run in order by execute().
+    """
+
+    _client: 'MemoryRedisClient'
+    _commands: List[tuple]
+
+    def __init__(self, client: 'MemoryRedisClient') -> None:
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, command_name: str) -> Callable[..., 'MemoryRedisPipeline']:
+        command = getattr(self._client, command_name)
+
+        def queue_command(*args) -> 'MemoryRedisPipeline':
+            self._commands.append((command, args))
+            return self
+
+        return queue_command
+
+    def execute(self) -> List[any]:
+        """Runs the queued commands and returns their results."""
+        results = [command(*args) for command, args in self._commands]
+        self._commands = []
+        return results
@@ -5,9 +5,11 @@ from typing import List, Optional, Dict
 
 from redis import Redis
 
+from tc2.data.data_storage import client_pool
 from tc2.data.data_storage.redis.workers.RedisCandlesWorker import RedisCandlesWorker
 from tc2.data.data_storage.redis.workers.RedisCollectionWorker import RedisCollectionWorker
 from tc2.data.data_storage.redis.workers.RedisHealthWorker import RedisHealthWorker
+from tc2.data.data_storage.redis.workers.RedisMetricsWorker import RedisMetricsWorker
 from tc2.data.data_storage.redis.workers.RedisModelsWorker import RedisModelsWorker
 from tc2.data.data_storage.redis.workers.RedisSettingsWorker import RedisSettingsWorker
 from tc2.data.data_storage.redis.workers.RedisStrategiesWorker import RedisStrategiesWorker
@@ -39,6 +41,7 @@ class RedisManager(Loggable):
     visuals_worker: RedisVisualsWorker
     collection_worker: RedisCollectionWorker
     settings_worker: RedisSettingsWorker
+    metrics_worker: RedisMetricsWorker
 
     def __init__(self,
                  logfeed_process: LogFeed,
@@ -60,11 +63,13 @@ class RedisManager(Loggable):
                 port: str) -> bool:
         """
         Returns false if there was a problem initializing the connection.
+        The client is shared with every RedisManager of the same EnvType in this process, and it is only tested
+        the first time it is used.
         """
         try:
-            self.client: Redis = Redis(host=ip,
-                                       port=port)
-            self.client.ping()
+            self.client, new_client = client_pool.get_redis_client(self.env_type.value, ip, port)
+            if new_client:
+                self.client.ping()
             self._connected = True
 
             # Initialize workers
@@ -75,8 +80,10 @@ class RedisManager(Loggable):
             self.visuals_worker = RedisVisualsWorker(self.logfeed_program, self.client, self.env_type)
             self.collection_worker = RedisCollectionWorker(self.logfeed_program, self.client, self.env_type)
             self.settings_worker = RedisSettingsWorker(self.logfeed_program, self.client, self.env_type)
+            self.metrics_worker = RedisMetricsWorker(self.logfeed_program, self.client, self.env_type)
 
         except Exception:
+            client_pool.discard_client(getattr(self, 'client', None))
             self.error_main(f'Could not initialize connection to Redis database in thread #{self._pid}:')
             self.warn_main(traceback.format_exc())
             return False
@@ -204,6 +211,17 @@ class RedisManager(Loggable):
                           model_type: AnalysisModelType) -> date:
         return self.models_worker.get_analysis_date(symbol, model_type)
 
+    def get_analysis_version(self,
+                             symbol: str,
+                             model_type: AnalysisModelType) -> Optional[int]:
+        return self.models_worker.get_analysis_version(symbol, model_type)
+
+    def save_analysis_version(self,
+                              symbol: str,
+                              model_type: AnalysisModelType,
+                              version: int) -> None:
+        return self.models_worker.save_analysis_version(symbol, model_type, version)
+
     def get_analysis_start_date(self,
                                 symbol: str,
                                 model_type: AnalysisModelType,
@@ -283,6 +301,36 @@ class RedisManager(Loggable):
                                  check_params: Dict[str, any]) -> Optional[HealthCheckResult]:
         return self.health_worker.load_health_check_result(check_type, check_params)
 
+    """
+    Latency metrics...
+    """
+
+    def save_metrics_snapshot(self,
+                              process_label: str,
+                              snapshot_str: str) -> None:
+        return self.metrics_worker.save_metrics_snapshot(process_label, snapshot_str)
+
+    def load_metrics_snapshots(self) -> Dict[str, str]:
+        return self.metrics_worker.load_metrics_snapshots()
+
+    def clear_metrics_snapshots(self) -> None:
+        return self.metrics_worker.clear_metrics_snapshots()
+
+    def delete_metrics_snapshots(self,
+                                 process_labels: List[str]) -> None:
+        return self.metrics_worker.delete_metrics_snapshots(process_labels)
+
+    def record_metric_event(self,
+                            event_name: str,
+                            moment: float,
+                            retention_secs: float) -> None:
+        return self.metrics_worker.record_metric_event(event_name, moment, retention_secs)
+
+    def count_metric_events(self,
+                            event_name: str,
+                            since: float) -> int:
+        return self.metrics_worker.count_metric_events(event_name, since)
+
     """
     Data collection cache...
     """
@@ -296,6 +344,9 @@ class RedisManager(Loggable):
     def store_cached_candles(self, symbol: str, candles: List[Candle]) -> None:
         return self.candles_worker.store_cached_candles(symbol, candles)
 
+    def store_cached_candles_batch(self, candles_by_symbol: Dict[str, List[Candle]]) -> None:
+        return self.candles_worker.store_cached_candles_batch(candles_by_symbol)
+
     """
     Data collection metadata...
     """
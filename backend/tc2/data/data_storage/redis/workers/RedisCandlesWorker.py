@@ -1,8 +1,12 @@
 from datetime import date
-from typing import List
+from typing import List, Dict
 
 from tc2.data.data_storage.redis.workers.AbstractRedisWorker import AbstractRedisWorker
 from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.metrics.Metrics import timed
+
+# The number of each symbol's latest streamed candles to keep cached (about 2 days)
+CANDLES_TO_CACHE = 50000
 
 
 class RedisCandlesWorker(AbstractRedisWorker):
@@ -11,6 +15,7 @@ class RedisCandlesWorker(AbstractRedisWorker):
     Long-term candle storage is handled by mongo.
     """
 
+    @timed('redis.get_cached_candles')
     def get_cached_candles(self, symbol: str, day_date: date) -> List[Candle]:
         """
         Gets candles cached from polygon stream.
@@ -29,7 +34,8 @@ class RedisCandlesWorker(AbstractRedisWorker):
         # Filter out candles from other days.
         return [candle for candle in candles if candle.moment.date() == day_date]
 
-    def prune_cached_candles(self, symbol: str, candles_to_keep: int = 50000) -> None:
+    @timed('redis.prune_cached_candles')
+    def prune_cached_candles(self, symbol: str, candles_to_keep: int = CANDLES_TO_CACHE) -> None:
         """
         :param symbol:
         :param candles_to_keep: keep this many of the latest candles (default is 2 days)
@@ -38,8 +44,26 @@ class RedisCandlesWorker(AbstractRedisWorker):
         if candles_on_file > candles_to_keep:
             self.client.ltrim(self.get_prefix() + 'STREAM-CANDLES_' + symbol, candles_on_file - candles_to_keep, -1)
 
+    @timed('redis.store_cached_candles')
     def store_cached_candles(self, symbol: str, candles: List[Candle]) -> None:
         """
         Stores candles from polygon stream in redis.
         """
-        self.client.rpush(self.get_prefix() + 'STREAM-CANDLES_' + symbol, *[str(candle) for candle in candles])
+        self.store_cached_candles_batch({symbol: candles})
+
+    @timed('redis.store_cached_candles_batch')
+    def store_cached_candles_batch(self, candles_by_symbol: Dict[str, List[Candle]],
+                                   candles_to_keep: int = CANDLES_TO_CACHE) -> None:
+        """
+        Stores candles from polygon stream in redis for many symbols using one round trip.
+        Each symbol's candles are pushed in a single command and its list is trimmed to its latest candles_to_keep,
+        so the cache never needs to be pruned separately.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for symbol, candles in candles_by_symbol.items():
+            if len(candles) == 0:
+                continue
+            key = self.get_prefix() + 'STREAM-CANDLES_' + symbol
+            pipe.rpush(key, *[str(candle) for candle in candles])
+            pipe.ltrim(key, -candles_to_keep, -1)
+        pipe.execute()
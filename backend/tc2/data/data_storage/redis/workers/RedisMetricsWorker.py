@@ -0,0 +1,55 @@
+import os
+import uuid
+from typing import Dict, List
+
+from tc2.data.data_storage.redis.workers.AbstractRedisWorker import AbstractRedisWorker
+
+
+class RedisMetricsWorker(AbstractRedisWorker):
+    """
+    Contains functionality for saving and loading each process's latency metrics, and timestamped events
+    (e.g. failed orders) recorded by any process.
+    """
+
+    def save_metrics_snapshot(self, process_label: str, snapshot_str: str) -> None:
+        """
+        Saves the latest metrics snapshot of the process, replacing its previous one.
+        """
+        self.client.hset(self.get_prefix() + 'METRICS-DATA', process_label, snapshot_str)
+
+    def load_metrics_snapshots(self) -> Dict[str, str]:
+        """
+        :return: a dict mapping each process's label to its latest metrics snapshot
+        """
+        snapshots = self.client.hgetall(self.get_prefix() + 'METRICS-DATA')
+        return {label.decode('utf-8'): snapshot_str.decode('utf-8') for label, snapshot_str in snapshots.items()}
+
+    def clear_metrics_snapshots(self) -> None:
+        """
+        Deletes every process's metrics snapshot.
+        """
+        self.client.delete(self.get_prefix() + 'METRICS-DATA')
+
+    def delete_metrics_snapshots(self, process_labels: List[str]) -> None:
+        """
+        Deletes the metrics snapshots of the given processes.
+        """
+        if len(process_labels) > 0:
+            self.client.hdel(self.get_prefix() + 'METRICS-DATA', *process_labels)
+
+    def record_metric_event(self, event_name: str, moment: float, retention_secs: float) -> None:
+        """
+        Records an occurrence of the event at the given moment (in epoch secs), and forgets occurrences
+        more than retention_secs older than it.
+        """
+        key = self.get_prefix() + 'METRICS-EVENTS-' + event_name
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {f'{moment:.6f}-{os.getpid()}-{uuid.uuid4().hex[:8]}': moment})
+        pipe.zremrangebyscore(key, '-inf', moment - retention_secs)
+        pipe.execute()
+
+    def count_metric_events(self, event_name: str, since: float) -> int:
+        """
+        :return: the number of occurrences of the event recorded at or after the given moment (in epoch secs)
+        """
+        return self.client.zcount(self.get_prefix() + 'METRICS-EVENTS-' + event_name, since, '+inf')
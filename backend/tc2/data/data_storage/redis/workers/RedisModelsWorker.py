@@ -1,10 +1,11 @@
 from datetime import datetime, date
-from typing import List
+from typing import List, Optional
 
 from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
 from tc2.data.data_storage.redis.workers.AbstractRedisWorker import AbstractRedisWorker
 from tc2.util.data_constants import START_DATE
 from tc2.util.date_util import DATE_FORMAT
+from tc2.metrics.Metrics import timed
 
 
 class RedisModelsWorker(AbstractRedisWorker):
@@ -12,6 +13,7 @@ class RedisModelsWorker(AbstractRedisWorker):
     Contains functionality for saving and loading analysis model data.
     """
 
+    @timed('redis.get_analysis_rolling_sum')
     def get_analysis_rolling_sum(self, symbol: str, model_type: AnalysisModelType) -> float:
         """
         Returns the stored output of a Forgetful Model.
@@ -22,6 +24,7 @@ class RedisModelsWorker(AbstractRedisWorker):
         sum_str = self.get_analysis_raw_output(symbol, model_type)
         return 0 if sum_str == '' else float(sum_str)
 
+    @timed('redis.get_analysis_raw_output')
     def get_analysis_raw_output(self, symbol: str, model_type: AnalysisModelType) -> str:
         """
         Returns the stored output of an Analysis Model.
@@ -32,6 +35,7 @@ class RedisModelsWorker(AbstractRedisWorker):
         output_str = self.client.hget(self.get_prefix() + 'ANALYSIS-LATEST-RESULT-' + model_type.value, symbol)
         return '' if output_str is None else output_str.decode("utf-8")
 
+    @timed('redis.save_analysis_result')
     def save_analysis_result(self, symbol: str, model_type: AnalysisModelType, encoded_result: str) -> None:
         """
         Stores the output of an Analysis Model.
@@ -40,6 +44,7 @@ class RedisModelsWorker(AbstractRedisWorker):
         """
         self.client.hset(self.get_prefix() + 'ANALYSIS-LATEST-RESULT-' + model_type.value, symbol, encoded_result)
 
+    @timed('redis.get_analysis_date')
     def get_analysis_date(self, symbol: str, model_type: AnalysisModelType) -> date:
         """
         :param symbol:
@@ -50,6 +55,24 @@ class RedisModelsWorker(AbstractRedisWorker):
         return START_DATE if date_str is None or date_str == '' else \
             datetime.strptime(date_str.decode("utf-8"), DATE_FORMAT).date()
 
+    def get_analysis_version(self, symbol: str, model_type: AnalysisModelType) -> Optional[int]:
+        """
+        :param symbol:
+        :param model_type: the analysis model which analyzes the symbol
+        :return: the version of the model's measurement that produced its stored state, or None if unversioned
+        """
+        version_str = self.client.hget(self.get_prefix() + 'ANALYSIS-VERSION-' + model_type.value, symbol)
+        return None if version_str is None or version_str == '' else int(version_str.decode("utf-8"))
+
+    def save_analysis_version(self, symbol: str, model_type: AnalysisModelType, version: int) -> None:
+        """
+        Records the version of the model's measurement that produced its stored state.
+        :param symbol:
+        :param model_type: the analysis model which analyzed the symbol
+        :param version: the model's measurement version
+        """
+        self.client.hset(self.get_prefix() + 'ANALYSIS-VERSION-' + model_type.value, symbol, str(version))
+
     def get_analysis_start_date(self,
                                 symbol: str,
                                 model_type: AnalysisModelType,
@@ -63,6 +86,7 @@ class RedisModelsWorker(AbstractRedisWorker):
         return today if date_str is None or date_str == '' else \
             datetime.strptime(date_str.decode("utf-8"), DATE_FORMAT).date()
 
+    @timed('redis.save_analysis_date')
     def save_analysis_date(self, symbol: str, model_type: AnalysisModelType, day_date: date) -> None:
         """
         Records the latest model update date.
@@ -144,6 +168,7 @@ class RedisModelsWorker(AbstractRedisWorker):
             self.client.delete(self.get_prefix() + 'ANALYSIS-START-DATE-' + model_type.value)
             self.client.delete(self.get_prefix() + 'ANALYSIS-LATEST-DATE-' + model_type.value)
             self.client.delete(self.get_prefix() + 'ANALYSIS-SNAPSHOT-DATE-' + model_type.value)
+            self.client.delete(self.get_prefix() + 'ANALYSIS-VERSION-' + model_type.value)
             return
         for symbol in symbols:
             self.client.hdel(self.get_prefix() + 'ANALYSIS-LATEST-RESULT-' + model_type.value, symbol)
@@ -151,3 +176,4 @@ class RedisModelsWorker(AbstractRedisWorker):
             self.client.hdel(self.get_prefix() + 'ANALYSIS-START-DATE-' + model_type.value, symbol)
             self.client.hdel(self.get_prefix() + 'ANALYSIS-LATEST-DATE-' + model_type.value, symbol)
             self.client.hdel(self.get_prefix() + 'ANALYSIS-SNAPSHOT-DATE-' + model_type.value, symbol)
+            self.client.hdel(self.get_prefix() + 'ANALYSIS-VERSION-' + model_type.value, symbol)
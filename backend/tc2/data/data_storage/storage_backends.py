@@ -0,0 +1,31 @@
+from tc2.data.data_storage.mongo.MemoryMongoManager import MemoryMongoManager
+from tc2.data.data_storage.mongo.MongoManager import MongoManager
+from tc2.data.data_storage.redis.MemoryRedisManager import MemoryRedisManager
+from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.env.EnvType import EnvType
+from tc2.log.LogFeed import LogFeed
+
+# Environments whose databases live in the memory of the process using them, instead of on the database servers.
+# Their data is private to each ExecEnv (and the threads it is cloned into), so they can run in parallel
+MEMORY_ENV_TYPES = [EnvType.SIMULATION, EnvType.OPTIMIZATION]
+
+
+def uses_memory_storage(env_type: EnvType) -> bool:
+    """Returns True if environments of this type keep their databases in memory."""
+    return env_type in MEMORY_ENV_TYPES
+
+
+def create_mongo_manager(logfeed_program: LogFeed,
+                         env_type: EnvType) -> MongoManager:
+    """Returns a MongoManager using the storage backend appropriate for the environment type."""
+    if uses_memory_storage(env_type):
+        return MemoryMongoManager(logfeed_program, env_type)
+    return MongoManager(logfeed_program, env_type)
+
+
+def create_redis_manager(logfeed_process: LogFeed,
+                         env_type: EnvType) -> RedisManager:
+    """Returns a RedisManager using the storage backend appropriate for the environment type."""
+    if uses_memory_storage(env_type):
+        return MemoryRedisManager(logfeed_process, env_type)
+    return RedisManager(logfeed_process, env_type)
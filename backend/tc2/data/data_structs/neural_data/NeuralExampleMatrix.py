@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from tc2.data.data_structs.neural_data.NeuralExample import NeuralExample
+
+
+class NeuralExampleMatrix:
+    """
+    Contains many training examples in columnar form: one row per example, sorted by time.
+    Inputs and outputs are packed float32 matrices, so examples can be stored, loaded, and fed to pandas or numpy
+    without any per-example Python objects.
+    """
+    # The time of each example
+    times: np.ndarray
+    # An (n, n_features) float32 matrix of each example's inputs
+    inputs: np.ndarray
+    # An (n, n_outputs) float32 matrix of each example's outputs
+    outputs: np.ndarray
+
+    def __init__(self, times: np.ndarray, inputs: np.ndarray, outputs: np.ndarray) -> None:
+        if not len(times) == len(inputs) == len(outputs):
+            raise ValueError('Each example must have a time, inputs, and outputs ({0}, {1}, {2})'
+                             .format(len(times), len(inputs), len(outputs)))
+        order = np.argsort(times, kind='stable')
+        self.times = np.asarray(times, dtype='datetime64[us]')[order]
+        self.inputs = np.asarray(inputs, dtype=np.float32)[order]
+        self.outputs = np.asarray(outputs, dtype=np.float32)[order]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def empty(cls, num_inputs: int = 0, num_outputs: int = 0) -> 'NeuralExampleMatrix':
+        return NeuralExampleMatrix(np.zeros(0, dtype='datetime64[us]'),
+                                   np.zeros((0, num_inputs), dtype=np.float32),
+                                   np.zeros((0, num_outputs), dtype=np.float32))
+
+    @classmethod
+    def concatenate(cls, matrices: List['NeuralExampleMatrix']) -> 'NeuralExampleMatrix':
+        """Combines matrices whose examples have the same numbers of inputs and outputs."""
+        if len(matrices) == 0:
+            return NeuralExampleMatrix.empty()
+        return NeuralExampleMatrix(np.concatenate([matrix.times for matrix in matrices]),
+                                   np.concatenate([matrix.inputs for matrix in matrices]),
+                                   np.concatenate([matrix.outputs for matrix in matrices]))
+
+    @classmethod
+    def from_examples(cls, examples: List[NeuralExample]) -> 'NeuralExampleMatrix':
+        """Packs the examples, which must all have the same numbers of inputs and outputs."""
+        if len(examples) == 0:
+            return NeuralExampleMatrix.empty()
+        return NeuralExampleMatrix(np.array([example.time for example in examples], dtype='datetime64[us]'),
+                                   np.array([example.inputs for example in examples], dtype=np.float32),
+                                   np.array([example.outputs for example in examples], dtype=np.float32))
+
+    def to_examples(self) -> List[NeuralExample]:
+        """Unpacks each row into a NeuralExample object."""
+        times: List[datetime] = self.times.tolist()
+        return [NeuralExample(example_time, inputs, outputs)
+                for example_time, inputs, outputs in zip(times, self.inputs.tolist(), self.outputs.tolist())]
@@ -0,0 +1,22 @@
+from enum import Enum
+
+
+class BarResolution(Enum):
+    """
+    The resolutions at which each day's candles are stored.
+    Bars longer than a second are aggregated from second-resolution candles when the day is saved.
+    """
+    SECOND = 'second'
+    MINUTE = 'minute'
+    FIVE_MINUTES = 'five_minutes'
+
+    def length_secs(self) -> int:
+        """Returns the number of seconds spanned by each bar."""
+        return _BAR_LENGTHS[self]
+
+
+_BAR_LENGTHS = {
+    BarResolution.SECOND: 1,
+    BarResolution.MINUTE: 60,
+    BarResolution.FIVE_MINUTES: 300
+}
@@ -83,3 +83,17 @@ class Candle:
             'volume': self.volume,
             'moment': self.moment.strftime(DATE_TIME_FORMAT)
         }
+
+
+class FrozenCandle(Candle):
+    """
+    A Candle that is shared with other callers (see SymbolDay.freeze()), so its fields can't be changed.
+    Create a new Candle from its fields to modify it.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: any) -> None:
+        raise AttributeError(f'Tried to set {name} on a shared candle. Copy the candle to modify it')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'Tried to delete {name} from a shared candle. Copy the candle to modify it')
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
+
+# Microseconds per second, minute, and day
+_US_PER_SEC = 1000000
+_US_PER_MIN = 60 * _US_PER_SEC
+_US_PER_DAY = 24 * 60 * _US_PER_MIN
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+
+class CandleStats:
+    """
+    Summary statistics of a list of second-resolution candles, computed in a single vectorized pass.
+    Used by SymbolDay.validate_candles(), and can be passed back into it to validate the same candles
+    with different parameters without recomputing anything.
+    """
+    num_candles: int
+    # The number of candles in each minute that contains at least one candle, in chronological order
+    candles_per_minute: np.ndarray
+    # The time (in secs) between each candle and the previous one, or 0 for the first candle of each day
+    gaps: np.ndarray
+    # The index of the first candle having a price or volume below 1, or None if there is no such candle
+    first_invalid_idx: Optional[int]
+
+    def __init__(self,
+                 num_candles: int,
+                 candles_per_minute: np.ndarray,
+                 gaps: np.ndarray,
+                 first_invalid_idx: Optional[int]) -> None:
+        """
+        Do NOT instantiate a CandleStats object directly.
+        Instead, use CandleStats.from_candles().
+        """
+        self.num_candles = num_candles
+        self.candles_per_minute = candles_per_minute
+        self.gaps = gaps
+        self.first_invalid_idx = first_invalid_idx
+
+    def longest_gap(self) -> float:
+        """Returns the longest time (in secs) between two consecutive candles on the same day."""
+        return 0.0 if len(self.gaps) == 0 else float(self.gaps.max())
+
+    def nth_fewest_candles_per_minute(self, n: int) -> Optional[int]:
+        """
+        Returns the number of candles in the minute with the nth fewest candles (indexed like a sorted list),
+        or None if there are not enough minutes.
+        """
+        if n < 0:
+            n += len(self.candles_per_minute)
+        if n < 0 or n >= len(self.candles_per_minute):
+            return None
+        return int(np.partition(self.candles_per_minute, n)[n])
+
+    @classmethod
+    def from_candles(cls, candles: List[Candle]) -> 'CandleStats':
+        """Computes the statistics of the given candles, which are usually (but needn't be) sorted by moment."""
+        if len(candles) == 0:
+            return CandleStats(0, np.zeros(0, dtype=np.int64), np.zeros(0), None)
+
+        # Convert wall-clock moments into microseconds since the epoch, and find each candle's lowest price or volume
+        if candles[0].moment.tzinfo is None:
+            moment_us = np.fromiter(((candle.moment - _EPOCH) // _ONE_US for candle in candles),
+                                    dtype=np.int64, count=len(candles))
+        else:
+            moment_us = np.fromiter(((candle.moment.replace(tzinfo=None) - _EPOCH) // _ONE_US for candle in candles),
+                                    dtype=np.int64, count=len(candles))
+        lowest_vals = np.fromiter((min(candle.open, candle.high, candle.low, candle.close, candle.volume)
+                                   for candle in candles), dtype=np.float64, count=len(candles))
+
+        # Count the candles in each minute
+        minute_idxs = moment_us // _US_PER_MIN
+        minute_counts = np.bincount(minute_idxs - minute_idxs.min())
+        candles_per_minute = minute_counts[minute_counts > 0]
+
+        # Measure the gap before each candle, ignoring gaps that span two days of the month
+        days = (moment_us // _US_PER_DAY).astype('datetime64[D]')
+        days_of_month = (days - days.astype('datetime64[M]')).astype(np.int64)
+        gaps_us = np.zeros(len(candles), dtype=np.int64)
+        gaps_us[1:] = np.where(days_of_month[1:] == days_of_month[:-1], np.diff(moment_us), 0)
+
+        # Find the first candle with a price or volume below 1
+        invalid_idxs = np.flatnonzero(lowest_vals < 1)
+        first_invalid_idx = int(invalid_idxs[0]) if len(invalid_idxs) > 0 else None
+
+        return CandleStats(num_candles=len(candles),
+                           candles_per_minute=candles_per_minute,
+                           gaps=gaps_us / _US_PER_SEC,
+                           first_invalid_idx=first_invalid_idx)
+
+    @classmethod
+    def from_minute_bars(cls, bars: List[MinuteCandle]) -> Optional['CandleStats']:
+        """
+        Computes the statistics of the candles that the given minute bars (sorted by minute) were aggregated from,
+        using the candle stats stored in each bar. Returns None if any bar lacks candle stats.
+
+        Gaps between bars are measured from each bar's last candle to the next bar's first candle, and each bar
+        contributes only its longest internal gap. A minute bar can't contain two gaps of 30 secs or more, so for
+        any max_gap of at least 30 secs, SymbolDay.validate_candle_stats() finds the same long gaps as it would
+        in the candles' own stats.
+        """
+        if len(bars) == 0:
+            return CandleStats(0, np.zeros(0, dtype=np.int64), np.zeros(0), None)
+        if not all(bar.has_candle_stats() for bar in bars):
+            return None
+
+        # Count the candles in each bar's minute
+        candles_per_minute = np.fromiter((bar.num_candles for bar in bars), dtype=np.int64, count=len(bars))
+
+        # Measure the gap before each bar's first candle and the longest gap within each bar, in chronological order
+        gaps = np.zeros(2 * len(bars))
+        for i, bar in enumerate(bars):
+            if i > 0 and bar.minute.date() == bars[i - 1].minute.date():
+                prev_last_moment = bars[i - 1].minute + timedelta(seconds=bars[i - 1].last_candle_offset)
+                gaps[2 * i] = (bar.minute - prev_last_moment).total_seconds() + bar.first_candle_offset
+            gaps[2 * i + 1] = bar.longest_gap
+
+        # Find the first candle of the first bar containing a candle with a price or volume below 1
+        invalid_bar_idxs = np.flatnonzero(np.fromiter((bar.lowest_value < 1 for bar in bars), dtype=bool,
+                                                      count=len(bars)))
+        first_invalid_idx = int(candles_per_minute[:invalid_bar_idxs[0]].sum()) if len(invalid_bar_idxs) > 0 \
+            else None
+
+        return CandleStats(num_candles=int(candles_per_minute.sum()),
+                           candles_per_minute=candles_per_minute,
+                           gaps=gaps,
+                           first_invalid_idx=first_invalid_idx)
@@ -0,0 +1,48 @@
+from datetime import date
+
+import numpy as np
+
+from tc2.util.date_util import DATE_FORMAT
+
+
+class DailyStats:
+    """
+    Summary statistics of a symbol's daily candles over a range of market days.
+    """
+    start_date: date
+    end_date: date
+    num_days: int
+    high: float
+    low: float
+    mean_volume: float
+
+    def __init__(self, start_date: date, end_date: date, num_days: int, high: float, low: float,
+                 mean_volume: float) -> None:
+        self.start_date = start_date
+        self.end_date = end_date
+        self.num_days = num_days
+        self.high = high
+        self.low = low
+        self.mean_volume = mean_volume
+
+    @classmethod
+    def from_daily_array(cls, daily_array: np.ndarray) -> 'DailyStats':
+        """
+        Computes the statistics of a non-empty array returned by load_aggregate_candles().
+        """
+        return DailyStats(start_date=date.fromordinal(int(daily_array[0, 0])),
+                          end_date=date.fromordinal(int(daily_array[-1, 0])),
+                          num_days=len(daily_array),
+                          high=float(daily_array[:, 2].max()),
+                          low=float(daily_array[:, 3].min()),
+                          mean_volume=float(daily_array[:, 5].mean()))
+
+    def to_json(self):
+        return {
+            'start_date': self.start_date.strftime(DATE_FORMAT),
+            'end_date': self.end_date.strftime(DATE_FORMAT),
+            'num_days': self.num_days,
+            'high': self.high,
+            'low': self.low,
+            'mean_volume': self.mean_volume
+        }
@@ -0,0 +1,128 @@
+from datetime import time
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
+
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.util.market_util import OPEN_TIME, OPEN_DURATION
+
+# Seconds after midnight at which the market opens
+_OPEN_SEC = OPEN_TIME.hour * 3600 + OPEN_TIME.minute * 60
+
+
+def _sec_of_day(moment: time) -> int:
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+class DayFeatures:
+    """
+    Features of a day of second-resolution candles, extracted in a single pass so that every model fed the day
+    can share them instead of rescanning the candles. Window and anchor lookups are binary searches over the
+    extracted columns, and their results are remembered, so models asking about the same window share the answer.
+    Do NOT instantiate directly; use SymbolDay.get_features().
+    """
+    # The second after midnight of each candle, in ascending order
+    secs: np.ndarray
+    # Each candle's prices and volume, in the same order
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    volumes: np.ndarray
+    # The volume traded during each minute the market is open (usually 390 minutes)
+    minute_volumes: np.ndarray
+
+    def __init__(self, columns: np.ndarray) -> None:
+        """
+        :param columns: an (n, 6) array of each candle's second of the day, open, high, low, close and volume
+        """
+        if len(columns) > 1 and np.any(np.diff(columns[:, 0]) < 0):
+            columns = columns[np.argsort(columns[:, 0], kind='stable')]
+        self.secs = columns[:, 0].astype(np.int64)
+        self.opens = columns[:, 1]
+        self.highs = columns[:, 2]
+        self.lows = columns[:, 3]
+        self.closes = columns[:, 4]
+        self.volumes = columns[:, 5]
+
+        # Sum the volume traded in each minute of the open session
+        minute_idxs = (self.secs - _OPEN_SEC) // 60
+        in_session = (minute_idxs >= 0) & (minute_idxs < OPEN_DURATION // 60)
+        self.minute_volumes = np.bincount(minute_idxs[in_session], weights=self.volumes[in_session],
+                                          minlength=int(OPEN_DURATION // 60))
+
+        # Private variables
+        self._window_cache: Dict[Tuple[str, int, int], Optional[float]] = {}
+
+    @classmethod
+    def from_candles(cls, candles: List[Candle]) -> 'DayFeatures':
+        """Extracts the features of one day's candles."""
+        columns = np.array([(candle.moment.hour * 3600 + candle.moment.minute * 60 + candle.moment.second,
+                             candle.open, candle.high, candle.low, candle.close, candle.volume)
+                            for candle in candles], dtype=np.float64).reshape(-1, 6)
+        return DayFeatures(columns)
+
+    def make_read_only(self) -> None:
+        """Makes the feature columns read-only, so a caller sharing the day can't change what other callers see."""
+        for column in [self.secs, self.opens, self.highs, self.lows, self.closes, self.volumes, self.minute_volumes]:
+            column.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.secs)
+
+    @property
+    def open(self) -> Optional[float]:
+        return float(self.opens[0]) if len(self) > 0 else None
+
+    @property
+    def close(self) -> Optional[float]:
+        return float(self.closes[-1]) if len(self) > 0 else None
+
+    @property
+    def high(self) -> Optional[float]:
+        return self._window_extreme('high', 0, 24 * 3600)
+
+    @property
+    def low(self) -> Optional[float]:
+        return self._window_extreme('low', 0, 24 * 3600)
+
+    @property
+    def volume(self) -> float:
+        return float(self.volumes.sum())
+
+    def candle_idx_at(self, moment: time, max_lag_secs: int = 0) -> Optional[int]:
+        """
+        Returns the index of the latest candle at or before the moment, or None if there is no candle
+        within max_lag_secs before the moment.
+        """
+        sec = _sec_of_day(moment)
+        idx = int(np.searchsorted(self.secs, sec, side='right')) - 1
+        if idx < 0 or self.secs[idx] < sec - max_lag_secs:
+            return None
+        return idx
+
+    def highest_high(self, start: time, end: time) -> Optional[float]:
+        """Returns the highest price of candles strictly between start and end, or None if there are none."""
+        return self._window_extreme('high', _sec_of_day(start) + 1, _sec_of_day(end))
+
+    def lowest_low(self, start: time, end: time) -> Optional[float]:
+        """Returns the lowest price of candles strictly between start and end, or None if there are none."""
+        return self._window_extreme('low', _sec_of_day(start) + 1, _sec_of_day(end))
+
+    def volume_between(self, start: time, end: time) -> float:
+        """Returns the volume traded in candles at or after start and before end."""
+        start_idx, end_idx = np.searchsorted(self.secs, [_sec_of_day(start), _sec_of_day(end)], side='left')
+        return float(self.volumes[start_idx:end_idx].sum())
+
+    def _window_extreme(self, kind: str, start_sec: int, end_sec: int) -> Optional[float]:
+        """Returns the extreme price of candles at or after start_sec and before end_sec, remembering it."""
+        key = (kind, start_sec, end_sec)
+        if key not in self._window_cache:
+            start_idx, end_idx = np.searchsorted(self.secs, [start_sec, end_sec], side='left')
+            if start_idx >= end_idx:
+                self._window_cache[key] = None
+            elif kind == 'high':
+                self._window_cache[key] = float(self.highs[start_idx:end_idx].max())
+            else:
+                self._window_cache[key] = float(self.lows[start_idx:end_idx].min())
+        return self._window_cache[key]
@@ -11,6 +11,9 @@ class MinuteCandle:
     """
     Represents a candle at minute resolution.
     Contains the candle's minute, volume, open price, high price, low price, and close price.
+
+    Bars aggregated from second-resolution candles also summarize the candles they contain, so the candles can be
+    validated from the bars alone (see CandleStats.from_minute_bars()). Other minute candles leave these as None.
     """
     minute: date
     open: float
@@ -18,24 +21,51 @@ class MinuteCandle:
     low: float
     close: float
     volume: int
+    # The number of second-resolution candles in the bar
+    num_candles: Optional[int]
+    # The seconds after the bar's start of its first and last candles
+    first_candle_offset: Optional[int]
+    last_candle_offset: Optional[int]
+    # The longest time (in secs) between two consecutive candles in the bar
+    longest_gap: Optional[int]
+    # The lowest price or volume of any candle in the bar
+    lowest_value: Optional[float]
 
     COMP_SPLITTER = DATA_SPLITTERS['level_2']
 
-    def __init__(self, minute: datetime, open: float, high: float, low: float, close: float, volume: int) -> None:
+    def __init__(self, minute: datetime, open: float, high: float, low: float, close: float, volume: int,
+                 num_candles: Optional[int] = None,
+                 first_candle_offset: Optional[int] = None,
+                 last_candle_offset: Optional[int] = None,
+                 longest_gap: Optional[int] = None,
+                 lowest_value: Optional[float] = None) -> None:
         self.minute = minute
         self.open = open
         self.high = high
         self.low = low
         self.close = close
         self.volume = volume
+        self.num_candles = num_candles
+        self.first_candle_offset = first_candle_offset
+        self.last_candle_offset = last_candle_offset
+        self.longest_gap = longest_gap
+        self.lowest_value = lowest_value
+
+    def has_candle_stats(self) -> bool:
+        """Returns True if the bar summarizes the second-resolution candles it was aggregated from."""
+        return self.num_candles is not None
 
     def is_same(self, o: object) -> bool:
         return isinstance(o, MinuteCandle) and \
                self.__str__() == o.__str__()
 
     def __str__(self) -> str:
-        return self.COMP_SPLITTER.join([self.minute.strftime(DATE_TIME_FORMAT), str(self.open), str(self.high),
-                                        str(self.low), str(self.close), str(self.volume)])
+        comps = [self.minute.strftime(DATE_TIME_FORMAT), str(self.open), str(self.high), str(self.low),
+                 str(self.close), str(self.volume)]
+        if self.has_candle_stats():
+            comps.extend([str(self.num_candles), str(self.first_candle_offset), str(self.last_candle_offset),
+                          str(self.longest_gap), str(self.lowest_value)])
+        return self.COMP_SPLITTER.join(comps)
 
     @staticmethod
     def from_str(candle_str: str) -> 'MinuteCandle':
@@ -45,6 +75,7 @@ class MinuteCandle:
         low: Optional[float] = None
         close: Optional[float] = None
         volume: Optional[int] = None
+        candle_stats = []
         for j, candle_comp in enumerate(candle_str.split(Candle.COMP_SPLITTER)):
             if j == 0:
                 minute = datetime.strptime(candle_comp, DATE_TIME_FORMAT)
@@ -58,7 +89,11 @@ class MinuteCandle:
                 close = float(candle_comp)
             elif j == 5:
                 volume = int(candle_comp)
-        return MinuteCandle(minute, open, high, low, close, volume)
+            elif j <= 9:
+                candle_stats.append(int(candle_comp))
+            elif j == 10:
+                candle_stats.append(float(candle_comp))
+        return MinuteCandle(minute, open, high, low, close, volume, *candle_stats)
 
     @staticmethod
     def from_json(data: Dict[str, str]) -> Optional['MinuteCandle']:
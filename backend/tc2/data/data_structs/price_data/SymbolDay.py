@@ -2,12 +2,32 @@ import traceback
 from datetime import date, datetime, timedelta
 from typing import List, Optional, Dict
 
-from tc2.data.data_structs.price_data.Candle import Candle
+import numpy as np
+
+from tc2.data.data_structs.price_data.Candle import Candle, FrozenCandle
+from tc2.data.data_structs.price_data.CandleStats import CandleStats
 from tc2.data.data_structs.price_data.DailyCandle import DailyCandle
+from tc2.data.data_structs.price_data.DayFeatures import DayFeatures
 from tc2.util.TimeInterval import TimeInterval
 from tc2.util.data_constants import MIN_CANDLES_PER_MIN
-from tc2.util.date_util import DATE_TIME_FORMAT, DATE_FORMAT
-from tc2.util.market_util import OPEN_DURATION
+from tc2.util.date_util import DATE_FORMAT
+from tc2.util.market_util import OPEN_DURATION, OPEN_TIME
+
+_ONE_SEC = timedelta(seconds=1)
+
+
+class FrozenCandleList(list):
+    """A list of a shared day's candles that raises an error when modified. Slices of it are ordinary lists."""
+
+    def _modify(self, *args, **kwargs) -> None:
+        raise TypeError('Tried to modify a shared day\'s candles. Copy the list (e.g. list(candles)) to modify it')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _modify
+    append = extend = insert = pop = remove = clear = sort = reverse = _modify
+
+    def __reduce__(self):
+        """Copies and unpickles the list by passing its candles to the constructor instead of appending them."""
+        return FrozenCandleList, (list(self),)
 
 
 class SymbolDay:
@@ -25,15 +45,103 @@ class SymbolDay:
         self.day_date = day_date
         self.candles = candles
         for candle in self.candles:
-            candle.moment = candle.moment.replace(tzinfo=None)
+            if candle.moment.tzinfo is not None:
+                candle.moment = candle.moment.replace(tzinfo=None)
 
-    def get_candle_at_sec(self, moment: datetime) -> Optional[Candle]:
-        """Searches for the candle at the given moment."""
-        moment = moment
+        # Private variables
+        self._features = None
+        self._sec_index = None
+        self._prev_sec_index = None
+        self._frozen = False
+
+    def freeze(self) -> None:
+        """
+        Makes the day's candles, and the arrays built from them, read-only, so that callers sharing the day
+        (see SymbolDayCache) fail loudly instead of changing data that other callers see.
+        """
         for candle in self.candles:
-            if (candle.moment - moment).total_seconds() < 1:
-                return candle
-        return None
+            candle.__class__ = FrozenCandle
+        self.candles = FrozenCandleList(self.candles)
+        for array in [self._sec_index, self._prev_sec_index]:
+            if array is not None:
+                array.flags.writeable = False
+        if self._features is not None:
+            self._features.make_read_only()
+        self._frozen = True
+
+    def get_features(self) -> DayFeatures:
+        """
+        Returns the day's features, extracting them on first use so that every model fed the day shares one pass
+        over its candles. Candles shouldn't be modified after this is called.
+        """
+        if self._features is None:
+            self._features = DayFeatures.from_candles(self.candles)
+            if self._frozen:
+                self._features.make_read_only()
+        return self._features
+
+    def get_candle_index_at_sec(self, moment: datetime, max_lag_secs: int = 0) -> Optional[int]:
+        """
+        Returns the index of the candle at the moment's second, or of the latest candle up to max_lag_secs earlier,
+        or None if there is no such candle. Takes constant time during market hours.
+        """
+        moment = moment.replace(tzinfo=None)
+        if moment.date() != self.day_date:
+            return None
+        sec = (moment - datetime.combine(self.day_date, OPEN_TIME)).seconds if moment.time() >= OPEN_TIME else -1
+
+        # Search the candles outside market hours, which aren't indexed
+        if not 0 <= sec < len(self._get_sec_index()):
+            moment = moment.replace(microsecond=0)
+            earliest_moment = moment - timedelta(seconds=max_lag_secs)
+            earlier_idxs = [i for i, candle in enumerate(self.candles)
+                            if earliest_moment <= candle.moment.replace(microsecond=0) <= moment]
+            return max(earlier_idxs, key=lambda i: self.candles[i].moment) if len(earlier_idxs) > 0 else None
+
+        # Look up the candle at the second, or the latest one before it
+        idx = self._sec_index[sec]
+        if idx < 0 and max_lag_secs > 0:
+            latest_sec = self._get_prev_sec_index()[sec]
+            if latest_sec >= 0 and sec - latest_sec <= max_lag_secs:
+                idx = self._sec_index[latest_sec]
+        return int(idx) if idx >= 0 else None
+
+    def get_candle_at_sec(self, moment: datetime, max_lag_secs: int = 0) -> Optional[Candle]:
+        """
+        Returns the candle at the moment's second, or the latest candle up to max_lag_secs earlier,
+        or None if there is no such candle.
+        """
+        idx = self.get_candle_index_at_sec(moment, max_lag_secs)
+        return None if idx is None else self.candles[idx]
+
+    def _get_sec_index(self) -> np.ndarray:
+        """
+        Returns an array containing, for each second the market is open, the index of the candle at that second,
+        or -1 if there is none. Built on first use. Candles shouldn't be modified after this is called.
+        """
+        if self._sec_index is None:
+            open_moment = datetime.combine(self.day_date, OPEN_TIME)
+            secs = np.fromiter(((candle.moment - open_moment) // _ONE_SEC for candle in self.candles),
+                               dtype=np.int64, count=len(self.candles))
+            in_session = (secs >= 0) & (secs < OPEN_DURATION)
+            self._sec_index = np.full(int(OPEN_DURATION), -1, dtype=np.int32)
+            self._sec_index[secs[in_session]] = np.flatnonzero(in_session)
+            if self._frozen:
+                self._sec_index.flags.writeable = False
+        return self._sec_index
+
+    def _get_prev_sec_index(self) -> np.ndarray:
+        """
+        Returns an array containing, for each second the market is open, the latest second at or before it
+        that has a candle, or -1 if there is none. Built on first use.
+        """
+        if self._prev_sec_index is None:
+            sec_index = self._get_sec_index()
+            self._prev_sec_index = np.maximum.accumulate(
+                np.where(sec_index >= 0, np.arange(len(sec_index), dtype=np.int32), -1))
+            if self._frozen:
+                self._prev_sec_index.flags.writeable = False
+        return self._prev_sec_index
 
     def create_daily_candle(self) -> Optional[DailyCandle]:
         """Uses second-resolution candles to aggregate a DailyCandle."""
@@ -81,7 +189,8 @@ class SymbolDay:
                          check_prices: bool = True,
                          max_gap: int = 160,
                          gap_graces: int = 5,
-                         debug_output: Optional[List[str]] = None) -> bool:
+                         debug_output: Optional[List[str]] = None,
+                         stats: Optional[CandleStats] = None) -> bool:
         """
         :param candles: the data to validate
         :param min_minutes: ensure at least this many minutes have data present during them
@@ -89,6 +198,7 @@ class SymbolDay:
         :param check_prices: ensure that each candle has positive values
         :param max_gap: the longest duration in seconds to allow for no data to be present more than gap_graces times
         :param gap_graces: the number of gap periods to allow
+        :param stats: the candles' stats, if already computed using CandleStats.from_candles()
         :return: True if the list of candles is valid, False otherwise
         """
 
@@ -108,65 +218,112 @@ class SymbolDay:
                                             MIN_CANDLES_PER_MIN * min_minutes, len(candles)))
             return False
 
-        # Iterate through candle collection to validate it
-        secs_in_min_intervals = {}
-        longest_gaps = [timedelta(seconds=0) for _ in range(gap_graces + 1)]
-        last_t = candles[0].moment
-        for candle in candles:
-            # Record the second
-            # noinspection PyTypeChecker
-            sec_moment: datetime = candle.moment.replace(microsecond=0)
-            minute_str = sec_moment.replace(second=0).strftime(DATE_TIME_FORMAT)
-            if minute_str not in secs_in_min_intervals.keys():
-                secs_in_min_intervals[minute_str] = 0
-            secs_in_min_intervals[minute_str] += 1
-
-            # Validate price and volume amounts
-            if check_prices and \
-                    (candle.open < 1 or candle.high < 1 or candle.low < 1 or candle.close < 1 or candle.volume < 1):
+        # Compute the number of candles in each minute, the gaps between candles, and any invalid candles
+        if stats is None:
+            stats = CandleStats.from_candles(candles)
+
+        # Validate price and volume amounts
+        if check_prices and stats.first_invalid_idx is not None:
+            if debug_output is not None:
+                candle = candles[stats.first_invalid_idx]
+                debug_output.append('invalid candle found at {}:{}:{} (OHLCV: {},{},{},{})'
+                                    .format(candle.moment.hour, candle.moment.minute, candle.moment.second,
+                                            candle.open, candle.high, candle.low, candle.close, candle.volume))
+            return False
+
+        return cls.validate_candle_stats(stats, min_minutes=min_minutes, check_secs=check_secs,
+                                         check_prices=check_prices, max_gap=max_gap, gap_graces=gap_graces,
+                                         debug_output=debug_output)
+
+    @classmethod
+    def validate_candle_stats(cls, stats: CandleStats,
+                              min_minutes: int = OPEN_DURATION / 60 - 10,
+                              check_secs: bool = True,
+                              check_prices: bool = True,
+                              max_gap: int = 160,
+                              gap_graces: int = 5,
+                              debug_output: Optional[List[str]] = None) -> bool:
+        """
+        Performs the checks of validate_candles() using only the candles' stats.
+        :return: True if the candles the stats describe are valid, False otherwise
+        """
+
+        # Check that minimum number of total seconds are present
+        if stats.num_candles < MIN_CANDLES_PER_MIN * min_minutes:
+            if debug_output is not None:
+                debug_output.append('needed at least {} * ~{} = {} candles, but only found {}'
+                                    .format(MIN_CANDLES_PER_MIN, min_minutes,
+                                            MIN_CANDLES_PER_MIN * min_minutes, stats.num_candles))
+            return False
+
+        # Validate price and volume amounts
+        if check_prices and stats.first_invalid_idx is not None:
+            if debug_output is not None:
+                debug_output.append(f'invalid candle found (candle #{stats.first_invalid_idx} has a price or '
+                                    f'volume below 1)')
+            return False
+
+        # Check that minimum number of seconds are present in most every minute
+        if check_secs:
+            lowest_idx = int(min_minutes / 3.0) + 1
+            nth_fewest = stats.nth_fewest_candles_per_minute(lowest_idx)
+            if nth_fewest is None:
                 if debug_output is not None:
-                    debug_output.append('invalid candle found at {}:{}:{} (OHLCV: {},{},{},{})'
-                                        .format(candle.moment.hour, candle.moment.minute, candle.moment.second,
-                                                candle.open, candle.high, candle.low, candle.close, candle.volume))
+                    debug_output.append(f'couldn\'t check seconds per minute; most likely this means there are '
+                                        f'insufficient minutes or the interval is very small: only '
+                                        f'{len(stats.candles_per_minute)} minutes have data')
+                return False
+            if nth_fewest < MIN_CANDLES_PER_MIN:
+                if debug_output is not None:
+                    debug_output.append(f'too many minutes do not have at least {MIN_CANDLES_PER_MIN} candles; '
+                                        f'lowest third of minutes:')
+                    for num_secs in np.sort(stats.candles_per_minute)[0:lowest_idx]:
+                        debug_output.append('\t{} candles'.format(num_secs))
                 return False
 
-            # Record time gap between candles
-            gap = candle.moment - last_t if last_t.day == candle.moment.day else timedelta(seconds=0)
+        # Allow up to gap_graces gaps of max_gap secs. Shorter gaps can never use up a grace, so only long ones are
+        # replayed (in order) into the grace slots
+        longest_gaps = [0.0 for _ in range(gap_graces + 1)]
+        for gap in stats.gaps[stats.gaps >= max_gap]:
             for i in range(len(longest_gaps)):
-                if longest_gaps[i].total_seconds() > max_gap:
+                if longest_gaps[i] > max_gap:
                     continue
                 if gap > longest_gaps[i]:
                     longest_gaps[i] = gap
                     break
 
-            # Move on to next candle, mark this one as the "last" one
-            last_t = candle.moment
-
-        # Check that minimum number of seconds are present in most every minute
-        try:
-            if check_secs and \
-                    (sorted(list(secs_in_min_intervals.values()))[int(min_minutes / 3.0) + 1] < MIN_CANDLES_PER_MIN):
-                if debug_output is not None:
-                    debug_output.append(f'too many minutes do not have at least {MIN_CANDLES_PER_MIN} candles; lowest third of minutes:')
-                    for num_secs in sorted(list(secs_in_min_intervals.values()))[0:int(min_minutes / 3.0) + 1]:
-                        debug_output.append('\t{} candles'.format(num_secs))
-                return False
-        except Exception as e:
-            if debug_output is not None:
-                debug_output.append(f'couldn\'t check seconds per minute; most likely this means there are '
-                                    f'insufficient minutes or the interval is very small: {traceback.format_exc()}')
-            return False
-
         # Check that the longest gap is not too long
-        if longest_gaps[gap_graces].total_seconds() >= max_gap:
+        if longest_gaps[gap_graces] >= max_gap:
             if debug_output is not None:
-                debug_output.append(f'unacceptably long gaps found ({longest_gaps[gap_graces].total_seconds()} secs)')
+                debug_output.append(f'unacceptably long gaps found ({longest_gaps[gap_graces]} secs)')
             return False
 
         if debug_output is not None:
             debug_output.append('candles validated successfully')
         return True
 
+    @classmethod
+    def from_candle_array(cls, symbol: str, day_date: date, candle_array: np.ndarray) -> 'SymbolDay':
+        """
+        Creates a SymbolDay from an array created by to_candle_array().
+        The array's values are copied into new Candle objects, while the array itself becomes the columns of the
+        day's features, so they needn't be extracted from the candles again.
+        """
+        midnight = datetime.combine(day_date, datetime.min.time())
+        candles = [Candle(moment=midnight + timedelta(seconds=secs), open=candle_open, high=candle_high,
+                          low=candle_low, close=candle_close, volume=int(volume))
+                   for secs, candle_open, candle_high, candle_low, candle_close, volume in candle_array.tolist()]
+        day_data = SymbolDay(symbol, day_date, candles)
+        day_data._features = DayFeatures(candle_array)
+        return day_data
+
+    def to_candle_array(self) -> np.ndarray:
+        """Returns an (n, 6) array of each candle's [seconds since midnight, open, high, low, close, volume]."""
+        midnight = datetime.combine(self.day_date, datetime.min.time())
+        return np.array([[(candle.moment - midnight) // _ONE_SEC, candle.open, candle.high, candle.low,
+                          candle.close, candle.volume] for candle in self.candles],
+                        dtype=np.float64).reshape(-1, 6)
+
     @classmethod
     def from_json(cls, data: Dict[str, any]) -> Optional['SymbolDay']:
         """Converts the json dictionary into a SymbolDay object."""
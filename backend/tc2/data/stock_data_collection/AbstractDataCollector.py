@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional
+from typing import Optional, List, Tuple, Iterator
 
 from tc2.env.TimeEnv import TimeEnv
 from tc2.log.LogFeed import LogFeed
@@ -21,3 +21,12 @@ class AbstractDataCollector(Loggable):
     def collect_candles_for_day(self, day: date, symbol: str) -> Optional[SymbolDay]:
         """Collects candles for the symbol on the day."""
         raise NotImplementedError
+
+    def collect_candles_for_days(self, symbol_days: List[Tuple[str, date]]) \
+            -> Iterator[Tuple[str, date, Optional[SymbolDay]]]:
+        """
+        Collects candles for each (symbol, day) pair, yielding each (symbol, day, SymbolDay) as it is collected.
+        Collectors that can make concurrent requests should override this to collect many symbol-days at once.
+        """
+        for symbol, day in symbol_days:
+            yield symbol, day, self.collect_candles_for_day(day, symbol)
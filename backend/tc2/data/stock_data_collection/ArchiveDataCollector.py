@@ -0,0 +1,43 @@
+from datetime import date
+from typing import Optional, List
+
+from tc2.data.data_storage.TickArchive import TickArchive
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.data.stock_data_collection.AbstractDataCollector import AbstractDataCollector
+from tc2.data.stock_data_collection.TickAggregator import TickAggregator
+from tc2.env.TimeEnv import TimeEnv
+from tc2.log.LogFeed import LogFeed
+
+
+class ArchiveDataCollector(AbstractDataCollector):
+    """
+    Replays trades from a TickArchive instead of downloading them from polygon.io.
+    Candles are re-aggregated from the raw trades, so they can be rebuilt at any resolution.
+    """
+
+    tick_archive: TickArchive
+
+    def __init__(self, logfeed_program: LogFeed, logfeed_process: LogFeed, time_env: TimeEnv,
+                 tick_archive: TickArchive) -> None:
+        super().__init__(logfeed_program=logfeed_program,
+                         logfeed_process=logfeed_process,
+                         time_env=time_env)
+        self.tick_archive = tick_archive
+
+    def collect_candles_for_day(self, day: date, symbol: str) -> Optional[SymbolDay]:
+        """Rebuilds the symbol's second-resolution candles on the day, or returns None if no trades are archived."""
+        candles = self.aggregate_ticks(symbol, day)
+        return None if candles is None else SymbolDay(symbol, day, candles)
+
+    def aggregate_ticks(self, symbol: str, day: date, bar_secs: int = 1) -> Optional[List[Candle]]:
+        """
+        Aggregates the symbol's archived trades on the day into candles lasting bar_secs seconds.
+        Returns None if no trades are archived.
+        """
+        ticks = self.tick_archive.load_ticks(symbol, day)
+        if ticks is None:
+            return None
+        aggregator = TickAggregator(day, bar_secs=bar_secs)
+        aggregator.fold(*ticks)
+        return aggregator.finish()
@@ -1,10 +1,12 @@
 import traceback
 from datetime import date
-from typing import Optional, List
+from typing import Optional, List, Iterable, Dict
 
+from tc2.stock_analysis.AbstractForgetfulModel import AbstractForgetfulModel
 from tc2.stock_analysis.AbstractModel import AbstractModel
 from tc2.stock_analysis.AbstractNeuralModel import AbstractNeuralModel
 from tc2.stock_analysis.AbstractSpotModel import AbstractSpotModel
+from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.env.ExecEnv import ExecEnv
 from tc2.util.date_util import DATE_FORMAT
@@ -43,54 +45,19 @@ class ModelFeeder(ExecEnv):
         # Train each model
         for model in self.models:
 
-            # Only train models that can be trained
-            if isinstance(model, AbstractSpotModel) or isinstance(model, AbstractNeuralModel):
+            # Spot models aren't trained, but may save results calculated from stable data to speed up later output
+            if isinstance(model, AbstractSpotModel):
+                if stable and day_data is not None:
+                    self._feed_spot_model(model, day_data)
                 continue
 
-            # Get first time model was trained
-            first_training_date = self.redis().get_analysis_start_date(symbol, model.model_type,
-                                                                       self.time().now().date())
-
-            # Get last time model was trained
-            last_training_date = self.redis().get_analysis_date(symbol, model.model_type)
-
-            # Restart training from this day if the model is missing a snapshot
-            if self.redis().get_analysis_snapshot_raw_output(symbol, model.model_type) is None:
-                model.restart_training(symbol)
-                self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
-                self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
-                                  f'{day_date.strftime(DATE_FORMAT)} (model lacks a snapshot)')
-
-            # Restart training from this day if the model is no longer continuous
-            elif last_training_date < self.time().get_prev_mkt_day(day_date):
-                model.restart_training(symbol)
-                self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
-                self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
-                                  f'{day_date.strftime(DATE_FORMAT)} (model training missed a day before this date)')
-
-            # Restart training from this day if the model began training after this day
-            elif day_date < first_training_date:
-                model.restart_training(symbol)
-                self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
-                self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
-                                  f'{day_date.strftime(DATE_FORMAT)} (date precedes model\'s current start date)')
-
-            # Don't train the model if it has already been trained on this day's data
-            elif day_date <= last_training_date:
-                if not possibly_already_trained:
-                    self.warn_process(f'{self.env_type.value} tried to train {symbol}\'s {model.model_type} more than '
-                                      f'once on {day_date.strftime(DATE_FORMAT)}')
+            # Only train models that can be trained
+            if isinstance(model, AbstractNeuralModel):
                 continue
 
-            # Revert to last stable snapshot if about to be fed new stable data
-            elif stable:
-                snapshot_date = model.revert_to_snapshot(symbol)
-                # Restart training from this day if the snapshot is too old
-                if day_date != self.time().get_next_mkt_day(snapshot_date):
-                    model.restart_training(symbol)
-                    self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
-                    self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
-                                      f'{day_date.strftime(DATE_FORMAT)} (snapshot was too old)')
+            # Prepare the model's training state for this day, or skip the day
+            if not self._prepare_model(model, symbol, day_date, stable, possibly_already_trained):
+                continue
 
             # Get the data
             if not data_provided:
@@ -114,6 +81,144 @@ class ModelFeeder(ExecEnv):
             if stable:
                 model.take_snapshot(symbol, model_output, day_date)
 
+    def train_models_batch(self,
+                           symbol: str,
+                           days: Iterable[SymbolDay],
+                           stable: bool,
+                           possibly_already_trained: bool = False) -> None:
+        """
+        Trains analysis models on the symbol's valid days, in ascending order, with the same result as calling
+        train_models() on each day. Each forgetful model measures every day first and then folds all measurements
+        into its rolling sum at once, so its state is read and stored once per batch instead of once per day.
+        Days are measured as they are iterated, so only their measurements are kept in memory.
+        Unstable days are trained one at a time, since models don't keep snapshots of unstable training to continue.
+
+        :param possibly_already_trained: if True, don't log when we skip over a model
+        """
+        if not stable:
+            for day_data in days:
+                self.train_models(symbol, day_data.day_date, day_data, stable, possibly_already_trained)
+            return
+
+        forgetful_models = [model for model in self.models if isinstance(model, AbstractForgetfulModel)]
+        dates: List[date] = []
+        measurements: Dict[AnalysisModelType, List[Optional[float]]] = {model.model_type: []
+                                                                         for model in forgetful_models}
+
+        # Measure each day
+        for day_data in days:
+            dates.append(day_data.day_date)
+            for model in self.models:
+                if isinstance(model, AbstractSpotModel):
+                    if stable:
+                        self._feed_spot_model(model, day_data)
+                elif isinstance(model, AbstractForgetfulModel):
+                    measurements[model.model_type].append(model.measure_day(day_data))
+
+        # Fold each forgetful model's measurements into its rolling sum
+        for model in forgetful_models:
+
+            # Skip days the model has already been trained on, and prepare it for training on the first other day
+            first_idx = next((i for i, day_date in enumerate(dates)
+                              if self._prepare_model(model, symbol, day_date, stable, possibly_already_trained)), None)
+            if first_idx is None:
+                continue
+
+            # Feed the model each run of consecutive days
+            day_measurements = list(zip(dates, measurements[model.model_type]))
+            idx = first_idx
+            while idx < len(dates):
+                run_end = idx + 1
+                while run_end < len(dates) and dates[run_end] == self.time().get_next_mkt_day(dates[run_end - 1]):
+                    run_end += 1
+                num_merged = model.feed_measurements(symbol, day_measurements[idx:run_end])
+
+                # Restart training wherever it stops being continuous: after an unmeasurable day, or at a gap
+                idx = idx + num_merged + 1 if idx + num_merged < run_end else run_end
+                if idx < len(dates):
+                    model.restart_training(symbol)
+                    self.redis().save_analysis_start_date(symbol, model.model_type, dates[idx])
+                    self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                                      f'{dates[idx].strftime(DATE_FORMAT)} (model training missed a day before this '
+                                      f'date)')
+
+            # Take a snapshot after being fed stable data
+            if stable:
+                model.take_snapshot(symbol, model.get_stored_output(symbol), dates[-1])
+
+    def _feed_spot_model(self, model: AbstractSpotModel, day_data: SymbolDay) -> None:
+        """Lets a spot model save any results it calculates from the day's stable data."""
+        try:
+            model.feed_model(day_data)
+        except Exception as e:
+            self.error_process(f'Error feeding {self.env_type.value} {model.model_type.value}:')
+            self.warn_process(traceback.format_exc())
+
+    def _prepare_model(self,
+                       model: AbstractModel,
+                       symbol: str,
+                       day_date: date,
+                       stable: bool,
+                       possibly_already_trained: bool) -> bool:
+        """
+        Restarts or reverts the model's training as needed before training it on the day.
+        :return: False if the model shouldn't be trained on the day
+        """
+
+        # Get first time model was trained
+        first_training_date = self.redis().get_analysis_start_date(symbol, model.model_type,
+                                                                   self.time().now().date())
+
+        # Get last time model was trained
+        last_training_date = self.redis().get_analysis_date(symbol, model.model_type)
+
+        # Restart training from this day if the model's stored state was measured differently
+        if isinstance(model, AbstractForgetfulModel) and model.is_outdated(symbol):
+            model.restart_training(symbol)
+            self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
+            self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                              f'{day_date.strftime(DATE_FORMAT)} (model\'s measurement version changed)')
+
+        # Restart training from this day if the model is missing a snapshot
+        elif self.redis().get_analysis_snapshot_raw_output(symbol, model.model_type) is None:
+            model.restart_training(symbol)
+            self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
+            self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                              f'{day_date.strftime(DATE_FORMAT)} (model lacks a snapshot)')
+
+        # Restart training from this day if the model is no longer continuous
+        elif last_training_date < self.time().get_prev_mkt_day(day_date):
+            model.restart_training(symbol)
+            self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
+            self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                              f'{day_date.strftime(DATE_FORMAT)} (model training missed a day before this date)')
+
+        # Restart training from this day if the model began training after this day
+        elif day_date < first_training_date:
+            model.restart_training(symbol)
+            self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
+            self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                              f'{day_date.strftime(DATE_FORMAT)} (date precedes model\'s current start date)')
+
+        # Don't train the model if it has already been trained on this day's data
+        elif day_date <= last_training_date:
+            if not possibly_already_trained:
+                self.warn_process(f'{self.env_type.value} tried to train {symbol}\'s {model.model_type} more than '
+                                  f'once on {day_date.strftime(DATE_FORMAT)}')
+            return False
+
+        # Revert to last stable snapshot if about to be fed new stable data
+        elif stable:
+            snapshot_date = model.revert_to_snapshot(symbol)
+            # Restart training from this day if the snapshot is too old
+            if day_date != self.time().get_next_mkt_day(snapshot_date):
+                model.restart_training(symbol)
+                self.redis().save_analysis_start_date(symbol, model.model_type, day_date)
+                self.info_process(f'{self.env_type.value} restarted {model.model_type} training for {symbol} from '
+                                  f'{day_date.strftime(DATE_FORMAT)} (snapshot was too old)')
+
+        return True
+
     def reset_models(self, symbols: List[str]) -> None:
         self.info_process(f'{self.env_type.value} ModelFeeder resetting analysis models for {symbols}')
         for model in self.models:
@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import queue
+import traceback
+from datetime import date
+from multiprocessing import Process
+from multiprocessing.queues import Queue
+from threading import Thread
+from typing import Optional, List, Tuple, Dict, Callable, Iterator
+
+from tc2.data.data_storage.storage_backends import uses_memory_storage
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
+from tc2.env.ExecEnv import ExecEnv
+from tc2.metrics.Metrics import Metrics
+
+
+class ModelTrainingPipeline(ExecEnv):
+    """
+    Trains analysis models on many symbol-days at once.
+
+    Symbols are divided among worker processes, and each worker trains its symbols' days in ascending order.
+    Within a worker, a loader thread loads and validates upcoming days while models measure the current day, and
+    each symbol's measurements are folded into its models in one batch.
+    Workers are forked once, when the pipeline is created, so no thread of the pipeline's is running when they're
+    forked. Create the pipeline before starting other threads in the calling process, and close() it when done.
+    Environments with in-memory databases can't share them with other processes, so they train in-process.
+    """
+
+    # Max number of worker processes to train models in
+    MAX_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+    # Max number of loaded days to hold in memory while waiting for models to be fed
+    PREFETCH_DAYS = 2
+
+    # Number of seconds an idle worker waits for symbols before checking that the pipeline's process is alive
+    WORKER_POLL_INTERVAL = 1
+
+    _workers: List[Process]
+    _task_queues: List[Queue]
+    _results_queue: Optional[Queue]
+
+    def __init__(self, env: ExecEnv) -> None:
+        super().__init__(env.logfeed_program, env.logfeed_process, creator_env=env)
+        self.clone_same_thread()
+
+        # Fork the workers now, before the pipeline starts any threads in this process
+        self._workers = []
+        self._task_queues = []
+        self._results_queue = None
+        if self.MAX_WORKERS <= 1 or uses_memory_storage(self.env_type):
+            return
+        self._results_queue = multiprocessing.Queue()
+        for _ in range(self.MAX_WORKERS):
+            task_queue = multiprocessing.Queue()
+            worker = Process(target=self._work, args=(task_queue, self._results_queue, os.getpid()), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+            self._task_queues.append(task_queue)
+
+    def close(self) -> None:
+        """Stops the worker processes. Later calls to train() train in-process."""
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for worker in self._workers:
+            worker.join(10)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self._workers = []
+        self._task_queues = []
+
+    def train(self,
+              symbol_days: List[Tuple[str, date]],
+              stable: bool,
+              possibly_already_trained: bool = False,
+              use_stream_cache: bool = False) -> Dict[Tuple[str, date], bool]:
+        """
+        Trains models on each (symbol, day) pair, loading each day's data from mongo.
+        Each symbol's days are trained in ascending order.
+
+        :param use_stream_cache: if True, use candles cached from polygon stream when mongo lacks valid data
+
+        :return: a dict mapping each (symbol, day) pair to True if models were trained on it, or False if the
+            day's data was invalid or training failed
+        """
+
+        # Group each symbol's days, in order
+        symbol_dates: Dict[str, List[date]] = {}
+        for symbol, day_date in symbol_days:
+            symbol_dates.setdefault(symbol, [])
+            if day_date not in symbol_dates[symbol]:
+                symbol_dates[symbol].append(day_date)
+        grouped = [(symbol, sorted(dates)) for symbol, dates in symbol_dates.items()]
+        results = {(symbol, day_date): False for symbol, dates in grouped for day_date in dates}
+
+        # Train in-process if there are no workers or nothing to parallelize
+        num_workers = min(len(self._workers), len(grouped))
+        if num_workers <= 1:
+            def report(symbol: str, day_date: date, trained: bool) -> None:
+                results[(symbol, day_date)] = trained
+
+            self._train_symbols(ModelFeeder(self), grouped, stable, possibly_already_trained, use_stream_cache, report)
+            return results
+
+        # Divide symbols among workers so that each symbol is only trained by one worker
+        for worker_idx in range(num_workers):
+            self._task_queues[worker_idx].put((grouped[worker_idx::num_workers], stable, possibly_already_trained,
+                                               use_stream_cache))
+
+        # Gather results until every worker has finished its symbols
+        workers_finished = 0
+        results_received = 0
+        while workers_finished < num_workers:
+            try:
+                result = self._results_queue.get(timeout=1)
+            except queue.Empty:
+                if all(worker.is_alive() for worker in self._workers[:num_workers]):
+                    continue
+                break
+            if result is None:
+                workers_finished += 1
+                continue
+            symbol, day_date, trained = result
+            results[(symbol, day_date)] = trained
+            results_received += 1
+
+        # Stop using the workers if any exited, since their unreported results could be mistaken for later ones
+        if workers_finished < num_workers:
+            self.error_process(f'{self.env_type.value} model training workers exited before reporting results '
+                               f'for {len(results) - results_received} symbol-days. Training in-process from now on')
+            self.close()
+
+        return results
+
+    def _work(self,
+              task_queue: Queue,
+              results_queue: Queue,
+              pipeline_pid: int) -> None:
+        """
+        Trains the symbols sent to this worker process, sending each symbol-day's result to the pipeline followed by
+        None once all the symbols are trained. Stops when the pipeline is closed or its process exits.
+        """
+        self.fork_new_thread()
+        Metrics.set_process_label(f'ModelTrainingPipeline-{os.getpid()}')
+
+        def report(symbol: str, day_date: date, trained: bool) -> None:
+            results_queue.put((symbol, day_date, trained))
+
+        while os.getppid() == pipeline_pid:
+            try:
+                task = task_queue.get(timeout=self.WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if task is None:
+                return
+            symbol_dates, stable, possibly_already_trained, use_stream_cache = task
+            try:
+                self._train_symbols(ModelFeeder(self), symbol_dates, stable, possibly_already_trained,
+                                    use_stream_cache, report)
+            except Exception as e:
+                self.error_process(f'Error in {self.env_type.value} model training worker:')
+                self.warn_process(traceback.format_exc())
+            finally:
+                Metrics.flush_if_due(self.redis())
+                results_queue.put(None)
+
+    def _train_symbols(self,
+                       model_feeder: ModelFeeder,
+                       symbol_dates: List[Tuple[str, List[date]]],
+                       stable: bool,
+                       possibly_already_trained: bool,
+                       use_stream_cache: bool,
+                       report: Callable[[str, date, bool], None]) -> None:
+        """Trains models on each symbol's days in order, loading upcoming days on a separate thread."""
+        loaded_days = queue.Queue(maxsize=self.PREFETCH_DAYS)
+
+        def load_days() -> None:
+            for symbol, dates in symbol_dates:
+                for day_date in dates:
+                    loaded_days.put((symbol, day_date, self._load_valid_day(symbol, day_date, use_stream_cache)))
+            loaded_days.put(None)
+
+        loader = Thread(target=load_days, daemon=True)
+        loader.start()
+
+        # Feed models each symbol's days in one batch, measuring each day as soon as it has been loaded
+        loaded_day = loaded_days.get()
+        while loaded_day is not None:
+            symbol = loaded_day[0]
+            fed_dates = []
+
+            def valid_days() -> Iterator[SymbolDay]:
+                """Yields the symbol's loaded days that have valid data."""
+                nonlocal loaded_day
+                while loaded_day is not None and loaded_day[0] == symbol:
+                    _, day_date, day_data = loaded_day
+                    if day_data is None:
+                        report(symbol, day_date, False)
+                    else:
+                        fed_dates.append(day_date)
+                        yield day_data
+                    loaded_day = loaded_days.get()
+
+            try:
+                train_start = Metrics.start()
+                model_feeder.train_models_batch(symbol=symbol,
+                                                days=valid_days(),
+                                                stable=stable,
+                                                possibly_already_trained=possibly_already_trained)
+                Metrics.record_since('pipeline.train_symbol', train_start)
+                for day_date in fed_dates:
+                    report(symbol, day_date, True)
+            except Exception as e:
+                self.error_process(f'Error training {self.env_type.value} models for {symbol}:')
+                self.warn_process(traceback.format_exc())
+                for day_date in fed_dates:
+                    report(symbol, day_date, False)
+
+                # Skip the symbol's remaining days
+                while loaded_day is not None and loaded_day[0] == symbol:
+                    report(symbol, loaded_day[1], False)
+                    loaded_day = loaded_days.get()
+        loader.join()
+
+    def _load_valid_day(self,
+                        symbol: str,
+                        day_date: date,
+                        use_stream_cache: bool) -> Optional[SymbolDay]:
+        """
+        Loads the symbol's data on the day from mongo, or (optionally) from the redis candle cache if mongo lacks
+        valid data. Returns None if no valid data was found.
+        """
+        try:
+            load_start = Metrics.start()
+            day_data = self.mongo().load_symbol_day(symbol, day_date)
+            if day_data is None or not SymbolDay.validate_candles(day_data.candles):
+                if not use_stream_cache:
+                    return None
+                day_data = SymbolDay(symbol=symbol,
+                                     day_date=day_date,
+                                     candles=self.redis().get_cached_candles(symbol=symbol, day_date=day_date))
+                if not SymbolDay.validate_candles(day_data.candles):
+                    return None
+            Metrics.record_since('pipeline.load_day', load_start)
+            return day_data
+        except Exception as e:
+            self.error_process(f'Error loading {self.env_type.value} data for {symbol} on {day_date}:')
+            self.warn_process(traceback.format_exc())
+            return None
@@ -1,21 +1,27 @@
 from __future__ import annotations
 
-import time as pytime
+import queue
+import threading
 import traceback
-from datetime import datetime, timedelta, date
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date
+from typing import Optional, List, Tuple, Iterator, Dict
 
 import alpaca_trade_api as ata
-import pandas as pd
+import numpy as np
 from pytz import timezone
 
+from tc2.data.data_storage.TickArchive import TickArchive
+from tc2.data.data_storage.TickArchiveWriter import TickArchiveWriter
 from tc2.data.stock_data_collection.AbstractDataCollector import AbstractDataCollector
+from tc2.data.stock_data_collection.TickAggregator import TickAggregator, NS_PER_SEC
 from tc2.data.data_structs.price_data.Candle import Candle
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.env.TimeEnv import TimeEnv
 from tc2.log.LogFeed import LogFeed
+from tc2.metrics.Metrics import Metrics
+from tc2.util.TokenBucket import TokenBucket
 from tc2.util.market_util import OPEN_TIME, CLOSE_TIME
-from tc2.util.synchronization import synchronized_on_polygon_rest
 
 POLYGON_DATE_FORMAT = '%Y-%m-%d'
 
@@ -25,29 +31,47 @@ class PolygonDataCollector(AbstractDataCollector):
     Provides access to stock market data from polygon.io.
     """
 
-    # Max number of seconds to wait for polygon rate limit to go away
-    MAX_RATE_LIMIT_WAIT = 240
+    # Max number of API requests to make per second, across all threads in the process
+    MAX_REQUESTS_PER_SEC = 5
 
-    # Initial number of seconds to wait after encountering API rate limit
-    INITIAL_RATE_LIMIT_WAIT = 4
+    # Max number of API requests to make at once after the rate limiter has been idle
+    MAX_REQUEST_BURST = 10
 
-    # Max number of 50k-count batches to fetch before parsing;
-    # this number times 50k needs to be higher than the number of trades a stock
-    # could have in one second
-    MAX_SIMULTANEOUS_BATCHES = 20
+    # Number of seconds to stop every thread from making requests after one of them encounters an error
+    ERROR_PAUSE = 4
+
+    # Max number of consecutive errors to tolerate while fetching one batch before skipping ahead
+    MAX_FETCH_ERRORS = 8
+
+    # Max number of symbol-days to collect at once
+    MAX_CONCURRENT_COLLECTIONS = 8
+
+    # Max number of fetched 50k-count pages of trades to hold in memory while waiting to aggregate and archive them
+    MAX_PAGES_IN_FLIGHT = 2
+
+    # Number of seconds the fetcher waits for room in the page queue before checking whether it was cancelled
+    PAGE_PUT_TIMEOUT = 0.5
+
+    # The rate limiter shared by every collector in the process
+    rate_limiter: TokenBucket = TokenBucket(rate=MAX_REQUESTS_PER_SEC, capacity=MAX_REQUEST_BURST)
+
+    # Each thread's rest client, which keeps its HTTP connections open between requests
+    _thread_clients = threading.local()
 
     # Instance variables
-    next_api_call: datetime
-    rate_limit_wait: float
+    tick_archive: Optional[TickArchive]
 
-    def __init__(self, logfeed_program: LogFeed, logfeed_process: LogFeed, time_env: TimeEnv) -> None:
+    def __init__(self, logfeed_program: LogFeed, logfeed_process: LogFeed, time_env: TimeEnv,
+                 tick_archive: Optional[TickArchive] = None) -> None:
+        """
+        :param tick_archive: if provided, the raw trades of each symbol-day collected in full are saved here
+        """
         super().__init__(logfeed_program=logfeed_program,
                          logfeed_process=logfeed_process,
                          time_env=time_env)
 
-        # Private variables
-        self.next_api_call = time_env.now()
-        self.rate_limit_wait = 0
+        # Public variables
+        self.tick_archive = tick_archive
 
     def collect_candles_for_day(self, day: date, symbol: str) -> Optional[SymbolDay]:
         """
@@ -63,139 +87,203 @@ class PolygonDataCollector(AbstractDataCollector):
         except Exception as e:
             self.error_process(f'Error collecting {symbol} candles from polygon for {day:%m-%d-%Y}:')
             self.warn_process(traceback.format_exc())
+            return None
 
         return SymbolDay(symbol, day, candles)
 
-    @synchronized_on_polygon_rest
+    def collect_candles_for_days(self, symbol_days: List[Tuple[str, date]]) \
+            -> Iterator[Tuple[str, date, Optional[SymbolDay]]]:
+        """
+        Uses Polygon to collect candles for many symbol-days at once, governed by the shared rate limiter.
+        Yields each (symbol, day, SymbolDay) as soon as it is collected, in no particular order, or
+        (symbol, day, None) if collecting the symbol-day failed, so one failure doesn't stop the others.
+        Does NOT save the newly-collected candles.
+        """
+        if len(symbol_days) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.MAX_CONCURRENT_COLLECTIONS, len(symbol_days)),
+                                thread_name_prefix='polygon') as executor:
+            futures = {executor.submit(self.collect_candles_for_day, day, symbol): (symbol, day)
+                       for symbol, day in symbol_days}
+            for future in as_completed(futures):
+                symbol, day = futures[future]
+                try:
+                    day_data = future.result()
+                except Exception as e:
+                    self.error_process(f'Error collecting {symbol} candles from polygon for {day:%m-%d-%Y}:')
+                    self.warn_process(traceback.format_exc())
+                    day_data = None
+                yield symbol, day, day_data
+
+    @classmethod
+    def _rest_client(cls) -> ata.REST:
+        """Returns the calling thread's rest client, creating it if necessary."""
+        client = getattr(cls._thread_clients, 'client', None)
+        if client is None:
+            client = cls._thread_clients.client = ata.REST()
+        return client
+
     def _parse_ticks_in_intervals(self, symbol: str, intervals: 'list of pairs of ascending dates') -> List[Candle]:
         """
         :param intervals: e.x. [[start_1, end_1], [start_2, end_2]]; lower limits inclusive; upper limits exclusive
         """
-
-        # Set all timezones to EST
-        for i in range(len(intervals)):
-            intervals[i][0] = timezone('America/New_York').localize(intervals[i][0])
-            intervals[i][1] = timezone('America/New_York').localize(intervals[i][1])
-
-        # Parse 50k-count batches of ticks (individual trades) into second-resolution candles
-        interval_index = 0
-        moment = intervals[interval_index][0].replace(microsecond=0)
-        basket_start_moment = moment
-        ticks_in_basket = []
         candles = []
-        alpaca_client = ata.REST()
-        batches_aggregated = 0
-        ns_offset = int(moment.timestamp()) * 1000000000
-        while True:
-
-            # Fetch next batch of up to 50k trades, starting at moment
+        for interval_start, interval_end in intervals:
+            candles.extend(self._stream_ticks_in_interval(symbol, interval_start, interval_end))
+        return candles
 
-            try:
+    def _stream_ticks_in_interval(self, symbol: str, start: datetime, end: datetime) -> List[Candle]:
+        """
+        Aggregates the trades made between start and end (New York times) into second-resolution candles.
+        Pages of trades are fetched on a separate thread, so each page is aggregated while the next one is fetched.
+        If trades are archived, each page is written to disk as soon as it's aggregated.
+        Raises any error encountered by the fetcher, so a day that couldn't be fetched isn't mistaken for a complete
+        one. If aggregation fails, the fetcher is cancelled before the error is raised.
+        """
+        aggregator = TickAggregator(start.date())
+        pages = queue.Queue(maxsize=self.MAX_PAGES_IN_FLIGHT)
+        fetch_status = {'complete': False, 'error': None}
+        cancelled = threading.Event()
+        fetcher = threading.Thread(target=self._fetch_tick_pages,
+                                   args=(symbol, start, end, self._rest_client(), pages, fetch_status, cancelled),
+                                   daemon=True)
+        fetcher.start()
+
+        # Write each page of raw trades to the archive as it arrives, so pages needn't be kept in memory
+        archive_writer = None
+        try:
+            archive_writer = self._open_archive_writer(symbol, start)
+            while True:
+                page = pages.get()
+                if page is None:
+                    break
+                aggregator.fold(*page)
+                if archive_writer is not None:
+                    try:
+                        archive_writer.append(*page)
+                    except Exception as e:
+                        self.warn_process(f'Couldn\'t archive {symbol} trades on {start:%m-%d-%Y}:')
+                        self.warn_process(traceback.format_exc())
+                        archive_writer.abort()
+                        archive_writer = None
+            fetcher.join()
+
+            # Treat the day as failed if the fetcher crashed
+            if fetch_status['error'] is not None:
+                raise fetch_status['error']
+
+            # Archive the raw trades, unless collection stopped early
+            if archive_writer is not None and fetch_status['complete'] and archive_writer.num_ticks > 0:
+                try:
+                    archive_writer.commit()
+                except Exception as e:
+                    self.warn_process(f'Couldn\'t archive {symbol} trades on {start:%m-%d-%Y}:')
+                    self.warn_process(traceback.format_exc())
+        finally:
+            if archive_writer is not None:
+                archive_writer.abort()
+
+            # Stop the fetcher if aggregation failed, so it doesn't block forever waiting for room in the queue
+            if fetcher.is_alive():
+                cancelled.set()
+                fetcher.join()
+
+        return aggregator.finish()
+
+    def _open_archive_writer(self, symbol: str, start: datetime) -> Optional[TickArchiveWriter]:
+        """Returns a writer for archiving the symbol's trades on the day, or None if trades aren't archived."""
+        if self.tick_archive is None:
+            return None
+        try:
+            return self.tick_archive.open_writer(symbol, start.date())
+        except Exception as e:
+            self.warn_process(f'Couldn\'t archive {symbol} trades on {start:%m-%d-%Y}:')
+            self.warn_process(traceback.format_exc())
+            return None
 
-                # Ensure api cooldown is not too long
-                if self.next_api_call - self.time_env.now() > timedelta(seconds=self.MAX_RATE_LIMIT_WAIT):
-                    self.next_api_call = self.time_env.now() + timedelta(seconds=0.1)
-                while self.time_env.now() < self.next_api_call:
-                    pytime.sleep(0.5)
-
-                # Request batch of candles from polygon-rest
-                batch_response = alpaca_client.polygon.get(path=f'/ticks/stocks/trades/{symbol}/'
-                                                                f'{moment.date().strftime(POLYGON_DATE_FORMAT)}',
-                                                           params={'timestamp': ns_offset,
-                                                                   'limit': 50000},
-                                                           version='v2')
-                ticks_in_basket.extend(batch_response['results'])
-                batches_aggregated += 1
-                ns_offset = ticks_in_basket[-1]['t']
-
-            except Exception as e:
-
-                # On error response, double our wait time before the next query
-                self.rate_limit_wait = self.INITIAL_RATE_LIMIT_WAIT if self.rate_limit_wait == 0 \
-                    else self.rate_limit_wait * 2
-
-                # Re-attempt to fetch after applying the wait time
-                if self.rate_limit_wait <= self.MAX_RATE_LIMIT_WAIT:
-                    self.next_api_call = self.time_env.now() + timedelta(seconds=self.rate_limit_wait)
-                    # Re-attempt to collect this data
-                    continue
-
-            # On too many error responses and empty basket, end task
-            if self.rate_limit_wait > self.MAX_RATE_LIMIT_WAIT and len(ticks_in_basket) == 0:
-                self.warn_process(f'Couldn\'t collect {symbol} candles from polygon starting on {moment:%d-%m-%Y} '
-                      f'at {moment:%H:%M:%S}! Stopping collection early')
-                return candles
-            # On too many error responses and nonempty basket, finish parsing basket and then end task
-            elif self.rate_limit_wait > self.MAX_RATE_LIMIT_WAIT:
-                pass
-            # On out of market-hours batch, finish parsing basket and then end task
-            elif moment > timezone('America/New_York').localize(datetime.combine(moment.date(), CLOSE_TIME)):
-                self.rate_limit_wait = self.MAX_RATE_LIMIT_WAIT
-            # On few or no error responses, keep fetching until basket fills up
-            elif batches_aggregated <= self.MAX_SIMULTANEOUS_BATCHES \
-                    and self.rate_limit_wait <= self.MAX_RATE_LIMIT_WAIT \
-                    and moment <= timezone('America/New_York').localize(
-                datetime.combine(moment.date(), CLOSE_TIME) + timedelta(minutes=45)):
-                continue
-            # On empty basket and termination condition, return what we have
-            elif len(ticks_in_basket) == 0:
-                break
-
-            # Aggregate ticks from the API response into second-resolution Candle objects
-            prices_in_moment = []
-            volume_in_moment = 0
-            candles_before_basket = len(candles)
-            moment = basket_start_moment
-            for tick_data in ticks_in_basket:
-                tick_moment = pd.Timestamp(tick_data['t'], tz='America/New_York', unit='ns').to_pydatetime()
-                if tick_moment < moment:
-                    # Skip over trades made before the truncated second
-                    continue
-                if tick_moment < moment + timedelta(seconds=1):
-                    # Count this trade toward the candle during which it was made
-                    prices_in_moment.append(tick_data['p'])
-                    volume_in_moment += tick_data['s']
-                else:
-                    # At the end of the second (i.e. x.999),
-                    # use the accumulated trades to create a Candle object
-                    if len(prices_in_moment) > 0 and volume_in_moment > 0:
-                        candle = Candle(moment=moment.replace(tzinfo=None),
-                                        open=prices_in_moment[0],
-                                        high=max(prices_in_moment),
-                                        low=min(prices_in_moment),
-                                        close=prices_in_moment[-1],
-                                        volume=volume_in_moment)
-                        # Store the candle
-                        if OPEN_TIME <= candle.moment.time() < CLOSE_TIME:
-                            candles.append(candle)
-                    # Move on to the next truncated second, starting with this trade
-                    prices_in_moment = [tick_data['p']]
-                    volume_in_moment = tick_data['s']
-                    moment = tick_moment.replace(microsecond=0)
-
-            # Move to the next second if fetching this basket ended in errors or an empty basket
-            if self.rate_limit_wait > self.MAX_RATE_LIMIT_WAIT or len(candles) == candles_before_basket:
-                basket_start_plus_1 = basket_start_moment + timedelta(seconds=1)
-                last_parsed_plus_1 = moment + timedelta(seconds=1)
-                moment = basket_start_plus_1 if basket_start_plus_1 > last_parsed_plus_1 else last_parsed_plus_1
-
-            # When moment advances beyond current interval, jump to next interval or end task
-            if ns_offset >= intervals[interval_index][1].timestamp() * 1000000000:
-
-                # Return after collecting candles for the final time interval
-                if interval_index == len(intervals) - 1:
+    def _fetch_tick_pages(self, symbol: str, start: datetime, end: datetime, alpaca_client: ata.REST,
+                          pages: queue.Queue, fetch_status: Dict[str, any], cancelled: threading.Event) -> None:
+        """
+        Fetches 50k-count pages of trades made between start and end, putting each page into the queue as a tuple
+        of (timestamps, prices, sizes) arrays. Puts None into the queue once finished, and sets
+        fetch_status['complete'] to True unless it stopped early due to errors.
+        Any unexpected error (e.g. a malformed page) is stored in fetch_status['error'] for the consumer to raise.
+        Stops as soon as the cancelled event is set.
+        """
+        start_ns = int(timezone('America/New_York').localize(start).timestamp()) * NS_PER_SEC
+        end_ns = int(timezone('America/New_York').localize(end).timestamp()) * NS_PER_SEC
+        ns_offset = start_ns
+        ticks_at_offset = 0
+        fetch_errors = 0
+        try:
+            while ns_offset < end_ns and not cancelled.is_set():
+
+                # Fetch next page of up to 50k trades, starting at ns_offset
+                try:
+
+                    # Wait for the process-wide rate limiter to allow another request
+                    self.rate_limiter.acquire()
+
+                    # Request page of trades from polygon-rest
+                    fetch_start = Metrics.start()
+                    ticks = alpaca_client.polygon.get(path=f'/ticks/stocks/trades/{symbol}/'
+                                                           f'{start.date().strftime(POLYGON_DATE_FORMAT)}',
+                                                      params={'timestamp': ns_offset,
+                                                              'limit': 50000},
+                                                      version='v2')['results']
+                    Metrics.record_since('polygon.fetch_batch', fetch_start)
+                    fetch_errors = 0
+
+                except Exception as e:
+
+                    # On error response (usually the rate limit), make every thread back off before the next query
+                    Metrics.incr('polygon.fetch_errors')
+                    fetch_errors += 1
+                    if fetch_errors <= self.MAX_FETCH_ERRORS:
+                        self.rate_limiter.pause(self.ERROR_PAUSE)
+                        continue
+                    self.warn_process(f'Couldn\'t collect {symbol} candles from polygon starting on '
+                                      f'{start:%d-%m-%Y} at {ns_offset}ns! Stopping collection early')
+                    return
+
+                # Skip trades at the page boundary that were already included in the previous page
+                already_seen = 0
+                while already_seen < min(ticks_at_offset, len(ticks)) and ticks[already_seen]['t'] == ns_offset:
+                    already_seen += 1
+                ticks = ticks[already_seen:]
+
+                # Stop once there are no more trades
+                if len(ticks) == 0:
                     break
 
-                # Move on to the next time interval
-                else:
-                    interval_index += 1
-                    moment = intervals[interval_index][0]
+                # Convert the page into columnar arrays so its dicts can be freed right away
+                timestamps_ns = np.fromiter((tick['t'] for tick in ticks), dtype=np.int64, count=len(ticks))
+                prices = np.fromiter((tick['p'] for tick in ticks), dtype=np.float64, count=len(ticks))
+                sizes = np.fromiter((tick['s'] for tick in ticks), dtype=np.int64, count=len(ticks))
+                if not self._put_page(pages, (timestamps_ns, prices, sizes), cancelled):
+                    return
 
-            # Reset basket data so the next batches can be fetched
-            batches_aggregated = 0
-            self.rate_limit_wait = 0
-            basket_start_moment = moment
-            ns_offset = int(moment.timestamp()) * 1000000000
-            ticks_in_basket = []
+                # Continue from the last trade, stopping if the API made no progress
+                if timestamps_ns[-1] <= ns_offset:
+                    break
+                ns_offset = int(timestamps_ns[-1])
+                ticks_at_offset = int(np.count_nonzero(timestamps_ns == ns_offset))
+            fetch_status['complete'] = True
+        except Exception as e:
+            fetch_status['error'] = e
+        finally:
+            self._put_page(pages, None, cancelled)
 
-        return candles
+    def _put_page(self, pages: queue.Queue, page: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                  cancelled: threading.Event) -> bool:
+        """
+        Waits for room in the queue to put the page into it, unless the consumer cancels the fetch.
+        :return: False if the fetch was cancelled
+        """
+        while not cancelled.is_set():
+            try:
+                pages.put(page, timeout=self.PAGE_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
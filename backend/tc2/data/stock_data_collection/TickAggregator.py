@@ -0,0 +1,121 @@
+from datetime import date, datetime, timedelta, time
+from typing import Optional, List
+
+import numpy as np
+from pytz import timezone
+
+from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.util.market_util import OPEN_TIME, CLOSE_TIME
+
+NS_PER_SEC = 1000000000
+
+
+def _secs_since_midnight(moment_time: time) -> int:
+    return moment_time.hour * 3600 + moment_time.minute * 60 + moment_time.second
+
+
+class TickAggregator:
+    """
+    Folds pages of trades into second-resolution (or longer) candles as soon as each page arrives.
+
+    Each page is aggregated with vectorized operations. Only the page's last second is held back (and merged into
+    the next page's first second), since its trades may continue on the next page. Memory use therefore depends on
+    the number of candles produced, not on the number of trades.
+    """
+
+    day: date
+    bar_secs: int
+    candles: List[Candle]
+
+    # Midnight on the day, and its epoch second in New York time
+    _midnight: datetime
+    _midnight_epoch_sec: int
+
+    # Market open and close times, in seconds since midnight
+    _open_sec: int
+    _close_sec: int
+
+    # The (second, open, high, low, close, volume) of the latest second, which may still receive trades
+    _carry: Optional[tuple]
+
+    def __init__(self, day: date, bar_secs: int = 1) -> None:
+        """
+        :param bar_secs: the duration of each candle; candles start at multiples of this many seconds after midnight
+        """
+        self.day = day
+        self.bar_secs = bar_secs
+        self.candles = []
+        self._carry = None
+
+        # Convert epoch seconds into New York wall-clock seconds using the offset at market open
+        utc_offset = timezone('America/New_York').localize(datetime.combine(day, OPEN_TIME)).utcoffset()
+        self._midnight = datetime.combine(day, time())
+        self._midnight_epoch_sec = int((self._midnight - datetime(1970, 1, 1) - utc_offset).total_seconds())
+        self._open_sec = _secs_since_midnight(OPEN_TIME)
+        self._close_sec = _secs_since_midnight(CLOSE_TIME)
+
+    def fold(self, timestamps_ns: np.ndarray, prices: np.ndarray, sizes: np.ndarray) -> None:
+        """
+        Aggregates a page of trades into candles.
+        :param timestamps_ns: each trade's epoch timestamp, in nanoseconds
+        :param prices: each trade's price
+        :param sizes: each trade's number of shares
+        """
+        if len(timestamps_ns) == 0:
+            return
+        secs = timestamps_ns // NS_PER_SEC
+        if self.bar_secs != 1:
+            secs = (secs - self._midnight_epoch_sec) // self.bar_secs * self.bar_secs + self._midnight_epoch_sec
+
+        # Put trades in chronological order, keeping the API's order for trades in the same second
+        if np.any(secs[1:] < secs[:-1]):
+            order = np.argsort(secs, kind='stable')
+            secs, prices, sizes = secs[order], prices[order], sizes[order]
+
+        # Aggregate each second's (or bar's) trades
+        starts = np.flatnonzero(np.concatenate(([True], secs[1:] != secs[:-1])))
+        ends = np.concatenate((starts[1:], [len(secs)])) - 1
+        sec_opens = prices[starts]
+        sec_highs = np.maximum.reduceat(prices, starts)
+        sec_lows = np.minimum.reduceat(prices, starts)
+        sec_closes = prices[ends]
+        sec_volumes = np.add.reduceat(sizes, starts)
+        sec_starts = secs[starts]
+
+        # Merge the previous page's last second into this page's first second, or emit it if it's complete
+        if self._carry is not None:
+            carry_sec, carry_open, carry_high, carry_low, _, carry_volume = self._carry
+            if carry_sec == sec_starts[0]:
+                sec_opens[0] = carry_open
+                sec_highs[0] = max(sec_highs[0], carry_high)
+                sec_lows[0] = min(sec_lows[0], carry_low)
+                sec_volumes[0] += carry_volume
+            else:
+                self._emit(*[np.array([val]) for val in self._carry])
+
+        # Emit every complete second, holding back the last one until the next page arrives
+        self._emit(sec_starts[:-1], sec_opens[:-1], sec_highs[:-1], sec_lows[:-1], sec_closes[:-1],
+                   sec_volumes[:-1])
+        self._carry = (sec_starts[-1], sec_opens[-1], sec_highs[-1], sec_lows[-1], sec_closes[-1], sec_volumes[-1])
+
+    def finish(self) -> List[Candle]:
+        """Emits the last second's candle and returns all candles aggregated during market hours."""
+        if self._carry is not None:
+            self._emit(*[np.array([val]) for val in self._carry])
+            self._carry = None
+        return self.candles
+
+    def _emit(self, epoch_secs: np.ndarray, opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+              closes: np.ndarray, volumes: np.ndarray) -> None:
+        """Converts aggregated seconds having volume during market hours into Candle objects."""
+        secs_of_day = epoch_secs - self._midnight_epoch_sec
+        keep = (volumes > 0) & (secs_of_day >= self._open_sec) & (secs_of_day < self._close_sec)
+        for sec_of_day, candle_open, candle_high, candle_low, candle_close, volume in zip(
+                secs_of_day[keep].tolist(), opens[keep].tolist(), highs[keep].tolist(), lows[keep].tolist(),
+                closes[keep].tolist(), volumes[keep].tolist()):
+            self.candles.append(Candle(moment=self._midnight + timedelta(seconds=sec_of_day),
+                                       open=candle_open,
+                                       high=candle_high,
+                                       low=candle_low,
+                                       close=candle_close,
+                                       volume=int(volume)))
@@ -14,3 +14,4 @@ class EnvType(Enum):
     HEALTH_CHECKING = 'HEALTH_CHECKING'
     VISUAL_GENERATION = 'VISUAL_GENERATION'
     OPTIMIZATION = 'OPTIMIZATION'
+    BENCHMARK = 'BENCHMARK'
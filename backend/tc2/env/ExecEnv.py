@@ -2,16 +2,20 @@ import multiprocessing
 import os
 import traceback
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple
 
 from tc2.data.data_storage.mongo.MongoManager import MongoManager
 from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.data.data_storage.storage_backends import uses_memory_storage, create_mongo_manager, create_redis_manager
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
 from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
 from tc2.data.stock_data_collection.AbstractDataCollector import AbstractDataCollector
 from tc2.env.EnvType import EnvType
 from tc2.env.TimeEnv import TimeEnv
 from tc2.log.LogFeed import LogFeed
 from tc2.log.Loggable import Loggable
+from tc2.util.candle_util import aggregate_bars
 from tc2.util.market_util import CLOSE_TIME
 
 
@@ -49,6 +53,9 @@ class ExecEnv(Loggable):
     # List shared across threads to ensure each EnvType is created from scratch only once.
     instantiated_env_types: 'multiprocessing list' = None
 
+    # The config file's settings and modification time, parsed once per process and reparsed if the file changes.
+    _config_cache: Optional[Tuple[float, Dict[str, str]]] = None
+
     """
     Time accessor...
     """
@@ -125,18 +132,7 @@ class ExecEnv(Loggable):
        """
 
         # Calculate the furthest back we should go in time
-        start_moment: datetime = self.time().now().replace(microsecond=0)
-        mins_accounted_for = 0
-        while mins_accounted_for < minutes:
-            # Go back minute-by-minute
-            start_moment = start_moment - timedelta(minutes=1)
-
-            # When market close is reached, go back to the previous market day
-            if not self.time().is_open(start_moment):
-                start_moment = datetime.combine(self.time().get_prev_mkt_day(start_moment.date()),
-                                                CLOSE_TIME.replace(second=start_moment.second)) - timedelta(minutes=1)
-
-            mins_accounted_for += 1
+        start_moment = self._get_latest_start_moment(minutes)
 
         # Fetch candles by working backward from now
         candles = []
@@ -163,6 +159,58 @@ class ExecEnv(Loggable):
         candles.sort(key=lambda candle_to_sort: candle_to_sort.moment)
         return candles
 
+    def get_latest_bars(self, symbol: str, minutes: float) -> List[MinuteCandle]:
+        """
+        Like get_latest_candles(), but returns minute bars, so hours of data cost hundreds of rows instead of
+        hundreds of thousands of candles. Previous days' bars are read pre-aggregated from MongoDB, and today's are
+        aggregated from today's candles so that no bar contains data from after the current moment.
+        NOTE: the earliest bar may include up to a minute of data from before the interval's start
+
+        :param minutes: minutes of open market data to fetch, NOT total minutes including closing hours
+        """
+
+        # Calculate the furthest back we should go in time
+        start_moment = self._get_latest_start_moment(minutes)
+        start_minute = start_moment.replace(second=0)
+
+        # Fetch bars from each market day in the interval
+        bars = []
+        day_date = start_moment.date()
+        while day_date <= self.time().now().date():
+            if day_date == self.time().now().date():
+                # Aggregate today's candles that fall within the desired time interval
+                if self.env_type is EnvType.LIVE:
+                    todays_candles = self.redis().get_cached_candles(symbol, day_date)
+                else:
+                    todays_candles = self.mongo().load_symbol_day(symbol, day_date).candles
+                todays_candles = [candle for candle in todays_candles
+                                  if start_moment - timedelta(milliseconds=1) <= candle.moment <= self.time().now()]
+                todays_candles.sort(key=lambda candle_to_sort: candle_to_sort.moment)
+                bars.extend(aggregate_bars(todays_candles, BarResolution.MINUTE.length_secs()))
+            elif self.time().is_mkt_day(day_date):
+                # Fetch previous days' bars from MongoDB
+                bars.extend(bar for bar in self.mongo().load_bars(symbol, day_date, BarResolution.MINUTE)
+                            if bar.minute >= start_minute)
+            day_date += timedelta(days=1)
+
+        return bars
+
+    def _get_latest_start_moment(self, minutes: float) -> datetime:
+        """Returns the moment that is the given number of open market minutes before now."""
+        start_moment: datetime = self.time().now().replace(microsecond=0)
+        mins_accounted_for = 0
+        while mins_accounted_for < minutes:
+            # Go back minute-by-minute
+            start_moment = start_moment - timedelta(minutes=1)
+
+            # When market close is reached, go back to the previous market day
+            if not self.time().is_open(start_moment):
+                start_moment = datetime.combine(self.time().get_prev_mkt_day(start_moment.date()),
+                                                CLOSE_TIME.replace(second=start_moment.second)) - timedelta(minutes=1)
+
+            mins_accounted_for += 1
+        return start_moment
+
     """
     Init methods...
     """
@@ -182,12 +230,12 @@ class ExecEnv(Loggable):
         Initializes database connections and marks data as not loaded.
         """
 
-        # Ensure this is called only once per EnvType
+        # Ensure this is called only once per EnvType, unless its databases are private to each ExecEnv
         if ExecEnv.instantiated_env_types is None:
             ExecEnv.instantiated_env_types = multiprocessing.Manager().list()
-        if env_type.name in ExecEnv.instantiated_env_types:
-            raise Exception(f'Tried to setup {env_type.name} ExecEnv twice')
-        else:
+        if not uses_memory_storage(env_type):
+            if env_type.name in ExecEnv.instantiated_env_types:
+                raise Exception(f'Tried to setup {env_type.name} ExecEnv twice')
             ExecEnv.instantiated_env_types.append(env_type.name)
 
         # Init the environment's variables
@@ -245,29 +293,53 @@ class ExecEnv(Loggable):
     def fork_new_thread(self, creator_env: Optional['ExecEnv'] = None) -> None:
         """
         Copies over creator_env's settings and creates new database accessors for this thread.
+        Accessors share the process's pooled database clients, so forking within a process opens no new
+        connections and shares (rather than reloads) the creator's settings.
+
+        Environments whose databases are kept in memory (see uses_memory_storage()) share their databases with
+        threads of the same process, but can't be forked into another process, which couldn't see their data.
         """
         if creator_env is None and self._creator_env is None:
             raise ValueError('Can\'t clone an execution environment on the same thread without a creator env')
         elif creator_env is None:
             creator_env = self._creator_env
 
+        # Ensure in-memory databases aren't silently replaced by empty ones in another process
+        if uses_memory_storage(creator_env.env_type) and os.getpid() != creator_env._pid:
+            raise EnvironmentError(f'Tried to fork thread #{creator_env._pid}\'s {creator_env.env_type.value} '
+                                   f'ExecEnv in thread #{os.getpid()}, but its databases are kept in memory. '
+                                   f'Create a new environment in this thread instead.')
+
         self.env_type = creator_env.env_type
         self._time = creator_env._time
         self._data_collector = creator_env._data_collector
         self._data_loaded = creator_env._data_loaded
+
+        # In-memory databases are shared with threads of the same process
+        if uses_memory_storage(self.env_type):
+            self._mongo = creator_env._mongo
+            self._redis = creator_env._redis
+            self._settings = creator_env._settings
+            self._pid = os.getpid()
+            return
+        same_process = os.getpid() == creator_env._pid
         self._pid = os.getpid()
 
         # Create new database accessors for the new thread
-        self._mongo = MongoManager(logfeed_program=self.logfeed_program,
-                                   env_type=self.env_type)
-        self._redis = RedisManager(logfeed_process=self.logfeed_process,
-                                   env_type=self.env_type)
+        self._mongo = create_mongo_manager(logfeed_program=self.logfeed_program,
+                                           env_type=self.env_type)
+        self._redis = create_redis_manager(logfeed_process=self.logfeed_process,
+                                           env_type=self.env_type)
 
-        # Load settings and use them to init db connections
+        # Load settings (unless the creator already loaded them in this process) and use them to init db connections
         try:
-            self._load_settings_from_config()
-            self._init_db_connections()
-            self._load_settings_from_redis()
+            if same_process:
+                self._settings = creator_env._settings
+                self._init_db_connections()
+            else:
+                self._load_settings_from_config()
+                self._init_db_connections()
+                self._load_settings_from_redis()
         except Exception as e:
             self.error_main('ExecEnv could not load settings and connect to databases:')
             self.warn_main(traceback.format_exc())
@@ -280,21 +352,26 @@ class ExecEnv(Loggable):
         """
         Parses the config file and loads its settings into memory.
         These should only include static settings (database credentials).
+        The file is only reparsed if it has been modified since it was last parsed in this process.
         """
         try:
-            file = open("config.properties")
-            lines = file.readlines()
-            self._settings = {}
-            for line in lines:
-                if line.startswith("#") or len(line.strip()) == 0:
-                    continue
-                comps = line.split("=")
-                if len(comps) < 2:
-                    print("INVALID CONFIG LINE: '" + line + "'")
-                    continue
-                key = line.split("=")[0].strip().lower()
-                val = ''.join(line.split("=")[1:]).strip()
-                self._settings[key] = val
+            modified_time = os.path.getmtime("config.properties")
+            if ExecEnv._config_cache is None or ExecEnv._config_cache[0] != modified_time:
+                file = open("config.properties")
+                lines = file.readlines()
+                config_settings = {}
+                for line in lines:
+                    if line.startswith("#") or len(line.strip()) == 0:
+                        continue
+                    comps = line.split("=")
+                    if len(comps) < 2:
+                        print("INVALID CONFIG LINE: '" + line + "'")
+                        continue
+                    key = line.split("=")[0].strip().lower()
+                    val = ''.join(line.split("=")[1:]).strip()
+                    config_settings[key] = val
+                ExecEnv._config_cache = (modified_time, config_settings)
+            self._settings = dict(ExecEnv._config_cache[1])
         except Exception as e:
             self.error_process('Error loading settings from config file:')
             self.warn_process(traceback.format_exc())
@@ -325,7 +402,8 @@ class ExecEnv(Loggable):
                 setting_str = self.redis().get_setting(setting_key)
                 if setting_str is not None:
                     self._settings[setting_key] = setting_str
-                self.redis().set_setting(setting_key, self._settings[setting_key])
+                else:
+                    self.redis().set_setting(setting_key, self._settings[setting_key])
 
         except Exception as e:
             self.error_process('Error loading settings from Redis:')
@@ -27,6 +27,13 @@ class Settings:
         """
         return [symbol.upper().strip() for symbol in env.get_setting('symbols').split(',')]
 
+    @classmethod
+    def get_profile_simulations(cls, env: ExecEnv) -> bool:
+        """
+        Returns whether StrategyOptimizer should log how long each phase of its simulations takes. Off by default.
+        """
+        return env.get_setting('optimizer.profile_simulations').lower() == 'true'
+
     @classmethod
     def get_strategy_max_purchase_pct(cls, env: ExecEnv, strategy_id: str) -> float:
         """
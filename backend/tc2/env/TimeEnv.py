@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, date
+from typing import List
 
 from tc2.util.market_util import OPEN_TIME, CLOSE_TIME, calculate_holidays
 
@@ -53,6 +54,20 @@ class TimeEnv:
             prev_day -= timedelta(days=1)
         return prev_day
 
+    def get_prev_mkt_days(self, num_days: int, day: date = None) -> List[date]:
+        """
+        :param day: leave blank to use environment's current date
+        :return: the num_days closest dates, before the given date, on which U.S. markets are open, oldest first
+        """
+        if not day:
+            day = self.now().date()
+        days = []
+        prev_day = day
+        for _ in range(num_days):
+            prev_day = self.get_prev_mkt_day(prev_day)
+            days.append(prev_day)
+        return days[::-1]
+
     def get_next_mkt_day(self, day: date = None) -> date:
         """
         :param day: leave blank to use environment's current date
@@ -6,6 +6,7 @@ class HealthCheckType(Enum):
     MODEL_FEEDING = 'MODEL_FEEDING'
     DATA = 'DATA'
     DIP45 = 'DIP45'
+    LATENCY = 'LATENCY'
     MONGO = 'MONGO'
     POLYGON = 'POLYGON'
     SIM_OUTPUT = 'SIM_OUTPUT'
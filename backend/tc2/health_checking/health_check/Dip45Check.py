@@ -47,7 +47,7 @@ class Dip45Check(AbstractHealthCheck):
 
             # Find price at minute 60
             start_candle: Candle = day_data.get_candle_at_sec(
-                datetime.combine(day_data.day_date, time(hour=10, minute=30)))
+                datetime.combine(day_data.day_date, time(hour=10, minute=30)), max_lag_secs=60)
             if start_candle is None:
                 self.debug("couldn't calculate dip_45 on {0}. Bad data at minute 60".format(day_date))
                 continue
@@ -0,0 +1,59 @@
+from tc2.health_checking.HealthCheckResult import HealthCheckResult
+from tc2.health_checking.health_check.AbstractHealthCheck import AbstractHealthCheck
+from tc2.metrics.Metrics import Metrics
+
+
+class LatencyCheck(AbstractHealthCheck):
+    """
+    Not meant to be accessed except by HealthChecker.
+    Reports where live trading latency goes, using the metrics recorded by every process.
+
+    Conditions for success:
+    + Each stage of the trading loop has a 95th percentile latency below its limit
+    + No orders failed to be placed within the last ORDER_ERROR_WINDOW_SECS
+    """
+
+    # The time (in secs) for which a failed order causes the health check to fail
+    ORDER_ERROR_WINDOW_SECS = 30 * 60
+
+    # Maximum desired 95th percentile latency of each trading loop stage, in milliseconds
+    MAX_P95_MS = {
+        'stream.queue_update': 50,
+        'account.get_next_update': 100,
+        'account.candle_age': 1500,
+        'strategy.on_new_info': 250,
+        'alpaca.submit_order': 1000
+    }
+
+    def run(self) -> HealthCheckResult:
+        metrics = Metrics.collect(self.redis())
+        histograms = metrics['histograms']
+        counters = metrics['counters']
+        self.debug(f'Merged metrics from processes: {", ".join(metrics["processes"])}')
+
+        if len(histograms) == 0:
+            self.debug('No latency metrics have been recorded yet')
+            self.set_passing(False)
+            return self.make_result()
+
+        # Output every histogram and counter
+        for name, summary in histograms.items():
+            self.debug(f'{name}: {summary["count"]} calls, p50 {summary["p50_ms"]:.1f}ms, '
+                       f'p95 {summary["p95_ms"]:.1f}ms, max {summary["max_ms"]:.1f}ms')
+        for name, count in counters.items():
+            self.debug(f'{name}: {count}')
+
+        # Pass the health check if the trading loop is fast enough
+        self.set_passing(True)
+        for name, max_p95_ms in self.MAX_P95_MS.items():
+            if name in histograms and histograms[name]['p95_ms'] > max_p95_ms:
+                self.debug(f'{name} is too slow (p95 exceeds {max_p95_ms}ms)')
+                self.set_passing(False)
+        recent_order_errors = Metrics.count_recent_events('alpaca.order_errors', self.redis(),
+                                                          self.ORDER_ERROR_WINDOW_SECS)
+        if recent_order_errors > 0:
+            self.debug(f'{recent_order_errors} orders failed to be placed in the last '
+                       f'{self.ORDER_ERROR_WINDOW_SECS // 60} minutes')
+            self.set_passing(False)
+
+        return self.make_result()
@@ -3,6 +3,7 @@ from datetime import timedelta, datetime
 
 from tc2.health_checking.HealthCheckResult import HealthCheckResult
 from tc2.health_checking.health_check.AbstractHealthCheck import AbstractHealthCheck
+from tc2.strategy.execution.simulated.SimProfile import SimProfile
 from tc2.strategy.execution.simulated.StrategySimulator import StrategySimulator
 from tc2.strategy.strategies.cycle.CycleStrategy import CycleStrategy
 from tc2.util.data_constants import MIN_CANDLES_PER_DAY
@@ -14,9 +15,9 @@ class SimTimingsCheck(AbstractHealthCheck):
     """
     Not meant to be accessed except by HealthChecker.
     Checks for any bottleneck points during the simulation process.
+    Each simulation is profiled, and the average time spent in each of its phases is reported.
 
     Conditions for success:
-    +
     + Simulating a single day takes less than 5 seconds on average.
     """
 
@@ -41,6 +42,7 @@ class SimTimingsCheck(AbstractHealthCheck):
             return self.make_result()
 
         sim_durations = []
+        sim_profile = SimProfile()
         for i in range(self.SAMPLE_SIZE):
             # Load historical data to perform a simulation on
             day_date = dates[-i]
@@ -61,23 +63,29 @@ class SimTimingsCheck(AbstractHealthCheck):
             self.sim_env.time().set_moment(datetime.combine(day_date, OPEN_TIME))
             strategy = CycleStrategy(env=self.sim_env,
                                      symbols=[self.TEST_SYMBOL])
-            simulator = StrategySimulator(strategy, self)
+            simulator = StrategySimulator(strategy, self, profile=True)
 
             # Compile data and perform a single simulation with it
             data = list(prev_day_data.candles)
             data.extend(day_data.candles)
             start_instant = pytime.monotonic()
-            simulator.run()  # TODO Also record the time of each moment (using optional keyword argument in run())
+            simulator.run()
             sim_duration = pytime.monotonic() - start_instant
             sim_durations.append(sim_duration)
+            sim_profile.merge(simulator.profile)
             self.debug('{0} simulation took {1}s'.format(day_date.strftime(DATE_FORMAT), '%.2f' % sim_duration))
 
         # Calculate average time of each step in the simulation logic
         avg_total_time = sum(sim_durations) / max(1, len(sim_durations))
+        self.debug('average time of each simulation phase:')
+        for line in sim_profile.format_lines():
+            self.debug('  ' + line)
 
         # Pass the health check if its conditions are met
         self.set_passing(True)
         if avg_total_time > self.MAX_SIMULATION_TIME:
+            self.debug(f'FAILURE: simulations took {avg_total_time:.2f}s on average; most time was spent on '
+                       f'{sim_profile.slowest_phase()}')
             self.set_passing(False)
 
         return self.make_result()
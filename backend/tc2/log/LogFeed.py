@@ -4,9 +4,10 @@ import time as pytime
 from datetime import date, datetime
 from enum import Enum
 from multiprocessing import Queue
-from threading import Lock, Thread
-from typing import TextIO
+from threading import Lock, Thread, Event
+from typing import TextIO, Optional
 
+from tc2.log.LogStore import LogStore
 from tc2.util.date_util import DATE_FORMAT
 
 MAX_LINES_PER_FILE = 1000
@@ -15,6 +16,9 @@ MAX_LINES_PER_SECOND = 200
 
 LOGFILE_TIME_FORMAT = '%-I:%M%p.%S%f'
 
+# Whether or not to also write log messages to each logfeed's structured (queryable) LogStore
+STRUCTURED_LOGS_ENABLED = True
+
 
 class LogCategory(Enum):
     # LogFeed for messages pertaining to program startup/shutdown tasks
@@ -53,41 +57,75 @@ class LogFeed:
     logDir: str
     lock: Lock
     queue: Queue
+    store: Optional[LogStore]
+    _manager: 'multiprocessing manager'
     _last_date: 'multiprocessing list'
+    _closed: Event
+    _writer_thread: Thread
 
-    def __init__(self, system: LogCategory) -> None:
+    def __init__(self, system: LogCategory, structured: bool = STRUCTURED_LOGS_ENABLED) -> None:
+        """
+        :param structured: whether to also write messages to a LogStore so they can be queried by level, time, and text
+        """
         self.process = system
         self.logDir = f'logs/{system.value}'
         self.lock = Lock()
         self.queue = Queue(maxsize=MAX_LINES_PER_SECOND)
-        self._last_date = multiprocessing.Manager().list()
+        self.store = LogStore(system.value) if structured else None
+        self._manager = multiprocessing.Manager()
+        self._last_date = self._manager.list()
         self._last_date.append(datetime.now().strftime(DATE_FORMAT))
+        self._closed = Event()
 
         # Create a folder for the logfiles
-        if not os.path.exists(self.logDir):
-            os.mkdir(self.logDir)
+        os.makedirs(self.logDir, exist_ok=True)
 
-        # Start a task to print queued log messages every second
+        # Start a task to print queued log messages every second, until the logfeed is closed
         def print_from_queue():
-            while True:
-                pytime.sleep(1)
-                if self.queue.empty():
-                    continue
-                with self.lock:
-                    logfile = self.get_latest_logfile()
-                    logfile.seek(0, os.SEEK_END)
-                    while not self.queue.empty():
-                        msg = self.queue.get()
-                        # Add the log event to the latest logfile
-                        logfile.write(msg + "\n")
-                    logfile.close()
-
-        thread = Thread(target=print_from_queue)
-        thread.start()
+            while not self._closed.wait(1):
+                self._write_queued()
+            self._write_queued()
+
+        self._writer_thread = Thread(target=print_from_queue)
+        self._writer_thread.start()
+
+    def close(self) -> None:
+        """
+        Writes any queued messages, then stops the logfeed's writer thread and shared-state manager process so
+        the program can exit normally. Nothing should be logged to the logfeed afterwards.
+        """
+        self._closed.set()
+        self._writer_thread.join()
+        self._manager.shutdown()
+
+    def _write_queued(self) -> None:
+        """Writes queued log messages to the latest logfile and the structured store."""
+        if self.queue.empty():
+            return
+        records = []
+        with self.lock:
+            logfile = self.get_latest_logfile()
+            logfile.seek(0, os.SEEK_END)
+            while not self.queue.empty():
+                moment, level, msg, raw_msg = self.queue.get()
+                # Add the log event to the latest logfile
+                logfile.write(msg + "\n")
+                if level is not None:
+                    records.append((moment, level, raw_msg))
+            logfile.close()
+
+        # Add the log events to the structured store
+        if self.store is not None:
+            try:
+                self.store.append_records(records)
+            except Exception:
+                print(f'{self.process.value} logfeed could not write to its structured log store')
 
     def log(self, level: LogLevel, msg: str):
         # Prepend a prefix showing the log's event level its time
+        moment = pytime.time()
         prefix = '[' + level.value + ' ' + datetime.now().strftime(LOGFILE_TIME_FORMAT)[0:-4] + ']'
+        raw_msg = msg
         msg = prefix + " " + msg
 
         # Log each new date
@@ -96,7 +134,7 @@ class LogFeed:
             new_date_msg = '      ' + datetime.now().strftime('%A, %b %d')
             print(new_date_msg, flush=True)
             try:
-                self.queue.put_nowait(new_date_msg)
+                self.queue.put_nowait((moment, None, new_date_msg, new_date_msg))
             except Exception as e:
                 pass
 
@@ -105,7 +143,7 @@ class LogFeed:
             print(msg, flush=True)
 
         try:
-            self.queue.put(msg, timeout=2)
+            self.queue.put((moment, level.value, msg, raw_msg), timeout=2)
         except Exception as e:
             print(f'{prefix} {self.process.value} logfeed queue overwhelmed')
 
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Dict
+
+from tc2.util.date_util import DATE_TIME_FORMAT
+
+
+class LogRecord:
+    """
+    Represents a single structured log message.
+    Contains the message's moment, level, logfeed name, and text.
+    """
+    moment: datetime
+    level: str
+    feed: str
+    message: str
+
+    def __init__(self, moment: datetime, level: str, feed: str, message: str) -> None:
+        self.moment = moment
+        self.level = level
+        self.feed = feed
+        self.message = message
+
+    def to_json(self) -> Dict[str, any]:
+        """Converts the LogRecord to a json dictionary that can be read by the webpanel."""
+        return {
+            'moment': self.moment.strftime(DATE_TIME_FORMAT),
+            'level': self.level,
+            'feed': self.feed,
+            'message': self.message
+        }
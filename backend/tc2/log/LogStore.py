@@ -0,0 +1,115 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from tc2.log.LogRecord import LogRecord
+
+# The folder in which each logfeed's structured records are stored
+LOG_STORE_DIR = 'logs/records'
+
+# The maximum number of records to return from a single query
+MAX_QUERY_RESULTS = 5000
+
+
+class LogStore:
+    """
+    An append-only SQLite store of structured log records for a single logfeed.
+    Records are indexed by level and time so they can be filtered without scanning the text logfiles.
+
+    Only the logfeed's writer thread should call append_records(). Queries open their own connection,
+    so they can be made from any thread (e.g. API worker threads) while records are being written.
+    """
+
+    feed: str
+    db_path: str
+    _write_conn: Optional[sqlite3.Connection]
+
+    def __init__(self, feed: str) -> None:
+        self.feed = feed
+        self.db_path = f'{LOG_STORE_DIR}/{feed}.db'
+        self._write_conn = None
+
+    def append_records(self, records: List[Tuple[float, str, str]]) -> None:
+        """
+        Appends a batch of records to the store in a single transaction.
+        :param records: tuples of (epoch timestamp, level name, message)
+        """
+        if len(records) == 0:
+            return
+        if self._write_conn is None:
+            self._write_conn = self._connect()
+        with self._write_conn:
+            self._write_conn.executemany('INSERT INTO records (moment, level, message) VALUES (?, ?, ?)', records)
+
+    def query(self,
+              levels: Optional[List[str]] = None,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              contains: Optional[str] = None,
+              limit: int = 1000) -> List[LogRecord]:
+        """
+        Returns the latest records matching every given filter, sorted ascending by time.
+
+        :param levels: only include records having one of these level names (e.g. ['ERROR', 'WARNING'])
+        :param start: only include records logged at or after this moment
+        :param end: only include records logged at or before this moment
+        :param contains: only include records whose message contains this (case-insensitive) substring
+        :param limit: the maximum number of records to return
+        """
+        if not os.path.exists(self.db_path):
+            return []
+
+        # Build the query's filters
+        clauses, params = [], []
+        if levels is not None and len(levels) > 0:
+            clauses.append(f'level IN ({", ".join("?" for _ in levels)})')
+            params.extend([level.upper() for level in levels])
+        if start is not None:
+            clauses.append('moment >= ?')
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append('moment <= ?')
+            params.append(end.timestamp())
+        if contains is not None and len(contains) > 0:
+            escaped = contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append('message LIKE ? ESCAPE \'\\\'')
+            params.append(f'%{escaped}%')
+        where = f'WHERE {" AND ".join(clauses)}' if len(clauses) > 0 else ''
+        params.append(max(1, min(limit, MAX_QUERY_RESULTS)))
+
+        # Fetch the latest matching records
+        conn = self._connect()
+        try:
+            rows = conn.execute(f'SELECT moment, level, message FROM records {where} '
+                                f'ORDER BY moment DESC, id DESC LIMIT ?', params).fetchall()
+        finally:
+            conn.close()
+
+        return [LogRecord(moment=datetime.fromtimestamp(moment), level=level, feed=self.feed, message=message)
+                for moment, level, message in reversed(rows)]
+
+    def clear(self) -> None:
+        """Deletes all records from the store."""
+        if not os.path.exists(self.db_path):
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM records')
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection to the store, creating its file, table, and indexes if necessary."""
+        os.makedirs(LOG_STORE_DIR, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS records ('
+                     'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                     'moment REAL NOT NULL, '
+                     'level TEXT NOT NULL, '
+                     'message TEXT NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS records_moment ON records (moment)')
+        conn.execute('CREATE INDEX IF NOT EXISTS records_level_moment ON records (level, moment)')
+        return conn
@@ -0,0 +1,84 @@
+from bisect import bisect_left
+from typing import Dict, List
+
+# Upper bound (in milliseconds) of each histogram bucket; the last bucket catches everything slower
+BUCKET_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket histogram of durations, in milliseconds.
+    Recording a duration is O(log buckets) and uses constant memory, so it is cheap enough for hot paths.
+    """
+
+    count: int
+    total_ms: float
+    max_ms: float
+    buckets: List[int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKET_BOUNDS_MS)
+
+    def record(self, duration_ms: float) -> None:
+        """Adds one duration to the histogram."""
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """Adds the other histogram's durations to this one."""
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+
+    def mean(self) -> float:
+        return 0.0 if self.count == 0 else self.total_ms / self.count
+
+    def percentile(self, pct: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the given percentile (0-100), capped at the max duration.
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, round(self.count * pct / 100.0))
+        seen = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_json(self) -> Dict[str, any]:
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'max_ms': self.max_ms,
+            'buckets': self.buckets
+        }
+
+    def to_summary_json(self) -> Dict[str, any]:
+        """Converts the histogram into a short summary that can be read by the webpanel."""
+        return {
+            'count': self.count,
+            'mean_ms': round(self.mean(), 3),
+            'p50_ms': round(self.percentile(50), 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+    @classmethod
+    def from_json(cls, histogram_json: Dict[str, any]) -> 'LatencyHistogram':
+        histogram = LatencyHistogram()
+        histogram.count = histogram_json['count']
+        histogram.total_ms = histogram_json['total_ms']
+        histogram.max_ms = histogram_json['max_ms']
+        if len(histogram_json['buckets']) == len(BUCKET_BOUNDS_MS):
+            histogram.buckets = list(histogram_json['buckets'])
+        return histogram
@@ -0,0 +1,215 @@
+import functools
+import json
+import os
+import threading
+import time as pytime
+import traceback
+from typing import Dict, Optional
+
+from tc2.env.EnvType import EnvType
+from tc2.metrics.LatencyHistogram import LatencyHistogram
+
+# Set to False to turn every metrics call into a no-op
+METRICS_ENABLED = True
+
+# The minimum time (in secs) between saving two snapshots of a process's metrics to redis
+FLUSH_INTERVAL = 10
+
+# Snapshots not updated within this many secs are assumed to belong to dead processes, and are deleted
+STALE_SNAPSHOT_SECS = 6 * 60 * 60
+
+# The number of secs for which each timestamped event (e.g. a failed order) is kept in redis
+EVENT_RETENTION_SECS = 60 * 60
+
+# Environment types whose calls to @timed functions aren't recorded
+UNTIMED_ENV_TYPES = [EnvType.SIMULATION, EnvType.OPTIMIZATION]
+
+
+class Metrics:
+    """
+    A process-wide registry of latency histograms and counters.
+
+    Each process records into its own registry and periodically saves a snapshot of it to redis using
+    flush_if_due(). The webpanel and health checks then merge every process's snapshot using collect().
+    """
+
+    enabled: bool = METRICS_ENABLED
+
+    # The name under which this process's snapshot is saved
+    process_label: str = 'PROGRAM'
+
+    _lock = threading.Lock()
+    _histograms: Dict[str, LatencyHistogram] = {}
+    _counters: Dict[str, int] = {}
+    _last_flush: float = 0.0
+
+    @classmethod
+    def set_process_label(cls,
+                          label: str) -> None:
+        """
+        Names the current process's metrics and clears any metrics inherited from its parent process.
+        Should be called once at the start of every process that records metrics.
+        """
+        with cls._lock:
+            cls.process_label = label
+            cls._histograms = {}
+            cls._counters = {}
+            cls._last_flush = 0.0
+
+    @classmethod
+    def start(cls) -> float:
+        """Returns a start time to later pass into record_since(), or 0 if metrics are disabled."""
+        return pytime.monotonic() if cls.enabled else 0.0
+
+    @classmethod
+    def record_since(cls,
+                     name: str,
+                     start: float) -> None:
+        """Records the time elapsed since start (obtained from start()) into the named histogram."""
+        if not cls.enabled or start == 0.0:
+            return
+        cls.record(name, (pytime.monotonic() - start) * 1000.0)
+
+    @classmethod
+    def record(cls,
+               name: str,
+               duration_ms: float) -> None:
+        """Records a duration, in milliseconds, into the named histogram."""
+        if not cls.enabled:
+            return
+        with cls._lock:
+            histogram = cls._histograms.get(name)
+            if histogram is None:
+                histogram = cls._histograms[name] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    @classmethod
+    def incr(cls,
+             name: str,
+             amount: int = 1) -> None:
+        """Increments the named counter."""
+        if not cls.enabled:
+            return
+        with cls._lock:
+            cls._counters[name] = cls._counters.get(name, 0) + amount
+
+    @classmethod
+    def record_event(cls,
+                     name: str,
+                     redis: 'RedisManager') -> None:
+        """
+        Increments the named counter and saves the moment of the event to redis, so any process can count how
+        many times it happened recently using count_recent_events().
+        """
+        if not cls.enabled:
+            return
+        cls.incr(name)
+        try:
+            redis.record_metric_event(name, pytime.time(), EVENT_RETENTION_SECS)
+        except Exception:
+            traceback.print_exc()
+
+    @classmethod
+    def count_recent_events(cls,
+                            name: str,
+                            redis: 'RedisManager',
+                            window_secs: float) -> int:
+        """Returns the number of times the named event was recorded (by any process) in the last window_secs."""
+        if window_secs > EVENT_RETENTION_SECS:
+            raise ValueError(f'Events are only kept for {EVENT_RETENTION_SECS} secs, not {window_secs}')
+        return redis.count_metric_events(name, pytime.time() - window_secs)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, any]:
+        """Returns a json dictionary containing all of this process's metrics."""
+        with cls._lock:
+            return {
+                'process': cls.process_label,
+                'pid': os.getpid(),
+                'updated': pytime.time(),
+                'histograms': {name: histogram.to_json() for name, histogram in cls._histograms.items()},
+                'counters': dict(cls._counters)
+            }
+
+    @classmethod
+    def flush_if_due(cls,
+                     redis: 'RedisManager') -> None:
+        """Saves a snapshot of this process's metrics to redis, if one hasn't been saved recently."""
+        if not cls.enabled or pytime.monotonic() - cls._last_flush < FLUSH_INTERVAL:
+            return
+        cls._last_flush = pytime.monotonic()
+        try:
+            redis.save_metrics_snapshot(cls.process_label, json.dumps(cls.snapshot()))
+        except Exception:
+            traceback.print_exc()
+
+    @classmethod
+    def collect(cls,
+                redis: Optional['RedisManager'] = None) -> Dict[str, any]:
+        """
+        Merges the metrics of every process into a json dictionary that can be read by the webpanel.
+        The current process's metrics are always up-to-date; other processes' are as of their last flush.
+        """
+        snapshots = {cls.process_label: cls.snapshot()}
+        if redis is not None:
+            stale_labels = []
+            for label, snapshot_str in redis.load_metrics_snapshots().items():
+                if label == cls.process_label:
+                    continue
+                snapshot = json.loads(snapshot_str)
+                if pytime.time() - snapshot['updated'] <= STALE_SNAPSHOT_SECS:
+                    snapshots[label] = snapshot
+                else:
+                    stale_labels.append(label)
+
+            # Delete dead processes' snapshots, e.g. those of short-lived worker processes labeled by pid
+            redis.delete_metrics_snapshots(stale_labels)
+
+        # Sum every process's histograms and counters
+        histograms: Dict[str, LatencyHistogram] = {}
+        counters: Dict[str, int] = {}
+        for snapshot in snapshots.values():
+            for name, histogram_json in snapshot['histograms'].items():
+                histogram = LatencyHistogram.from_json(histogram_json)
+                if name in histograms:
+                    histograms[name].merge(histogram)
+                else:
+                    histograms[name] = histogram
+            for name, count in snapshot['counters'].items():
+                counters[name] = counters.get(name, 0) + count
+
+        return {
+            'processes': sorted(snapshots.keys()),
+            'histograms': {name: histograms[name].to_summary_json() for name in sorted(histograms.keys())},
+            'counters': {name: counters[name] for name in sorted(counters.keys())}
+        }
+
+    @classmethod
+    def reset(cls) -> None:
+        """Clears this process's metrics."""
+        with cls._lock:
+            cls._histograms = {}
+            cls._counters = {}
+
+
+def timed(metric_name: str):
+    """
+    Records the duration of each call to a function decorated with "@timed(metric_name)".
+    Calls to methods of objects whose env_type is a simulated environment type (e.g. a simulation's database
+    workers) aren't recorded, so they don't skew the live latency metrics.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def timed_func(*args, **kws):
+            if not Metrics.enabled or (len(args) > 0 and getattr(args[0], 'env_type', None) in UNTIMED_ENV_TYPES):
+                return func(*args, **kws)
+            start = pytime.monotonic()
+            try:
+                return func(*args, **kws)
+            finally:
+                Metrics.record(metric_name, (pytime.monotonic() - start) * 1000.0)
+
+        return timed_func
+
+    return decorator
@@ -1,15 +1,16 @@
-import random
 import time as pytime
 import traceback
 from datetime import timedelta, datetime, date
+from typing import Optional, Dict, List
 
 from tc2.account.AlpacaAccount import AlpacaAccount
 from tc2.account.data_stream.StreamUpdateType import StreamUpdateType
 from tc2.data.data_structs.price_data.Candle import Candle
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
-from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
+from tc2.data.stock_data_collection.ModelTrainingPipeline import ModelTrainingPipeline
 from tc2.env.ExecEnv import ExecEnv
 from tc2.env.Settings import Settings
+from tc2.metrics.Metrics import Metrics
 from tc2.util.market_util import CLOSED_DURATION, MODEL_FEED_DELAY, OPEN_TIME, CLOSE_TIME
 
 
@@ -18,7 +19,7 @@ class DailyCollector(ExecEnv):
     Logic loop that collects data and uses it to feed analysis models after markets close.
     """
 
-    model_feeder: ModelFeeder
+    training_pipeline: ModelTrainingPipeline
 
     def __init__(self, creator_env: ExecEnv, logfeed_process) -> None:
         super().__init__(creator_env.logfeed_program, logfeed_process=logfeed_process, creator_env=creator_env)
@@ -37,9 +38,10 @@ class DailyCollector(ExecEnv):
 
         # Fork the execution environment so it can run in this thread.
         self.fork_new_thread()
+        Metrics.set_process_label('DailyCollector')
 
-        # Create a ModelFeeder to train models.
-        self.model_feeder = ModelFeeder(self)
+        # Create a pipeline to train models on many symbols at once, forking its workers before any threads start.
+        self.training_pipeline = ModelTrainingPipeline(self)
 
         # Hook into polygon's live data stream.
         acct = AlpacaAccount(env=self, logfeed_trading=self.logfeed_process, livestream_updates=livestream_updates)
@@ -57,18 +59,19 @@ class DailyCollector(ExecEnv):
             # Wait 3 seconds between loops.
             pytime.sleep(3)
 
-            # Cache live price data in redis.
+            # Cache live price data in redis, batching each symbol's new candles into one write.
             try:
-                update = acct.get_next_trading_update(Settings.get_symbols(self))
+                symbols = Settings.get_symbols(self)
+                candles_by_symbol = {}
+                update = acct.get_next_trading_update(symbols)
                 updates_processed = 0
                 while update is not None:
                     if update.update_type is StreamUpdateType.CANDLE:
-                        # self.info_process(f'Caching {update.raw_data["symbol"]} candle in redis')
-                        self._cache_candle(symbol=update.raw_data['symbol'],
-                                           candle=update.get_candle())
+                        candles_by_symbol.setdefault(update.raw_data['symbol'], []).append(update.get_candle())
                     updates_processed += 1
-                    update = acct.get_next_trading_update(Settings.get_symbols(self))
-                if updates_processed > 500:
+                    update = acct.get_next_trading_update(symbols)
+                self._cache_candles(candles_by_symbol)
+                if updates_processed > max(500, 10 * len(symbols)):
                     self.warn_process(f'DailyCollector processed {updates_processed} updates at once')
             except Exception as e:
                 self.error_process('Error processing polygon live data:')
@@ -80,7 +83,11 @@ class DailyCollector(ExecEnv):
                 # Don't collect again until tomorrow.
                 collection_time = self.next_collection_time(is_first_collection=False)
 
-        # Display a message when the collection loop is stopped.
+            # Periodically share this process's latency metrics with the webpanel.
+            Metrics.flush_if_due(self.redis())
+
+        # Stop the training pipeline's workers, then display a message when the collection loop is stopped.
+        self.training_pipeline.close()
         self.info_process('DailyCollector collection loop stopped')
 
     def next_collection_time(self,
@@ -115,58 +122,70 @@ class DailyCollector(ExecEnv):
         self.info_process('\n\n')
         self.info_process('Performing daily data collection and model training...')
 
-        for symbol in Settings.get_symbols(self):
-            # Interrupt collection if the collection loop was stopped
-            if not self._running:
-                break
-
-            # Revert data to last stable day.
-            date_last_collected_for = self.time().now().date()
-            # If it's past midnight, move back a day.
-            if self.time().get_secs_to_open() < timedelta(hours=9, minutes=30).total_seconds():
-                date_last_collected_for -= timedelta(days=1)
-            # Move back two market days from the most recent market day.
-            date_last_collected_for = self.time().get_prev_mkt_day(date_last_collected_for)
-            date_last_collected_for = self.time().get_prev_mkt_day(date_last_collected_for)
-            # Remove mongo price data after the stable day.
+        # Revert data to last stable day.
+        date_last_collected_for = self.time().now().date()
+        # If it's past midnight, move back a day.
+        if self.time().get_secs_to_open() < timedelta(hours=9, minutes=30).total_seconds():
+            date_last_collected_for -= timedelta(days=1)
+        # Move back two market days from the most recent market day.
+        date_last_collected_for = self.time().get_prev_mkt_day(date_last_collected_for)
+        date_last_collected_for = self.time().get_prev_mkt_day(date_last_collected_for)
+        date_rest_available_for = self.time().get_next_mkt_day(date_last_collected_for)
+        date_cache_available_for = self.time().get_next_mkt_day(date_rest_available_for)
+
+        # Remove mongo price data after the stable day.
+        symbols = Settings.get_symbols(self)
+        for symbol in symbols:
             self.mongo().remove_price_data_after(symbol, date_last_collected_for, today=self.time().now().today())
-            date_rest_available_for = self.time().get_next_mkt_day(date_last_collected_for)
 
-            # Collect yesterday's polygon-rest data and train on it.
-            if self._train_on_rest_data(symbol, date_rest_available_for):
-                self.info_process(f'Trained {symbol} on yesterday\'s polygon rest data')
+        # Collect yesterday's polygon-rest data for every symbol at once.
+        rest_datas = {}
+        try:
+            for symbol, _, rest_data in self.data_collector().collect_candles_for_days(
+                    [(symbol, date_rest_available_for) for symbol in symbols]):
+                rest_datas[symbol] = rest_data
+        except Exception as e:
+            self.error_process('Error collecting polygon-rest data:')
+            self.warn_process(traceback.format_exc())
+
+        # Save valid polygon-rest data so it can be trained on.
+        for symbol in symbols:
+            if self._save_rest_data(symbol, date_rest_available_for, rest_datas.get(symbol)):
+                self.info_process(f'Collected {symbol}\'s polygon rest data for yesterday')
             else:
                 self.warn_process(f'Invalid {symbol} rest data collected for {date_rest_available_for}. '
                                   f'Discarding them and attempting to use cached stream data instead')
-                if self._train_on_stream_data(symbol, date_rest_available_for):
-                    self.info_process(f'Trained {symbol} on yesterday\'s polygon stream data')
-                else:
-                    self.warn_process(f'Invalid {symbol} candles cached for {date_rest_available_for}. '
-                                      f'Could not find valid data to train on yesterday!')
-
-            # Load today's polygon-stream data and train on it.
-            date_cache_available_for = self.time().get_next_mkt_day(date_rest_available_for)
-            if self._train_on_stream_data(symbol, date_cache_available_for):
-                self.info_process(f'Trained {symbol} on today\'s polygon stream data')
+
+        # Interrupt training if the collection loop was stopped.
+        if not self._running:
+            return
+
+        # Train every symbol on yesterday's data (rest, or else stream) and then today's stream data.
+        results = self.training_pipeline.train(
+            symbol_days=[(symbol, day_date) for symbol in symbols
+                         for day_date in [date_rest_available_for, date_cache_available_for]],
+            stable=True,
+            use_stream_cache=True)
+        for symbol in symbols:
+            if results[(symbol, date_rest_available_for)]:
+                self.info_process(f'Trained {symbol} on yesterday\'s polygon data')
             else:
                 self.warn_process(f'Invalid {symbol} candles cached for {date_rest_available_for}. '
+                                  f'Could not find valid data to train on yesterday!')
+            if results[(symbol, date_cache_available_for)]:
+                self.info_process(f'Trained {symbol} on today\'s polygon stream data')
+            else:
+                self.warn_process(f'Invalid {symbol} candles cached for {date_cache_available_for}. '
                                   f'Could not find valid data to train on today!')
 
-    def _train_on_rest_data(self,
-                            symbol: str,
-                            day_date: date) -> bool:
+    def _save_rest_data(self,
+                        symbol: str,
+                        day_date: date,
+                        rest_data: Optional[SymbolDay]) -> bool:
         """
-        Collects polygon-rest data and trains the symbol on it.
+        Saves polygon-rest data collected for the day.
         Returns False if the collected data is invalid; True otherwise.
         """
-        # Collect polygon-rest data
-        rest_data = None
-        try:
-            rest_data = self.data_collector().collect_candles_for_day(day_date, symbol)
-        except Exception as e:
-            self.error_process('Error collecting polygon-rest data:')
-            self.warn_process(traceback.format_exc())
-
         # Validate polygon-rest data
         if rest_data is None or not SymbolDay.validate_candles(rest_data.candles):
             self.redis().reset_day_difficulty(symbol, day_date)
@@ -176,52 +195,19 @@ class DailyCollector(ExecEnv):
         # Save polygon-rest data
         self.redis().reset_day_difficulty(symbol, rest_data.day_date)
         self.mongo().save_symbol_day(rest_data)
-
-        # Train models on polygon-rest data
-        self.model_feeder.train_models(symbol=symbol,
-                                       day_date=day_date,
-                                       day_data=rest_data,
-                                       stable=True)
-        return True
-
-    def _train_on_stream_data(self,
-                              symbol: str,
-                              day_date: date) -> bool:
-        """
-        Loads cached polygon-stream data and trains the symbol on it.
-        Returns False if the data is invalid; True otherwise.
-        """
-        # Validate polygon-stream data
-        stream_data = SymbolDay(
-            symbol=symbol,
-            day_date=day_date,
-            candles=self.redis().get_cached_candles(
-                symbol=symbol,
-                day_date=day_date))
-        if not SymbolDay.validate_candles(stream_data.candles):
-            return False
-
-        # Train models on polygon-stream data
-        self.model_feeder.train_models(symbol=symbol,
-                                       day_date=day_date,
-                                       day_data=stream_data,
-                                       stable=True)
         return True
 
-    def _cache_candle(self,
-                      symbol: str,
-                      candle: Candle) -> None:
+    def _cache_candles(self,
+                       candles_by_symbol: Dict[str, List[Candle]]) -> None:
         """
-        Stores a newly-streamed candle in redis cache.
+        Stores newly-streamed candles in redis cache using a single round trip.
         """
         # Cache the unstable candles so the program has access to recent data
-        if datetime.combine(datetime.now().date(), OPEN_TIME) < candle.moment \
-                < datetime.combine(datetime.now().date(), CLOSE_TIME):
-
-            # Store unstable candle in redis cache
-            self.redis().store_cached_candles(symbol=symbol,
-                                              candles=[candle])
-
-            # Occasionally prune unstable candles that are no longer needed
-            if random.randint(0, 1000) < 3:
-                self.redis().prune_cached_candles(symbol=symbol)
+        open_moment = datetime.combine(datetime.now().date(), OPEN_TIME)
+        close_moment = datetime.combine(datetime.now().date(), CLOSE_TIME)
+        candles_to_cache = {symbol: [candle for candle in candles if open_moment < candle.moment < close_moment]
+                            for symbol, candles in candles_by_symbol.items()}
+
+        # Store unstable candles in redis cache, which trims each symbol's cached candles as they're stored
+        if any(len(candles) > 0 for candles in candles_to_cache.values()):
+            self.redis().store_cached_candles_batch(candles_by_symbol=candles_to_cache)
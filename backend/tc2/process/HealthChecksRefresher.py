@@ -1,5 +1,6 @@
 import threading
 import time as pytime
+import traceback
 from datetime import time
 from threading import Thread
 from typing import List
@@ -12,9 +13,13 @@ from tc2.util.TimeInterval import TimeInterval
 
 class HealthChecksRefresher(Loggable):
     """
-    A manager in charge of automatically performing health checks in the background via API calls.
-    Not to be confused with HealthChecker, which receives the API calls and actually performs the health checks.
+    A manager in charge of automatically performing health checks in the background.
+    Not to be confused with HealthChecker, which actually performs the health checks.
     """
+
+    # Number of seconds to wait between attempts to schedule checks whose results have gone stale
+    SCHEDULING_INTERVAL = 60
+
     live_time_env: TimeEnv
     symbols: List[str]
     health_updates_thread: Thread
@@ -51,62 +56,44 @@ class HealthChecksRefresher(Loggable):
 
     def _updates_logic(self, time_to_run: TimeInterval) -> None:
         """
-        Starts an infinite loop that runs health checks during time_to_run.
+        Starts an infinite loop that schedules health checks during time_to_run.
+        Checks run concurrently on the webpanel's health check scheduler, which skips checks that are already
+        running or whose latest results are still fresh, so each check runs about once per result TTL.
         """
+        from webpanel import api_util, shared
+        from tc2.health_checking.HealthCheckType import HealthCheckType
+
         self.info_process('Starting health checks thread')
-        checks_completed = []
         while getattr(threading.current_thread(), "do_run", True):
 
             # Wait for 6PM to run health checks
             if not time_to_run.contains_time(self.live_time_env.now()):
-                checks_completed = []
                 pytime.sleep(5)
                 continue
 
-            # TODO Ensure we have a valid auth token for the API
-
-            expected_update_time = self.live_time_env.now()
-
-            # Check MongoDB health
-            if 'mongo' not in checks_completed:
-                self.info_process('Running scheduled mongo model_type')
-                # TODO Call API '/api/health_checks/perform?check_type=MONGO'
-                # TODO Wait 1 second between /get calls, until last_updated > expected_update_time
-                checks_completed.append('mongo')
-                continue
-
-            # Check output of dip45 analysis model
-            if 'dip45' not in checks_completed:
-                self.info_process('Running scheduled dip45 model_type')
-                # TODO Call API '/api/health_checks/perform?check_type=DIP45'
-                # TODO Wait 1 second between /get calls, until last_updated > expected_update_time
-                checks_completed.append('dip45')
+            # Schedule checks of mongo, dip45 output, simulation speed, model feeding, and each symbol's data
+            scheduled_checks = [(HealthCheckType.MONGO, {}),
+                                (HealthCheckType.DIP45, {}),
+                                (HealthCheckType.SIM_TIMINGS, {}),
+                                (HealthCheckType.MODEL_FEEDING, {})]
+            scheduled_checks.extend((HealthCheckType.DATA, {'symbol': symbol}) for symbol in self.symbols)
+
+            # Fork one live environment for the whole pass, to read the latest result of every check
+            try:
+                live_env = api_util.fork_live_env()
+            except Exception:
+                self.warn_process('Could not fork a live environment to schedule health checks:')
+                self.warn_process(traceback.format_exc())
+                pytime.sleep(self.SCHEDULING_INTERVAL)
                 continue
 
-            # Check speed of simulations
-            if 'sim-timings' not in checks_completed:
-                self.info_process('Running scheduled simulations model_type')
-                # TODO Call API '/api/health_checks/perform?check_type=SIMULATION_TIMINGS'
-                # TODO Wait 1 second between /get calls, until last_updated > expected_update_time
-                checks_completed.append('sim-timings')
-                continue
-
-            # Check health of daily data collection and model feeding
-            if 'model-feeding' not in checks_completed:
-                self.info_process('Running scheduled model feeding check')
-                # TODO Call API '/api/health_checks/perform?check_type=MODEL_FEEDING'
-                # TODO Wait 1 second between /get calls, until last_updated > expected_update_time
-                checks_completed.append('model-feeding')
-                continue
+            for check_type, check_params in scheduled_checks:
+                try:
+                    if shared.health_check_scheduler.submit(check_type=check_type, check_params=check_params,
+                                                            live_env=live_env):
+                        self.info_process(f'Running scheduled {check_type.value.lower()} check {check_params}')
+                except Exception:
+                    self.warn_process(f'Could not schedule {check_type.value.lower()} check:')
+                    self.warn_process(traceback.format_exc())
 
-            # Check depth and accuracy of symbol data
-            for symbol in self.symbols:
-                if f'data-{symbol}' not in checks_completed:
-                    self.info_process('Running scheduled symbol ({0}) model_type'.format(symbol))
-                    # TODO Call API '/api/health_checks/perform?check_type=DATA?symbol={}'
-                    # TODO Wait 1 second between /get calls, until last_updated > expected_update_time
-                    checks_completed.append('data-' + symbol)
-                    break
-
-            # Allow health checks to run again once all have been run
-            checks_completed = []
+            pytime.sleep(self.SCHEDULING_INTERVAL)
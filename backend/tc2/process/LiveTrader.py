@@ -10,6 +10,7 @@ from tc2.account.data_stream.StreamUpdateQueue import StreamUpdateQueue
 from tc2.env.ExecEnv import ExecEnv
 from tc2.env.Settings import Settings
 from tc2.log.LogFeed import LogFeed
+from tc2.metrics.Metrics import Metrics
 from tc2.strategy.AbstractStrategy import AbstractStrategy
 from tc2.strategy.execution.live.StrategyRunner import StrategyRunner
 from tc2.util.Config import BrokerEndpoint
@@ -64,6 +65,7 @@ class LiveTrader(ExecEnv):
 
         # Fork the execution environment so it can run in this thread
         self.fork_new_thread()
+        Metrics.set_process_label(self._pref())
 
         # Create an account manager for day trading
         self.account = AlpacaAccount(self, self.logfeed_process, livestream_updates)
@@ -76,6 +78,9 @@ class LiveTrader(ExecEnv):
                 self.error_process(f'Error executing {self._pref()} heartbeat:')
                 self.warn_process(f'{traceback.format_exc()}')
 
+            # Periodically share this process's latency metrics with the webpanel
+            Metrics.flush_if_due(self.redis())
+
         self.info_process(f'{self._pref()} logic loop exited')
 
     def heartbeat(self) -> None:
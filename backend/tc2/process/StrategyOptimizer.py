@@ -9,9 +9,10 @@ from tc2.env.EnvType import EnvType
 from tc2.env.ExecEnv import ExecEnv
 from tc2.env.TimeEnv import TimeEnv
 from tc2.log.LogFeed import LogFeed
-from tc2.data.data_storage.mongo.MongoManager import MongoManager
-from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.metrics.Metrics import Metrics
+from tc2.data.data_storage.storage_backends import create_mongo_manager, create_redis_manager
 from tc2.strategy.AbstractStrategy import AbstractStrategy
+from tc2.strategy.execution.simulated.SimProfile import SimProfile
 from tc2.strategy.execution.simulated.StrategyEvaluator import StrategyEvaluator
 from tc2.util import candle_util
 from tc2.env.Settings import Settings
@@ -48,6 +49,7 @@ class StrategyOptimizer(ExecEnv):
 
         # Fork the execution environment so it can run in this thread
         self.fork_new_thread()
+        Metrics.set_process_label('StrategyOptimizer')
 
         # Create strategy objects
         self.strategies = create_day_strategies(self)
@@ -81,6 +83,9 @@ class StrategyOptimizer(ExecEnv):
             self.redis().set_optimization_time(oldest_symbol, oldest_strategy.__class__.__name__,
                                                self.time().now())
 
+            # Periodically share this process's latency metrics with the webpanel
+            Metrics.flush_if_due(self.redis())
+
             # Wait a moment before evaluating the next strategy
             pytime.sleep(1)
 
@@ -122,12 +127,15 @@ class StrategyOptimizer(ExecEnv):
                                  data_collector=PolygonDataCollector(logfeed_program=self.logfeed_program,
                                                                      logfeed_process=self.logfeed_process,
                                                                      time_env=sim_time_env),
-                                 mongo=MongoManager(self.logfeed_program, EnvType.OPTIMIZATION),
-                                 redis=RedisManager(self.logfeed_process, EnvType.OPTIMIZATION))
+                                 mongo=create_mongo_manager(self.logfeed_program, EnvType.OPTIMIZATION),
+                                 redis=create_redis_manager(self.logfeed_process, EnvType.OPTIMIZATION))
 
         # Create a ModelFeeder for the simulated environment
         sim_model_feeder = ModelFeeder(sim_env)
 
+        # Profile the data copying and simulations, if enabled
+        sim_profile = SimProfile() if Settings.get_profile_simulations(self) else None
+
         # Place the strategy in the simulated environment
         strategy = self._clone_strategy(strategy, sim_env)
 
@@ -137,7 +145,8 @@ class StrategyOptimizer(ExecEnv):
                                                            symbols=[strategy.get_symbol()],
                                                            days=start_index - 2,
                                                            end_date=dates_on_file[start_index - 1],
-                                                           model_feeder=sim_model_feeder)
+                                                           model_feeder=sim_model_feeder,
+                                                           profile=sim_profile)
         if data_copy_error is not None:
             self.warn_process(data_copy_error)
             return
@@ -154,7 +163,8 @@ class StrategyOptimizer(ExecEnv):
                                                                days=2,
                                                                end_date=dates_on_file[start_index - 1],
                                                                model_feeder=sim_model_feeder,
-                                                               skip_last_day_training=True)
+                                                               skip_last_day_training=True,
+                                                               profile=sim_profile)
             if data_copy_error is not None:
                 self.warn_process(data_copy_error)
                 self.warn_process(f'Optimization of {strategy.__class__.__name__} on '
@@ -168,7 +178,7 @@ class StrategyOptimizer(ExecEnv):
 
             # Run evaluation on the day
             # TODO Change this to run an optimization simulation
-            next_evaluation = StrategyEvaluator(strategy).evaluate()
+            next_evaluation = StrategyEvaluator(strategy).evaluate(profile=sim_profile)
 
             # Merge the results with all the evaluations from previous days
             if evaluation is None:
@@ -186,6 +196,12 @@ class StrategyOptimizer(ExecEnv):
                             (100 * evaluation.days_entered / evaluation.days_evaluated), evaluation.avg_profit,
                             evaluation.med_profit, evaluation.win_ratio, evaluation.entry_ratio))
 
+        # Print the average time spent in each phase of the simulations
+        if sim_profile is not None and sim_profile.days > 0:
+            self.info_process(f'Simulation timings of {strategy.__class__.__name__} for {symbol} '
+                              f'({sim_profile.total_secs / sim_profile.days:.2f}s per day):\n\t' +
+                              '\n\t'.join(sim_profile.format_lines()))
+
         return
 
     def _clone_strategy(self, original_strategy: AbstractStrategy, sim_env: ExecEnv) -> AbstractStrategy:
@@ -1,7 +1,6 @@
 from datetime import date, datetime, time
 
-from tc2.data.data_storage.mongo.MongoManager import MongoManager
-from tc2.data.data_storage.redis.RedisManager import RedisManager
+from tc2.data.data_storage.storage_backends import create_mongo_manager, create_redis_manager
 from tc2.data.stock_data_collection.PolygonDataCollector import PolygonDataCollector
 from tc2.env.EnvType import EnvType
 from tc2.env.ExecEnv import ExecEnv
@@ -27,15 +26,15 @@ class DebugSimulationTask(AbstractStartupTask):
         live_env = ExecEnv(self.program.logfeed_program, self.program.logfeed_program, self.program.live_env)
         live_env.fork_new_thread()
 
-        # Initialize simulation environment.
+        # Initialize simulation environment (with in-memory databases).
         sim_time_env = TimeEnv(datetime.combine(day_date, time(hour=11, minute=3, second=40)))
         sim_data_collector = PolygonDataCollector(logfeed_program=self.program.logfeed_program,
                                                   logfeed_process=self.program.logfeed_program,
                                                   time_env=sim_time_env)
-        sim_redis = RedisManager(self.program.logfeed_program, EnvType.STARTUP_DEBUG_1)
-        sim_mongo = MongoManager(self.program.logfeed_program, EnvType.STARTUP_DEBUG_1)
+        sim_redis = create_redis_manager(self.program.logfeed_program, EnvType.SIMULATION)
+        sim_mongo = create_mongo_manager(self.program.logfeed_program, EnvType.SIMULATION)
         sim_env = ExecEnv(self.program.logfeed_program, self.program.logfeed_program)
-        sim_env.setup_first_time(env_type=EnvType.STARTUP_DEBUG_1,
+        sim_env.setup_first_time(env_type=EnvType.SIMULATION,
                                  time=sim_time_env,
                                  data_collector=sim_data_collector,
                                  mongo=sim_mongo,
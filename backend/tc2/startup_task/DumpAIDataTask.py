@@ -26,50 +26,37 @@ class DumpAIDataTask(AbstractStartupTask):
 
         # Clear the data file.
         filename = 'debug_data/spy_ai_data.txt'
-        try:
-            if not os.path.exists('debug_data'):
-                os.mkdir('debug_data')
-            with open(filename, 'w+') as file:
-                file.write('')
-            os.remove(filename)
-        except Exception as e:
-            print(f'Error deleting file: "{filename}"')
-            pass
-
-        # Go through the data we have on file.
-        day_date = start_date - timedelta(days=1)
-        while day_date < end_date:
-
-            # Get the next market day.
-            day_date = self.program.live_env.time().get_next_mkt_day(day_date)
-
-            # Load price data.
-            print(f'Fetching SPY data for {day_date:%m-%d-%Y}')
-            day_data = live_env.mongo().load_symbol_day('SPY', day_date)
-
-            # Get fresh data from polygon.io, if necessary.
-            if not SymbolDay.validate_candles(day_data.candles):
-                try:
-                    day_data = data_collector.collect_candles_for_day(day_date, 'SPY')
-                except Exception as e:
-                    live_env.error_process('Error collecting polygon-rest data:')
-                    live_env.warn_process(traceback.format_exc())
-
-            # Validate the data.
-            if day_data is None or not SymbolDay.validate_candles(day_data.candles):
-                print(F'COULD NOT COMPILE PRICE DATA FOR SPY ON {day_date:%m-%d-%Y}')
-                continue
-
-            # Convert candles into sentences.
-
-
-            #
-
-            # Convert the data into json.
-            data_dict = day_data.to_json()
-
-            # Append the data to the txt file.
-            with open(f'debug_data/spy_ai_data.txt', 'a+') as f:
-                f.write(json.dumps(data_dict))
+        if not os.path.exists('debug_data'):
+            os.mkdir('debug_data')
+
+        # Write one line of json per day to a single open file, so the dump streams instead of reopening the file.
+        with open(filename, 'w') as data_file:
+
+            # Go through the data we have on file.
+            day_date = start_date - timedelta(days=1)
+            while day_date < end_date:
+
+                # Get the next market day.
+                day_date = self.program.live_env.time().get_next_mkt_day(day_date)
+
+                # Load price data.
+                print(f'Fetching SPY data for {day_date:%m-%d-%Y}')
+                day_data = live_env.mongo().load_symbol_day('SPY', day_date)
+
+                # Get fresh data from polygon.io, if necessary.
+                if not SymbolDay.validate_candles(day_data.candles):
+                    try:
+                        day_data = data_collector.collect_candles_for_day(day_date, 'SPY')
+                    except Exception as e:
+                        live_env.error_process('Error collecting polygon-rest data:')
+                        live_env.warn_process(traceback.format_exc())
+
+                # Validate the data.
+                if day_data is None or not SymbolDay.validate_candles(day_data.candles):
+                    print(F'COULD NOT COMPILE PRICE DATA FOR SPY ON {day_date:%m-%d-%Y}')
+                    continue
+
+                # Convert the data into json and append it to the txt file.
+                data_file.write(json.dumps(day_data.to_json()) + '\n')
 
         print(f'Dumped data to TC2_data/{filename}')
@@ -1,24 +1,82 @@
-from typing import Optional
+import traceback
+from datetime import date
+from typing import Optional, List, Tuple
 
 from tc2.stock_analysis.AbstractModel import AbstractModel
 from tc2.stock_analysis.ModelWeightingSystem import SymbolGrade
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.util.rolling_sum_formulas import RollingSumFormulas
 
 
 class AbstractForgetfulModel(AbstractModel):
     """
     Any model that iteratively takes data in one day at a time and factors it into a weighted sum.
     This class of models "forgets" old data as it gets replaced by newer data.
+
+    Each day is reduced to a single measurement, so many days can be measured first and then folded into the sum
+    at once, reading and storing the sum only once (see feed_measurements()).
+
+    The rolling sum is stored alongside the MEASUREMENT_VERSION that produced it. Bump a model's version whenever
+    its measurement changes meaning, so sums built from the old measurement are discarded and training restarts.
     """
 
     OUTPUT_TYPE = Optional[float]
 
-    def feed_model(self, day_data: SymbolDay) -> None:
-        """Calculates and stores a new output given a previous day's info. Does not return output."""
+    # The version of calculate_measurement() whose measurements make up the stored rolling sum
+    MEASUREMENT_VERSION = 1
+
+    def calculate_measurement(self, day_data: SymbolDay) -> Optional[float]:
+        """Returns the day's measurement, or None if it can't be measured."""
         raise NotImplementedError
 
+    def merge_measurement(self, rolling_sum: float, measurement: float) -> float:
+        """Returns the rolling sum after merging in a new measurement. Remembers about 30 days by default."""
+        return RollingSumFormulas.combine(rolling_sum, measurement, RollingSumFormulas.get_30_day_weight())
+
+    def measure_day(self, day_data: SymbolDay) -> Optional[float]:
+        """Returns the day's measurement, or None (after logging why) if it couldn't be measured."""
+        try:
+            return self.calculate_measurement(day_data)
+        except Exception as e:
+            self.error_process(f'Error measuring {day_data.symbol}\'s {self.model_type.value} on {day_data.day_date}:')
+            self.warn_process(traceback.format_exc())
+            return None
+
+    def feed_model(self, day_data: SymbolDay) -> None:
+        """Merges the day's measurement into the rolling sum and stores the new output. Does not return output."""
+        self.feed_measurements(day_data.symbol, [(day_data.day_date, self.measure_day(day_data))])
+
+    def feed_measurements(self, symbol: str, measurements: List[Tuple[date, Optional[float]]]) -> int:
+        """
+        Merges consecutive days' measurements into the rolling sum, in order, then stores the new output once.
+        Stops at the first day that couldn't be measured, since training is no longer continuous after it.
+        :return: the number of days merged
+        """
+        # Start a new sum rather than merging into one made of another version's measurements
+        rolling_sum = 0 if self.is_outdated(symbol) else self.redis().get_analysis_rolling_sum(symbol, self.model_type)
+        num_merged = 0
+        for day_date, measurement in measurements:
+            if measurement is None:
+                break
+            rolling_sum = self.merge_measurement(rolling_sum, measurement)
+            num_merged += 1
+        if num_merged > 0:
+            self.save_output(symbol=symbol, raw_output=rolling_sum, day_date=measurements[num_merged - 1][0])
+            self.redis().save_analysis_version(symbol, self.model_type, self.MEASUREMENT_VERSION)
+        return num_merged
+
+    def is_outdated(self, symbol: str) -> bool:
+        """
+        Returns True if the symbol's stored state was measured by another version of the model.
+        State stored before models were versioned counts as version 1.
+        """
+        stored_version = self.redis().get_analysis_version(symbol, self.model_type)
+        return (1 if stored_version is None else stored_version) != self.MEASUREMENT_VERSION
+
     def calculate_output(self, symbol: str) -> OUTPUT_TYPE:
-        """Returns the model's stored output."""
+        """Returns the model's stored output, or None if it was measured by another version of the model."""
+        if self.is_outdated(symbol):
+            return None
         return self.get_stored_output(symbol=symbol)
 
     def grade_symbol(self, symbol: str, output: any) -> SymbolGrade:
@@ -9,11 +9,12 @@ from tc2.stock_analysis.strategy_models.breakout1_strategy.Breakout1ModelOutput
 from tc2.stock_analysis.strategy_models.breakout1_strategy.Breakout1ModelSteps import Breakout1ModelSteps
 from tc2.stock_analysis.model_output.ModelStep import ModelStep
 from tc2.stock_analysis.model_output.TrendLineFinder import TrendLineFinder
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.strategy.strategies.breakout1 import breakout1_constants
 from tc2.util.TimeInterval import ContinuousTimeInterval
 from tc2.util.candle_util import min_candle_in_period, max_candle_in_period, midpoint_candle_in_period, \
-    aggregate_minute_candles, candles_in_period
+    aggregate_minute_candles, aggregate_bars, candles_in_period
 from tc2.util.date_util import DATE_FORMAT
 from tc2.util.math_util import ema
 
@@ -346,24 +347,35 @@ class Breakout1Model(AbstractSpotModel):
 
     def _check_ema_volume_excitement(self,
                                      output: Breakout1ModelOutput) -> bool:
-        ema_volumes = [ema(output.minute_volumes)]
-        prev_date = self.time().now().date()
-        for i in range(7):
-            # Load the previous day's data
-            prev_date = self.time().get_prev_mkt_day(prev_date)
-            day_data = self.mongo().load_symbol_day(output.symbol, prev_date)
-            if not SymbolDay.validate_candles(day_data.candles):
+        # Aggregate today's minute bars during the period the same way previous days' stored bars were aggregated
+        today = self.time().now().date()
+        period_start = datetime.combine(today, output.period.start_time)
+        period_end = datetime.combine(today, output.period.end_time)
+        today_volumes = [bar.volume for bar in aggregate_bars(output.period_data, 60)
+                         if period_start <= bar.minute < period_end]
+        ema_volumes = [ema(today_volumes)]
+        prev_dates = [self.time().get_prev_mkt_day(self.time().now().date())]
+        for i in range(6):
+            prev_dates.append(self.time().get_prev_mkt_day(prev_dates[-1]))
+        price_index = self.mongo().load_price_index([output.symbol], prev_dates[-1], prev_dates[0])[
+            output.symbol.upper()]
+        for prev_date in prev_dates:
+            # Check that the previous day's data is valid, validating it if it was saved before being indexed
+            valid = price_index.get(prev_date)
+            if valid is None and prev_date in price_index:
+                valid = self.mongo().index_symbol_day(self.mongo().load_symbol_day(output.symbol, prev_date))
+            if not valid:
                 output.steps.append(ModelStep(passed=False,
                                               value=f'missing needed data on {prev_date.strftime(DATE_FORMAT)}',
                                               step_id=Breakout1ModelSteps.EMA_MINUTE_VOLUME))
                 return False
 
-            # Aggregate the day's second-resolution candles into minute resolution
+            # Load the day's pre-aggregated minute candles during the period
             prev_period_start = datetime.combine(prev_date, output.period.start_time)
             prev_period_end = datetime.combine(prev_date, output.period.end_time)
-            prev_second_candles = [candle for candle in day_data.candles
-                                   if prev_period_start <= candle.moment <= prev_period_end]
-            prev_minute_candles = aggregate_minute_candles(prev_second_candles)
+            prev_minute_candles = [candle for candle in self.mongo().load_bars(output.symbol, prev_date,
+                                                                               BarResolution.MINUTE)
+                                   if prev_period_start <= candle.minute < prev_period_end]
 
             # Calculate the previous day's moving-average volume
             ema_volumes.append(ema([candle.volume for candle in prev_minute_candles]))
@@ -371,7 +383,7 @@ class Breakout1Model(AbstractSpotModel):
         # Calculate the median ema volume of the same period on each of the past 7 days
         med_ema_volume_prev_7_periods = median(ema_volumes)
         # Calculate the ema volume of this period today
-        ema_minute_volume = ema(output.minute_volumes)
+        ema_minute_volume = ema_volumes[0]
         # Perform next step: ema minute volume check
         output.steps.append(output.check_ema_minute_volume(ema_minute_volume, med_ema_volume_prev_7_periods))
         return output.steps[-1].passed
@@ -1,54 +1,48 @@
 from datetime import timedelta, datetime, time
+from typing import Optional
 
 from tc2.stock_analysis.AbstractForgetfulModel import AbstractForgetfulModel
 from tc2.stock_analysis.ModelWeightingSystem import SymbolGrade, SymbolGradeValue
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
-from tc2.data.data_structs.price_data.Candle import Candle
-from tc2.util.rolling_sum_formulas import RollingSumFormulas
+
+# Start of CycleStrategy's typical run window (minute 60), and the end of the window in which dips are measured
+RUN_START = time(hour=10, minute=30)
+WINDOW_END = (datetime.combine(datetime.today(), RUN_START) + timedelta(minutes=10)).time()
 
 
 class Dip10Model(AbstractForgetfulModel):
 
-    def feed_model(self, day_data: SymbolDay) -> None:
+    # Version 2 anchors on the candle at 10:30 (or within the minute before it), rather than the day's first candle
+    MEASUREMENT_VERSION = 2
+
+    def calculate_measurement(self, day_data: SymbolDay) -> Optional[float]:
         """
         Calculates the strongest percent dip during the first 10 minutes of CycleStrategy's typical run window.
         i.e. it predicts the worst dip that should be expected within 10 minutes of buying the symbol.
         """
 
+        features = day_data.get_features()
+
         # Find price at minute 60
-        start_candle: Candle = day_data.get_candle_at_sec(
-            datetime.combine(day_data.day_date, time(hour=10, minute=30)))
-        if start_candle is None:
+        start_idx = features.candle_idx_at(RUN_START, max_lag_secs=60)
+        if start_idx is None:
             self.warn_process("Couldn't update dip_10 analysis_model for CycleStrategy. Bad data at minute 60.")
-            return
+            return None
+        start_low = float(features.lows[start_idx])
 
         # Find lowest price within 10 minutes after minute 60
-        start_time = datetime.combine(day_data.day_date, time(hour=10, minute=30))
-        end_time = datetime.combine(day_data.day_date, time(hour=10, minute=30)) + timedelta(
-            minutes=10)
-        lowest_candle: Candle = Candle(start_candle.moment, start_candle.open, start_candle.high, start_candle.low,
-                                       start_candle.close, start_candle.volume)
-        for candle in day_data.candles:
-            if candle.low < lowest_candle.low and start_time < candle.moment < end_time:
-                lowest_candle = candle
-                lowest_candle = lowest_candle
+        lowest_low = features.lowest_low(RUN_START, WINDOW_END)
+        if lowest_low is None or lowest_low > start_low:
+            lowest_low = start_low
 
         # Calculate the greatest downward price change as a percentage
-        strongest_dip_pct = 100.0 * max(0.0, start_candle.low - lowest_candle.low) / start_candle.low
-
-        # Load the current running sum
-        current_sum = self.redis().get_analysis_rolling_sum(day_data.symbol, self.model_type)
-
-        # Skip days that don't dip since this model is only interested in forecasting dips
-        if strongest_dip_pct == 0:
-            output = current_sum
-
-        # Merge this day into the running sum
-        else:
-            output = RollingSumFormulas.combine(current_sum, strongest_dip_pct, RollingSumFormulas.get_30_day_weight())
+        return 100.0 * max(0.0, start_low - lowest_low) / start_low
 
-        # Save model's output
-        self.save_output(symbol=day_data.symbol, raw_output=output, day_date=day_data.day_date)
+    def merge_measurement(self, rolling_sum: float, measurement: float) -> float:
+        """Skips days that don't dip, since this model is only interested in forecasting dips."""
+        if measurement == 0:
+            return rolling_sum
+        return super().merge_measurement(rolling_sum, measurement)
 
     def grade_symbol(self, symbol: str, output: AbstractForgetfulModel.OUTPUT_TYPE) -> SymbolGrade:
         # Fail the symbol if it has no output
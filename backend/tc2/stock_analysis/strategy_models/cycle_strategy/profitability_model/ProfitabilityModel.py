@@ -1,7 +1,10 @@
 from datetime import timedelta
-from statistics import mean, median
-from typing import Optional, List, Dict
+from statistics import median
+from typing import Optional, List
 
+import numpy as np
+
+from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
 from tc2.stock_analysis.AbstractSpotModel import AbstractSpotModel
 from tc2.stock_analysis.ModelWeightingSystem import SymbolGrade, SymbolGradeValue
 from tc2.stock_analysis.strategy_models.cycle_strategy.profitability_model.ProfitabilitySimulationResults import \
@@ -11,54 +14,73 @@ from tc2.stock_analysis.strategy_models.cycle_strategy.profitability_model.StopS
 
 
 class ProfitabilityModel(AbstractSpotModel):
+    """
+    Simulates buying the symbol each morning of the last 300 calendar days and selling at each profit target.
+    Each day's simulation outcomes are saved alongside its daily candle (when the day is fed to the model, or else
+    the first time they're needed), so calculating output only aggregates saved outcomes.
+    """
+
     OUTPUT_TYPE = Optional[ProfitabilitySimulationResults]
     MIN_DAYS = 100
     PCT_PROFIT_TARGETS = [0.25, 0.31, 0.34, 0.36, 0.39, 0.42, 0.45, 0.49, 0.52, 0.57, 0.61]
     STOP_PCT = 0.85
 
+    # The name under which simulation outcomes are saved, and the version of the simulation that produced them
+    SIM_NAME = 'profitability'
+    SIM_VERSION = 3
+
+    def feed_model(self, day_data: SymbolDay) -> None:
+        """Simulates the day and saves its outcomes, so they needn't be simulated when calculating output."""
+        self.mongo().save_sim_outcomes(day_data.symbol, day_data.day_date, self.SIM_NAME, self._sim_params(),
+                                       self._simulate_day(day_data))
+
     def calculate_output(self, symbol: str) -> OUTPUT_TYPE:
 
         # Get all market data from the past 300 calendar days
-        dates = self.mongo().get_dates_on_file(symbol, self.time().now() - timedelta(days=301),
-                                               self.time().now() - timedelta(days=1))
+        dates = self.mongo().get_dates_on_file(symbol, self.time().now().date() - timedelta(days=301),
+                                               self.time().now().date() - timedelta(days=1))
 
         # Make sure the model_type runs on a sufficiently large sample size
         if len(dates) < ProfitabilityModel.MIN_DAYS:
             return None
 
-        # Init a weighted list of profit realized using each profit target in simulation, favoring recent days
-        target_realized_pct_profits: Dict[float, List[float]] = {}
-        for profit_target in ProfitabilityModel.PCT_PROFIT_TARGETS:
-            target_realized_pct_profits[profit_target] = []
-        time_weight = 0.5
-        time_weight_increment = 1 / len(dates)
-
-        # Simulate targeting each profit target
-        for day in dates:
-            day_data = self.mongo().load_symbol_day(symbol, day)
-            simulation = StopSellSimulation(symbol, day_data, self.time())
-            for profit_target in ProfitabilityModel.PCT_PROFIT_TARGETS:
-                simulation.run(ProfitabilityModel.STOP_PCT, profit_target)
-                if simulation.result is StopSellSimulationResult.ERROR \
-                        or simulation.result is StopSellSimulationResult.LOSS:
-                    # We lost the entire stop-order amount if the price dipped enough to trigger it
-                    target_realized_pct_profits[profit_target].append(ProfitabilityModel.STOP_PCT * time_weight)
-                elif simulation.result is StopSellSimulationResult.NEVER_SOLD:
-                    # We lost/gained some amount between stop price and target price if neither was reached
-                    target_realized_pct_profits[profit_target].append(-0.1 * time_weight)
-                elif simulation.result is StopSellSimulationResult.PROFIT:
-                    # We gained the profit target amount if it was reached
-                    target_realized_pct_profits[profit_target].append(profit_target * time_weight)
-            time_weight += time_weight_increment
-
-        # Use list to calculate average and median realized profit for each target
-        target_avg_pct_profits = []
-        target_med_pct_profits = []
-        for profit_target in ProfitabilityModel.PCT_PROFIT_TARGETS:
-            target_avg_pct_profits.append(mean(target_realized_pct_profits[profit_target]))
-            target_med_pct_profits.append(median(target_realized_pct_profits[profit_target]))
-
-        return ProfitabilitySimulationResults(target_avg_pct_profits, target_med_pct_profits)
+        # Load each day's saved outcomes, simulating (and saving) those not saved yet
+        sim_params = self._sim_params()
+        saved_outcomes = self.mongo().load_sim_outcomes(symbol, dates[0], dates[-1], self.SIM_NAME, sim_params)
+        outcomes = np.zeros((len(dates), len(ProfitabilityModel.PCT_PROFIT_TARGETS)), dtype=np.int8)
+        for i, day in enumerate(dates):
+            day_outcomes = saved_outcomes.get(day)
+            if day_outcomes is None:
+                day_outcomes = self._simulate_day(self.mongo().load_symbol_day(symbol, day))
+                self.mongo().save_sim_outcomes(symbol, day, self.SIM_NAME, sim_params, day_outcomes)
+            outcomes[i] = day_outcomes
+
+        # Convert outcomes into profit realized using each profit target, favoring recent days
+        realized_pct_profits = np.zeros(outcomes.shape)
+        # We lost the entire stop-order amount if the price dipped enough to trigger it
+        realized_pct_profits[(outcomes == StopSellSimulationResult.ERROR.value)
+                             | (outcomes == StopSellSimulationResult.LOSS.value)] = ProfitabilityModel.STOP_PCT
+        # We lost/gained some amount between stop price and target price if neither was reached
+        realized_pct_profits[outcomes == StopSellSimulationResult.NEVER_SOLD.value] = -0.1
+        # We gained the profit target amount if it was reached
+        realized_pct_profits = np.where(outcomes == StopSellSimulationResult.PROFIT.value,
+                                        np.array(ProfitabilityModel.PCT_PROFIT_TARGETS), realized_pct_profits)
+        time_weights = 0.5 + np.arange(len(dates)) / len(dates)
+        realized_pct_profits *= time_weights[:, np.newaxis]
+
+        # Calculate average and median realized profit for each target
+        return ProfitabilitySimulationResults(realized_pct_profits.mean(axis=0).tolist(),
+                                              np.median(realized_pct_profits, axis=0).tolist())
+
+    def _simulate_day(self, day_data: SymbolDay) -> List[int]:
+        """Returns the outcome (a StopSellSimulationResult value) of targeting each profit target on the day."""
+        simulation = StopSellSimulation(day_data.symbol, day_data, self.time())
+        return simulation.run_many(ProfitabilityModel.STOP_PCT, ProfitabilityModel.PCT_PROFIT_TARGETS).tolist()
+
+    @classmethod
+    def _sim_params(cls) -> str:
+        """Returns a string identifying the simulation parameters, so outcomes saved using others are ignored."""
+        return ','.join(str(param) for param in [cls.SIM_VERSION, cls.STOP_PCT] + cls.PCT_PROFIT_TARGETS)
 
     def grade_symbol(self, symbol: str, output: OUTPUT_TYPE) -> SymbolGrade:
         """Returns a grade based on % of profit targets that yield profit in simulation."""
@@ -1,5 +1,8 @@
 from datetime import timedelta, datetime, time
 from enum import Enum
+from typing import Optional, Union, Sequence
+
+import numpy as np
 
 from tc2.env import TimeEnv
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
@@ -17,6 +20,10 @@ class StopSellSimulationResult(Enum):
 class StopSellSimulation:
     """Simulates buying a symbol at 10:45AM and trying to sell for profit or cut losses."""
 
+    # Number of consecutive, or total, seconds of bad data after which the day is not used
+    MAX_CONSEC_BAD_SECS = 5
+    MAX_TOTAL_BAD_SECS = 120
+
     result: StopSellSimulationResult
 
     def __init__(self, symbol: str, day_data: SymbolDay, time_env: TimeEnv) -> None:
@@ -29,19 +36,14 @@ class StopSellSimulation:
         self.result = StopSellSimulationResult.NEVER_SOLD
 
     def run(self, stop_pct: float, sell_target_pct: float) -> None:
-        # Get price data at 10:30AM
-        earliest_buy = datetime.combine(self.frame.now(), time(hour=10, minute=30))
-        latest_buy = datetime.combine(self.frame.now(), time(hour=11, minute=0))
-        sim_time = earliest_buy + timedelta(seconds=(earliest_buy - latest_buy).total_seconds() / 2)
-        first_candle = self.day_data.get_candle_at_sec(sim_time)
-
-        # Validate initial data, init variables
-        if first_candle is None or first_candle.open < 1:
-            self.frame.log(LogLevel.WARNING, 'CycleBuySimulation missing opening candle!')
+        self.result = StopSellSimulationResult.NEVER_SOLD
+
+        # Get price data at 10:45AM on the simulated day, init variables
+        first_candle_index = self._find_first_candle_index()
+        if first_candle_index is None:
             self.result = StopSellSimulationResult.ERROR
             return
-        buy_price = first_candle.open
-        first_candle_index = self.day_data.candles.index(first_candle, 0, -1)
+        buy_price = self.day_data.candles[first_candle_index].open
         floor_price = buy_price - (buy_price * stop_pct / 100)
         sell_price = buy_price + (buy_price * sell_target_pct / 100)
         consec_bad_secs = 0
@@ -53,11 +55,11 @@ class StopSellSimulation:
             if candle is None or candle.open < 1 or candle.low < 1 or candle.high < 0:
                 total_bad_secs += 1
                 consec_bad_secs += 1
-                if consec_bad_secs == 5:
+                if consec_bad_secs == self.MAX_CONSEC_BAD_SECS:
                     # Do not use this day if it's missing 5+ consecutive seconds of data
                     self.result = StopSellSimulationResult.ERROR
                     return
-                if total_bad_secs == 120:
+                if total_bad_secs == self.MAX_TOTAL_BAD_SECS:
                     # Do not use this day if it's missing 120+ seconds of data
                     self.result = StopSellSimulationResult.ERROR
                     return
@@ -73,3 +75,60 @@ class StopSellSimulation:
             if candle.open >= sell_price:
                 self.result = StopSellSimulationResult.PROFIT
                 return
+
+    def run_many(self,
+                 stop_pcts: Union[float, Sequence[float], np.ndarray],
+                 sell_target_pcts: Union[float, Sequence[float], np.ndarray]) -> np.ndarray:
+        """
+        Simulates every (stop, target) pair at once, with the same outcomes as calling run() for each pair.
+        The arrays are broadcast against each other, so e.g. a column of stops and a row of targets simulates a grid.
+
+        Instead of replaying the day once per pair, finds each pair's first sell using running extremes: the stop is
+        first hit at the first second whose running min low reaches the floor price, and the target at the first
+        second whose running max open reaches the sell price.
+        :return: an array of StopSellSimulationResult values, shaped like the broadcast inputs
+        """
+        stop_pcts, sell_target_pcts = np.broadcast_arrays(np.asarray(stop_pcts, dtype=np.float64),
+                                                          np.asarray(sell_target_pcts, dtype=np.float64))
+        first_candle_index = self._find_first_candle_index()
+        if first_candle_index is None:
+            return np.full(stop_pcts.shape, StopSellSimulationResult.ERROR.value, dtype=np.int8)
+        candles = self.day_data.candles[first_candle_index:-1]
+        buy_price = self.day_data.candles[first_candle_index].open
+        opens = np.fromiter((candle.open for candle in candles), dtype=np.float64, count=len(candles))
+        highs = np.fromiter((candle.high for candle in candles), dtype=np.float64, count=len(candles))
+        lows = np.fromiter((candle.low for candle in candles), dtype=np.float64, count=len(candles))
+
+        # Find the second at which the day is discarded for missing too much data
+        bad_secs = np.concatenate(([0], np.cumsum((opens < 1) | (lows < 1) | (highs < 0))))
+        consec_bad_idxs = np.flatnonzero(bad_secs[self.MAX_CONSEC_BAD_SECS:]
+                                         - bad_secs[:-self.MAX_CONSEC_BAD_SECS] == self.MAX_CONSEC_BAD_SECS)
+        error_idx = min(consec_bad_idxs[0] + self.MAX_CONSEC_BAD_SECS - 1 if len(consec_bad_idxs) > 0
+                        else len(candles),
+                        np.searchsorted(bad_secs[1:], self.MAX_TOTAL_BAD_SECS))
+
+        # Find the second at which each stop and each target is first reached
+        floor_prices = buy_price - (buy_price * stop_pcts / 100)
+        sell_prices = buy_price + (buy_price * sell_target_pcts / 100)
+        loss_idxs = np.searchsorted(-np.minimum.accumulate(lows), -floor_prices, side='left')
+        profit_idxs = np.searchsorted(np.maximum.accumulate(opens), sell_prices, side='left')
+
+        # Each second checks for missing data, then the stop, then the target
+        results = np.full(stop_pcts.shape, StopSellSimulationResult.NEVER_SOLD.value, dtype=np.int8)
+        results[profit_idxs < len(candles)] = StopSellSimulationResult.PROFIT.value
+        results[(loss_idxs < len(candles)) & (loss_idxs <= profit_idxs)] = StopSellSimulationResult.LOSS.value
+        if error_idx < len(candles):
+            results[error_idx <= np.minimum(loss_idxs, profit_idxs)] = StopSellSimulationResult.ERROR.value
+        return results
+
+    def _find_first_candle_index(self) -> Optional[int]:
+        """Returns the index of the candle at which to buy, or None if there is no valid price at which to buy."""
+        earliest_buy = datetime.combine(self.day_data.day_date, time(hour=10, minute=30))
+        latest_buy = datetime.combine(self.day_data.day_date, time(hour=11, minute=0))
+        sim_time = earliest_buy + timedelta(seconds=(latest_buy - earliest_buy).total_seconds() / 2)
+        first_candle_index = self.day_data.get_candle_index_at_sec(sim_time, max_lag_secs=60)
+        if first_candle_index is None or first_candle_index >= len(self.day_data.candles) - 1 \
+                or self.day_data.candles[first_candle_index].open < 1:
+            self.frame.log(LogLevel.WARNING, 'CycleBuySimulation missing opening candle!')
+            return None
+        return first_candle_index
@@ -1,6 +1,6 @@
 from tc2.stock_analysis.AbstractSpotModel import AbstractSpotModel
 from tc2.stock_analysis.ModelWeightingSystem import SymbolGrade, SymbolGradeValue
-from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.util.candle_util import validate_minute_bars
 from tc2.util.date_util import DATE_FORMAT
 
 
@@ -17,34 +17,27 @@ class High96PctModel(AbstractSpotModel):
         Returns True if the symbol's 12-hour high falls in the upper 4% of its 75-day range, False otherwise.
         """
 
-        # Fetch latest 12 hours of data
-        recent_candles = self.get_latest_candles(symbol, 60 * 12)
+        # Fetch latest 12 hours of data as minute bars
+        recent_bars = self.get_latest_bars(symbol, 60 * 12)
 
         # Validate 12-hour data
-        if not SymbolDay.validate_candles(recent_candles, min_minutes=60 * 12):
+        if not validate_minute_bars(recent_bars, min_minutes=60 * 12):
             self.error_process(
-                'High96PctModel candles ({}): {}'.format(len(recent_candles),
-                                                         [candle.open for candle in recent_candles][0:3]))
+                'High96PctModel bars ({}): {}'.format(len(recent_bars),
+                                                      [bar.open for bar in recent_bars][0:3]))
             raise ValueError('High96PctModel loaded invalid recent data')
 
-        # Fetch 75-day data
-        daily_candles_75 = []
-        day_date = self.time().now()
-        for i in range(75):
-            day_date = self.time().get_prev_mkt_day(day_date)
-            daily_candle = self.mongo().load_aggregate_candle(symbol, day_date)
-            if daily_candle is None:
-                raise ValueError('High96PctModel couldn\'t perform its check because we '
-                                 'don\'t have an aggregate candle for {}'.format(day_date.strftime(DATE_FORMAT)))
-            daily_candles_75.append(daily_candle)
-
-        # Compute 75-day price range
-        low_75 = min([candle.low for candle in daily_candles_75])
-        high_75 = max([candle.high for candle in daily_candles_75])
+        # Fetch 75-day price range
+        days_75 = self.time().get_prev_mkt_days(75)
+        stats_75 = self.mongo().load_daily_stats(symbol, days_75)
+        if stats_75 is None:
+            raise ValueError('High96PctModel couldn\'t perform its check because we don\'t have aggregate candles '
+                             'for every day from {} to {}'.format(days_75[0].strftime(DATE_FORMAT),
+                                                                 days_75[-1].strftime(DATE_FORMAT)))
 
         # Check whether 12-hour high falls in upper 4% of 75-day range
-        min_price_required = low_75 + (0.96 * (high_75 - low_75))
-        if max([candle.high for candle in recent_candles]) >= min_price_required:
+        min_price_required = stats_75.low + (0.96 * (stats_75.high - stats_75.low))
+        if max([bar.high for bar in recent_bars]) >= min_price_required:
             return True
         else:
             return False
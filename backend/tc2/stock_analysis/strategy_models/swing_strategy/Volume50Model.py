@@ -1,5 +1,3 @@
-from numpy import mean
-
 from tc2.stock_analysis.AbstractSpotModel import AbstractSpotModel
 from tc2.stock_analysis.ModelWeightingSystem import SymbolGrade, SymbolGradeValue
 from tc2.util.date_util import DATE_FORMAT
@@ -27,19 +25,15 @@ class Volume50Model(AbstractSpotModel):
             return False
 
         # Fetch aggregate data for the 50 days preceding latest_date
-        previous_date = latest_date
-        daily_candles_50 = []
-        for i in range(50):
-            previous_date = self.time().get_prev_mkt_day(previous_date)
-            daily_candle = self.mongo().load_aggregate_candle(symbol, previous_date)
-            if daily_candle is None:
-                self.debug_process('{} fails Volume50Model: missing daily candle for {}'
-                                   .format(symbol, previous_date.strftime(DATE_FORMAT)))
-                return False
-            daily_candles_50.append(daily_candle)
+        days_50 = self.time().get_prev_mkt_days(50, latest_date)
+        stats_50 = self.mongo().load_daily_stats(symbol, days_50)
+        if stats_50 is None:
+            self.debug_process('{} fails Volume50Model: missing daily candles between {} and {}'
+                               .format(symbol, days_50[0].strftime(DATE_FORMAT), days_50[-1].strftime(DATE_FORMAT)))
+            return False
 
         # Check whether the latest volume is at least 1.25 times the 50-day average volume
-        return latest_daily_candle.volume >= 1.25 * mean([daily_candle.volume for daily_candle in daily_candles_50])
+        return latest_daily_candle.volume >= 1.25 * stats_50.mean_volume
 
     def grade_symbol(self, symbol: str, output: OUTPUT_TYPE) -> SymbolGrade:
         """Assigns a pass/fail grade depending on whether the model output is True/False."""
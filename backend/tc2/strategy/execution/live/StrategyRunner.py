@@ -5,6 +5,7 @@ from datetime import timedelta
 from tc2.account import AbstractAccount
 from tc2.account.data_stream.StreamUpdateType import StreamUpdateType
 from tc2.env.ExecEnv import ExecEnv
+from tc2.metrics.Metrics import Metrics
 from tc2.strategy.AbstractStrategy import AbstractStrategy
 from tc2.strategy.execution.StrategyRun import StrategyRun
 
@@ -54,12 +55,10 @@ class StrategyRunner(ExecEnv):
                     # Wait half a second before processing the next batch of updates.
                     pytime.sleep(0.5)
                     # Get first update in the next batch.
-                    update_get_start = pytime.monotonic()
+                    update_get_start = Metrics.start()
                     update = acct.get_next_trading_update(self.strategy.get_symbols(),
                                                           self.strategy.run_info.strategy_start_time)
-                    update_get_time_ms = (pytime.monotonic() - update_get_start) * 1000.0
-                    if update_get_time_ms > 350:
-                        print(f'Took {update_get_time_ms:.0f}ms to get first update in batch')
+                    Metrics.record_since('runner.get_first_update', update_get_start)
                 except Exception as e:
                     self.error_process(f'Error fetching next data update for strategy:')
                     self.warn_process(f'{traceback.format_exc()}')
@@ -79,6 +78,7 @@ class StrategyRunner(ExecEnv):
                         if update.update_moment < self.strategy.time().now() - timedelta(seconds=7):
                             print(f'Ignoring old update from {update.update_moment:%M:%S} (now:'
                                   f' {self.strategy.time().now():%M:%S_%f})')
+                            Metrics.incr('runner.old_updates_ignored')
                             update = acct.get_next_trading_update(self.strategy.get_symbols(),
                                                                   self.strategy.run_info.strategy_start_time)
                             continue
@@ -86,17 +86,22 @@ class StrategyRunner(ExecEnv):
 
                         # Send the update to the strategy.
                         updates_processed += 0.95
+                        strategize_start = Metrics.start()
                         self.strategy.on_new_info(
                             symbol=update.get_symbol(),
                             moment=update.update_moment,
                             candle=None if update.update_type is not StreamUpdateType.CANDLE else update.get_candle(),
                             order=None if update.update_type is not StreamUpdateType.ORDER else update.get_order())
+                        Metrics.record_since('strategy.on_new_info', strategize_start)
                     except Exception as e:
                         self.strategy.error_process('Error executing strategy logic:')
                         self.warn_process(traceback.format_exc())
                     update = acct.get_next_trading_update(self.strategy.get_symbols(),
                                                           self.strategy.run_info.strategy_start_time)
 
+                # Periodically share this process's latency metrics with the webpanel.
+                Metrics.flush_if_due(self.redis())
+
         # After execution, cleanup open orders and positions
         acct.cancel_open_orders(symbols=self.strategy.get_symbols())
         acct.liquidate_positions(symbols=self.strategy.get_symbols())
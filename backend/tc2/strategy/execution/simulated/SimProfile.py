@@ -0,0 +1,104 @@
+import time as pytime
+from typing import Dict, List, Optional
+
+
+class SimPhase:
+    """The names of the phases of a simulation to which SimProfile attributes wall time."""
+    DATA_COPY = 'data_copy'
+    MODEL_TRAINING = 'model_training'
+    VIABILITY_LOOP = 'viability_loop'
+    REFRESH_ACCT = 'refresh_acct'
+    GET_NEXT_TRADING_UPDATE = 'get_next_trading_update'
+    ON_NEW_INFO = 'on_new_info'
+
+
+class _PhaseTimer:
+    """Adds the time spent inside a 'with' block to one of a SimProfile's phases."""
+
+    def __init__(self, profile: 'SimProfile', phase: str) -> None:
+        self.profile = profile
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = pytime.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.profile.add(self.phase, pytime.perf_counter() - self.start)
+
+
+class SimProfile:
+    """
+    Attributes the wall time of one or more simulations to their phases, e.g. model training or on_new_info().
+    Timers are cheap enough to wrap every step of a simulation, but are only used when profiling is requested.
+    """
+
+    # Phase name -> total secs spent in the phase
+    phase_secs: Dict[str, float]
+
+    # Phase name -> number of times the phase was entered
+    phase_calls: Dict[str, int]
+
+    # Number of simulated days whose times are included
+    days: int
+
+    # Total wall time (in secs) of the simulations, including time not attributed to any phase
+    total_secs: float
+
+    def __init__(self) -> None:
+        self.phase_secs = {}
+        self.phase_calls = {}
+        self.days = 0
+        self.total_secs = 0.0
+        self._timers = {}
+
+    def phase(self, phase: str) -> _PhaseTimer:
+        """Returns a context manager that adds the time spent inside it to the phase."""
+        timer = self._timers.get(phase)
+        if timer is None:
+            timer = self._timers[phase] = _PhaseTimer(self, phase)
+        return timer
+
+    def add(self, phase: str, secs: float, calls: int = 1) -> None:
+        """Adds time to the phase."""
+        self.phase_secs[phase] = self.phase_secs.get(phase, 0.0) + secs
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + calls
+
+    def finish_day(self, day_secs: float) -> None:
+        """Records the total wall time of one simulated day."""
+        self.days += 1
+        self.total_secs += day_secs
+
+    def merge(self, other: 'SimProfile') -> None:
+        """Adds the other profile's times into this one."""
+        for phase, secs in other.phase_secs.items():
+            self.add(phase, secs, other.phase_calls[phase])
+        self.days += other.days
+        self.total_secs += other.total_secs
+
+    def slowest_phase(self) -> Optional[str]:
+        """Returns the phase in which the most time was spent, or None if nothing was recorded."""
+        return max(self.phase_secs, key=self.phase_secs.get) if len(self.phase_secs) > 0 else None
+
+    def format_lines(self) -> List[str]:
+        """Returns one line per phase describing its average time per day, slowest phase first."""
+        days = max(1, self.days)
+        total_secs = max(self.total_secs, sum(self.phase_secs.values()))
+        lines = []
+        for phase in sorted(self.phase_secs, key=self.phase_secs.get, reverse=True):
+            secs = self.phase_secs[phase]
+            lines.append(f'{phase}: {secs / days:.3f}s per day ({100 * secs / max(total_secs, 1e-9):.0f}%) '
+                         f'over {self.phase_calls[phase] / days:.0f} calls per day')
+        unattributed_secs = total_secs - sum(self.phase_secs.values())
+        if self.total_secs > 0:
+            lines.append(f'other: {unattributed_secs / days:.3f}s per day '
+                         f'({100 * unattributed_secs / max(total_secs, 1e-9):.0f}%)')
+        return lines
+
+    def to_json(self) -> Dict[str, any]:
+        return {
+            'days': self.days,
+            'total_secs': self.total_secs,
+            'phase_secs': dict(self.phase_secs),
+            'phase_calls': dict(self.phase_calls)
+        }
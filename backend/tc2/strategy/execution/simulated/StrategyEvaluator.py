@@ -1,5 +1,8 @@
+from typing import Optional
+
 from tc2.env.ExecEnv import ExecEnv
 from tc2.strategy.AbstractStrategy import AbstractStrategy
+from tc2.strategy.execution.simulated.SimProfile import SimProfile
 from tc2.strategy.execution.simulated.StrategyEvaluation import StrategyEvaluation
 from tc2.strategy.execution.simulated.StrategySimulator import StrategySimulator
 
@@ -16,11 +19,16 @@ class StrategyEvaluator(ExecEnv):
 
         self.strategy = strategy
 
-    def evaluate(self) -> StrategyEvaluation:
+    def evaluate(self, profile: Optional[SimProfile] = None) -> StrategyEvaluation:
+        """
+        :param profile: if provided, the simulations are profiled and their phase times are added to it
+        """
         executions = []
-        simulator = StrategySimulator(self.strategy, self)
+        simulator = StrategySimulator(self.strategy, self, profile=profile is not None)
         self.info_process('DEBUG: StrategyEvaluator beginning simulation')
         execution = simulator.run()
         executions.append(execution)
+        if profile is not None:
+            profile.merge(simulator.profile)
 
         return StrategyEvaluation(executions)
@@ -1,6 +1,8 @@
+import time as pytime
 import traceback
+from contextlib import nullcontext
 from datetime import timedelta, datetime
-from typing import List
+from typing import List, Optional
 
 from tc2.account.VirtualAccount import VirtualAccount
 from tc2.account.data_stream.StreamUpdateType import StreamUpdateType
@@ -8,6 +10,7 @@ from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
 from tc2.env.ExecEnv import ExecEnv
 from tc2.strategy import AbstractStrategy
 from tc2.strategy.execution.StrategyRun import StrategyRun
+from tc2.strategy.execution.simulated.SimProfile import SimProfile, SimPhase
 from tc2.util import candle_util
 from tc2.util.market_util import CLOSE_TIME
 
@@ -24,13 +27,16 @@ class StrategySimulator(ExecEnv):
     sim_begin: datetime
     live_env: ExecEnv
     all_symbols: List[str]
+    profile: Optional[SimProfile]
 
     def __init__(self,
                  strategy: AbstractStrategy,
                  live_env: ExecEnv,
-                 all_symbols: List[str] = None) -> None:
+                 all_symbols: List[str] = None,
+                 profile: bool = False) -> None:
         """
         :param all_symbols: A list of all symbols needed for both trading and viability checks
+        :param profile: whether to attribute the simulation's wall time to its phases in self.profile
         """
         super().__init__(strategy.logfeed_program, strategy.logfeed_process)
         self.clone_same_thread(strategy)
@@ -40,6 +46,7 @@ class StrategySimulator(ExecEnv):
         self.sim_begin = self.time().now()
         self.live_env = live_env
         self.all_symbols = all_symbols if all_symbols is not None else strategy.get_symbols()
+        self.profile = SimProfile() if profile else None
 
     def run(self,
             warmup_days: int = 30,
@@ -51,6 +58,17 @@ class StrategySimulator(ExecEnv):
         :param update_interval: the number of ms to jump forward between logic loops
                 (in real trading this would be equal to the time between CPU cycles)
         """
+        run_start = pytime.perf_counter()
+        try:
+            return self._run(warmup_days, update_interval)
+        finally:
+            if self.profile is not None:
+                self.profile.finish_day(pytime.perf_counter() - run_start)
+
+    def _run(self,
+             warmup_days: int,
+             update_interval: int) -> StrategyRun:
+        """Loads price data, fast-forwards to when the strategy is runnable, and then executes the strategy."""
 
         """ I. Load price data into the simulation environment """
 
@@ -71,7 +89,8 @@ class StrategySimulator(ExecEnv):
                                                            end_date=self.time().get_next_mkt_day(
                                                                self.time().now().date()),
                                                            model_feeder=ModelFeeder(self),
-                                                           skip_last_day_training=True)
+                                                           skip_last_day_training=True,
+                                                           profile=self.profile)
         if data_copy_error is not None:
             self.warn_process(data_copy_error)
             return StrategyRun(symbol_runs=self.strategy.get_symbols(),
@@ -132,30 +151,31 @@ class StrategySimulator(ExecEnv):
         strategy_became_viable = False
 
         # Wait for strategy to become viable (pass all its models)
-        while True:
-
-            # Fast forward 30 seconds
-            self.time().set_moment(self.time().now() + viability_check_incr)
-            self.strategy.run_info.start_time = self.time().now()
-
-            # Check viability.
-            if len(self.strategy.score_symbols(self.strategy.get_symbols())) == 0:
-                # If strategy never becomes viable during its run window, cancel simulation.
-                if not self.strategy.times_active().contains_time(self.time().now()) \
-                        or self.time().now().time() >= CLOSE_TIME:
-                    self.strategy.stop_running(sell_price=None)
-                    self.info_process(f'{self.strategy.get_id()} never became viable during its run window')
-                    break
-                # Else, check again.
-                else:
-                    continue
+        with self._phase(SimPhase.VIABILITY_LOOP):
+            while True:
 
-            # Exit loop when strategy becomes viable.
-            else:
-                self.debug_process(f'STRATEGY BECAME VIABLE AT {self.time().now()}')
-                strategy_became_viable = True
+                # Fast forward 30 seconds
+                self.time().set_moment(self.time().now() + viability_check_incr)
                 self.strategy.run_info.start_time = self.time().now()
-                break
+
+                # Check viability.
+                if len(self.strategy.score_symbols(self.strategy.get_symbols())) == 0:
+                    # If strategy never becomes viable during its run window, cancel simulation.
+                    if not self.strategy.times_active().contains_time(self.time().now()) \
+                            or self.time().now().time() >= CLOSE_TIME:
+                        self.strategy.stop_running(sell_price=None)
+                        self.info_process(f'{self.strategy.get_id()} never became viable during its run window')
+                        break
+                    # Else, check again.
+                    else:
+                        continue
+
+                # Exit loop when strategy becomes viable.
+                else:
+                    self.debug_process(f'STRATEGY BECAME VIABLE AT {self.time().now()}')
+                    strategy_became_viable = True
+                    self.strategy.run_info.start_time = self.time().now()
+                    break
 
         # Now the strategy is viable. Start executing it.
 
@@ -170,27 +190,34 @@ class StrategySimulator(ExecEnv):
 
         # Execute while markets are open and nothing calls strategy.stop_running()
         self.debug_process('Beginning simulated strategy execution')
+        refresh_timer = self._phase(SimPhase.REFRESH_ACCT)
+        next_update_timer = self._phase(SimPhase.GET_NEXT_TRADING_UPDATE)
+        new_info_timer = self._phase(SimPhase.ON_NEW_INFO)
         while self.strategy.is_running() and self.time().now().time() < CLOSE_TIME:
 
             # Refresh account info to simulate receiving a message from the stream.
             # This will add new updates to the account's queue.
-            for day_data in symbol_datas:
-                acct.refresh_acct(self.time().now(), day_data)
+            with refresh_timer:
+                for day_data in symbol_datas:
+                    acct.refresh_acct(self.time().now(), day_data)
 
             # Run the strategy's logic if a new candle or order is received.
             try:
-                update = acct.get_next_trading_update(self.strategy.get_symbols(),
-                                                      self.strategy.run_info.strategy_start_time)
+                with next_update_timer:
+                    update = acct.get_next_trading_update(self.strategy.get_symbols(),
+                                                          self.strategy.run_info.strategy_start_time)
                 updates_processed = 0
                 while update is not None and self.strategy.is_running() and updates_processed < 50:
                     updates_processed += 1
-                    self.strategy.on_new_info(
-                        symbol=update.get_symbol(),
-                        moment=update.update_moment,
-                        candle=None if update.update_type is not StreamUpdateType.CANDLE else update.get_candle(),
-                        order=None if update.update_type is not StreamUpdateType.ORDER else update.get_order())
-                    update = acct.get_next_trading_update(self.strategy.get_symbols(),
-                                                      self.strategy.run_info.strategy_start_time)
+                    with new_info_timer:
+                        self.strategy.on_new_info(
+                            symbol=update.get_symbol(),
+                            moment=update.update_moment,
+                            candle=None if update.update_type is not StreamUpdateType.CANDLE else update.get_candle(),
+                            order=None if update.update_type is not StreamUpdateType.ORDER else update.get_order())
+                    with next_update_timer:
+                        update = acct.get_next_trading_update(self.strategy.get_symbols(),
+                                                              self.strategy.run_info.strategy_start_time)
                 if updates_processed > 20:
                     self.warn_process(f'Simulated strategy processed {updates_processed} updates at once '
                                       f'(should be less than 5)')
@@ -209,5 +236,9 @@ class StrategySimulator(ExecEnv):
         # Return execution data for the user to see.
         return self.strategy.run_info
 
+    def _phase(self, phase: str):
+        """Returns a context manager that times the phase if profiling, or does nothing otherwise."""
+        return nullcontext() if self.profile is None else self.profile.phase(phase)
+
     def incr_time(self, milliseconds: int = 0, minutes: int = 0) -> None:
         self.time().set_moment(self.time().now() + timedelta(minutes=minutes, milliseconds=milliseconds))
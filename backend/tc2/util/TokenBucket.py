@@ -0,0 +1,62 @@
+import threading
+import time as pytime
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at a fixed rate, up to a maximum burst size. Each call to acquire() blocks until
+    enough tokens are available, so any number of threads sharing one bucket never exceed its rate combined.
+    """
+
+    rate: float
+    capacity: float
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        :param rate: the number of tokens added per second
+        :param capacity: the maximum number of tokens that can accumulate (i.e. the largest allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+
+        # Private variables
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._last_refill = pytime.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks until the given number of tokens can be taken from the bucket, then takes them.
+        :return: the number of seconds spent waiting
+        """
+        start = pytime.monotonic()
+        while True:
+            with self._lock:
+                now = pytime.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return now - start
+                wait = max(self._paused_until - now, (tokens - self._tokens) / self.rate)
+            pytime.sleep(wait)
+
+    def pause(self, secs: float) -> None:
+        """
+        Empties the bucket and stops it from granting tokens for the given number of seconds.
+        Used to back off every thread at once after the API reports that its rate limit was exceeded.
+        """
+        with self._lock:
+            now = pytime.monotonic()
+            self._tokens = 0.0
+            self._last_refill = now
+            self._paused_until = max(self._paused_until, now + secs)
+
+    def _refill(self, now: float) -> None:
+        """Adds the tokens accumulated since the last refill. Tokens do not accumulate while paused."""
+        refill_start = max(self._last_refill, self._paused_until)
+        if now > refill_start:
+            self._tokens = min(self.capacity, self._tokens + (now - refill_start) * self.rate)
+        self._last_refill = max(self._last_refill, now)
@@ -1,10 +1,17 @@
+import time as pytime
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta
 from statistics import mean, stdev
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Iterator
+
+import numpy as np
 
 from tc2.data.data_structs.price_data.Candle import Candle
+from tc2.data.data_structs.price_data.CandleStats import CandleStats
+from tc2.data.data_structs.price_data.DailyCandle import DailyCandle
 from tc2.data.data_structs.price_data.MinuteCandle import MinuteCandle
 from tc2.data.data_structs.price_data.SymbolDay import SymbolDay
+from tc2.strategy.execution.simulated.SimProfile import SimPhase, SimProfile
 from tc2.util.TimeInterval import ContinuousTimeInterval, TimeInterval
 
 
@@ -147,50 +154,166 @@ def aggregate_minute_candles(candles: List[Candle]) -> List[MinuteCandle]:
     return minute_candles
 
 
+def aggregate_bar_array(candles: List[Candle], bar_secs: int) -> np.ndarray:
+    """
+    Aggregates one day's second-resolution candles into bars lasting bar_secs seconds, using vectorized operations.
+    Bars start at multiples of bar_secs after midnight, and bars without candles are omitted.
+    :return: an (n, 11) array of [seconds since midnight at bar start, open, high, low, close, volume, number of
+        candles, first candle's offset (secs) from bar start, last candle's offset, longest gap (secs) between the
+        bar's candles, lowest price or volume of any of the bar's candles]
+    """
+    if len(candles) == 0:
+        return np.zeros((0, 11), dtype=np.float64)
+
+    # Find the start of each candle's bar
+    midnight = datetime.combine(candles[0].moment.date(), datetime.min.time())
+    candle_secs = np.fromiter(((candle.moment.replace(tzinfo=None) - midnight) // timedelta(seconds=1)
+                               for candle in candles), dtype=np.int64, count=len(candles))
+    prices = np.array([[candle.open, candle.high, candle.low, candle.close, candle.volume] for candle in candles],
+                      dtype=np.float64)
+    if np.any(candle_secs[1:] < candle_secs[:-1]):
+        order = np.argsort(candle_secs, kind='stable')
+        candle_secs, prices = candle_secs[order], prices[order]
+    bar_starts = candle_secs // bar_secs * bar_secs
+
+    # Measure the gap before each candle, ignoring gaps that span two bars
+    first_idxs = np.flatnonzero(np.concatenate(([True], bar_starts[1:] != bar_starts[:-1])))
+    last_idxs = np.concatenate((first_idxs[1:], [len(bar_starts)])) - 1
+    gaps = np.zeros(len(candle_secs), dtype=np.int64)
+    gaps[1:] = np.diff(candle_secs)
+    gaps[first_idxs] = 0
+
+    # Aggregate each bar's candles
+    return np.column_stack((bar_starts[first_idxs],
+                            prices[first_idxs, 0],
+                            np.maximum.reduceat(prices[:, 1], first_idxs),
+                            np.minimum.reduceat(prices[:, 2], first_idxs),
+                            prices[last_idxs, 3],
+                            np.add.reduceat(prices[:, 4], first_idxs),
+                            last_idxs - first_idxs + 1,
+                            candle_secs[first_idxs] - bar_starts[first_idxs],
+                            candle_secs[last_idxs] - bar_starts[first_idxs],
+                            np.maximum.reduceat(gaps, first_idxs),
+                            np.minimum.reduceat(prices.min(axis=1), first_idxs)))
+
+
+def bar_array_to_candles(bar_array: np.ndarray, day_date: date) -> List[MinuteCandle]:
+    """Converts an array created by aggregate_bar_array() into a list of MinuteCandle objects."""
+    midnight = datetime.combine(day_date, datetime.min.time())
+    return [MinuteCandle(minute=midnight + timedelta(seconds=bar_start), open=bar_open, high=bar_high, low=bar_low,
+                         close=bar_close, volume=int(volume), num_candles=int(num_candles),
+                         first_candle_offset=int(first_offset), last_candle_offset=int(last_offset),
+                         longest_gap=int(longest_gap), lowest_value=lowest_value)
+            for bar_start, bar_open, bar_high, bar_low, bar_close, volume,
+                num_candles, first_offset, last_offset, longest_gap, lowest_value in bar_array.tolist()]
+
+
+def daily_array_to_candles(daily_array: np.ndarray) -> List[DailyCandle]:
+    """Converts an array returned by load_aggregate_candles() into a list of DailyCandle objects."""
+    return [DailyCandle(day_date=date.fromordinal(int(day_ordinal)), open=day_open, high=day_high, low=day_low,
+                        close=day_close, volume=int(volume))
+            for day_ordinal, day_open, day_high, day_low, day_close, volume in daily_array.tolist()]
+
+
+def aggregate_bars(candles: List[Candle], bar_secs: int) -> List[MinuteCandle]:
+    """
+    Aggregates one day's second-resolution Candles into MinuteCandles lasting bar_secs seconds.
+    Unlike aggregate_minute_candles(), every candle is included in the bar containing it.
+    """
+    if len(candles) == 0:
+        return []
+    return bar_array_to_candles(aggregate_bar_array(candles, bar_secs), candles[0].moment.date())
+
+
+def validate_minute_bars(bars: List[MinuteCandle],
+                         min_minutes: int,
+                         check_secs: bool = True,
+                         check_prices: bool = True,
+                         max_gap: int = 160,
+                         gap_graces: int = 5,
+                         debug_output: Optional[List[str]] = None) -> bool:
+    """
+    Validates minute bars exactly as SymbolDay.validate_candles() would validate the candles they were aggregated
+    from, using the candle stats stored in each bar instead of the candles themselves.
+    Bars without candle stats (i.e. not created by aggregate_bar_array()) can't be validated and are rejected.
+    """
+    stats = CandleStats.from_minute_bars(bars)
+    if stats is None:
+        if debug_output is not None:
+            debug_output.append('couldn\'t validate bars because they don\'t contain candle stats')
+        return False
+    return SymbolDay.validate_candle_stats(stats, min_minutes=min_minutes, check_secs=check_secs,
+                                           check_prices=check_prices, max_gap=max_gap, gap_graces=gap_graces,
+                                           debug_output=debug_output)
+
+
 def init_simulation_data(live_env: 'ExecEnv',
                          sim_env: 'ExecEnv',
                          symbols: List[str],
                          days: int,
                          end_date: date,
                          model_feeder: 'ModelFeeder',
-                         skip_last_day_training: bool = False) -> Optional[str]:
+                         skip_last_day_training: bool = False,
+                         profile: Optional[SimProfile] = None) -> Optional[str]:
     """
     WARNING: this will change the time of the simulated environment, sim_env.
 
     :param days: the number of market days to fill with data before (including) end_date
     :param skip_last_day_training: whether or not to skip training analysis models on end_date
+    :param profile: if provided, time spent copying data and training models is added to it
     Copies live data into the simulation environment and trains analysis models.
     Returns None if successful. Otherwise the error message is returned.
     """
 
     # Go back n days from end_date.
-    day_date = end_date
+    start_date = end_date
     for i in range(days):
-        day_date = live_env.time().get_prev_mkt_day(day_date)
-
-    # Copy data for each day into simulation environment and train models.
-    for i in range(days + 1):
-        for symbol in symbols:
-            # Load data from live environment.
-            day_data = live_env.mongo().load_symbol_day(symbol=symbol, day=day_date)
-
-            # Validate data.
-            if not SymbolDay.validate_candles(day_data.candles):
-                return f'Couldn\'t set up {days}-day simulation environment for {symbol} ending at ' \
-                       f'{end_date:%Y-%m-%d}. Data missing on {day_date:%Y-%m-%d}'
-
-            # Copy data into the simulated environment.
-            sim_env.mongo().save_symbol_day(day_data)
-
-            # Train models.
-            if day_date != end_date or not skip_last_day_training:
-                model_feeder.train_models(symbol=symbol,
-                                          day_date=day_date,
-                                          day_data=day_data,
-                                          stable=True)
-
-        # Move to the next day.
-        day_date = live_env.time().get_next_mkt_day(day_date)
+        start_date = live_env.time().get_prev_mkt_day(start_date)
+
+    # Time copying data if profiling.
+    data_copy_timer = nullcontext() if profile is None else profile.phase(SimPhase.DATA_COPY)
+
+    # Copy each symbol's data into simulation environment and train models on all its days in one batch.
+    for symbol in symbols:
+        data_copy_error = None
+
+        def copy_days() -> Iterator[SymbolDay]:
+            """Copies each of the symbol's days, yielding those to train models on."""
+            nonlocal data_copy_error
+            day_date = start_date
+            for i in range(days + 1):
+                with data_copy_timer:
+                    # Load data from live environment.
+                    day_data = live_env.mongo().load_symbol_day(symbol=symbol, day=day_date)
+
+                    # Validate data.
+                    if not SymbolDay.validate_candles(day_data.candles):
+                        data_copy_error = f'Couldn\'t set up {days}-day simulation environment for {symbol} ' \
+                                          f'ending at {end_date:%Y-%m-%d}. Data missing on {day_date:%Y-%m-%d}'
+                        return
+
+                    # Copy data into the simulated environment.
+                    sim_env.mongo().save_symbol_day(day_data)
+
+                # Train models.
+                if day_date != end_date or not skip_last_day_training:
+                    yield day_data
+
+                # Move to the next day.
+                day_date = live_env.time().get_next_mkt_day(day_date)
+
+        # Train models while copying, attributing time spent copying to the data copy phase.
+        training_start = pytime.perf_counter()
+        copy_secs_before = 0.0 if profile is None else profile.phase_secs.get(SimPhase.DATA_COPY, 0.0)
+        model_feeder.train_models_batch(symbol=symbol,
+                                        days=copy_days(),
+                                        stable=True)
+        if profile is not None:
+            copy_secs = profile.phase_secs.get(SimPhase.DATA_COPY, 0.0) - copy_secs_before
+            profile.add(SimPhase.MODEL_TRAINING, pytime.perf_counter() - training_start - copy_secs)
+
+        if data_copy_error is not None:
+            return data_copy_error
 
 
 def get_steady_range(candles: List[Candle],
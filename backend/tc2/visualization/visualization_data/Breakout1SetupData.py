@@ -1,13 +1,13 @@
 from datetime import datetime
 from typing import Dict, List
 
+from tc2.data.data_structs.price_data.BarResolution import BarResolution
 from tc2.stock_analysis.AnalysisModelType import AnalysisModelType
 from tc2.stock_analysis.strategy_models.breakout1_strategy.Breakout1Model import Breakout1Model
 from tc2.stock_analysis.strategy_models.breakout1_strategy.Breakout1ModelOutput import Breakout1ModelOutput
 from tc2.data.stock_data_collection.ModelFeeder import ModelFeeder
 from tc2.env.ExecEnv import ExecEnv
 from tc2.util import candle_util
-from tc2.util.candle_util import aggregate_minute_candles
 from tc2.util.date_util import DATE_TIME_FORMAT
 from tc2.visualization.VisualType import VisualType
 from tc2.visualization.visualization_data.AbstractVisualizationData import AbstractVisualizationData
@@ -92,8 +92,8 @@ class Breakout1SetupData(AbstractVisualizationData):
         model_data = model.calculate_output(symbol)
 
         # Return the price graph data in a neat object
-        day_minute_candles = aggregate_minute_candles(
-            sim_env.mongo().load_symbol_day(symbol=symbol, day=check_moment.date()).candles)
+        day_minute_candles = sim_env.mongo().load_bars(symbol=symbol, day=check_moment.date(),
+                                                       resolution=BarResolution.MINUTE)
         live_env.info_process('Generated breakout1 setup visual')
         return Breakout1SetupData(symbol=symbol,
                                   check_moment=check_moment,
@@ -3,6 +3,7 @@ from typing import Dict, List
 
 from tc2.env.ExecEnv import ExecEnv
 from tc2.strategy.strategies.swing1.SwingStrategy import SwingStrategy
+from tc2.util.candle_util import daily_array_to_candles
 from tc2.util.data_constants import START_DATE
 from tc2.util.date_util import DATE_TIME_FORMAT, DATE_FORMAT
 from tc2.visualization.VisualType import VisualType
@@ -113,12 +114,12 @@ class SwingSetupData(AbstractVisualizationData):
             pass
 
         # Load all daily aggregate candles for the symbol
-        daily_candles = [live_env.mongo().load_aggregate_candle(day_date) for day_date in dates_on_file]
+        daily_candles = daily_array_to_candles(
+            live_env.mongo().load_aggregate_candles(symbol, dates_on_file[0], dates_on_file[-1]))
 
         # Return the price graph data in a neat object
         return SwingSetupData(symbol=symbol,
-                              daily_candles=[daily_candle.to_json() for daily_candle in daily_candles if
-                                             daily_candle is not None],
+                              daily_candles=[daily_candle.to_json() for daily_candle in daily_candles],
                               viable_days=[viable_day.to_json() for viable_day in swing_viable_days],
                               last_updated=live_env.time().now())
 
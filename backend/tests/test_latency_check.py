@@ -0,0 +1,85 @@
+"""
+Runs LatencyCheck in separate processes against a shared redis server, as the health check scheduler does.
+
+Set REDIS_TEST_HOST and REDIS_TEST_PORT to use a server other than localhost:6379.
+The tests are skipped if the server can't be reached. Data is kept under the BENCHMARK environment's prefix.
+"""
+import multiprocessing
+import os
+import time as pytime
+import unittest
+from datetime import datetime
+
+REDIS_HOST = os.environ.get('REDIS_TEST_HOST', 'localhost')
+REDIS_PORT = os.environ.get('REDIS_TEST_PORT', '6379')
+
+
+def connect_redis() -> 'RedisManager':
+    from tc2.data.data_storage.redis.RedisManager import RedisManager
+    from tc2.env.EnvType import EnvType
+
+    redis = RedisManager(None, EnvType.BENCHMARK)
+    if not redis.connect(REDIS_HOST, REDIS_PORT):
+        raise ConnectionError(f'Could not connect to redis at {REDIS_HOST}:{REDIS_PORT}')
+    return redis
+
+
+def run_latency_check(results: multiprocessing.Queue) -> None:
+    """Runs a LatencyCheck using new redis connections and puts whether it passed into the queue."""
+    from tc2.env.EnvType import EnvType
+    from tc2.env.ExecEnv import ExecEnv
+    from tc2.env.TimeEnv import TimeEnv
+    from tc2.health_checking.health_check.LatencyCheck import LatencyCheck
+    from tc2.metrics.Metrics import Metrics
+
+    Metrics.set_process_label(f'LatencyCheckTest-{os.getpid()}')
+    Metrics.record('alpaca.submit_order', 1.0)
+    env = ExecEnv(None, None)
+    env.env_type = EnvType.BENCHMARK
+    env._time = TimeEnv(datetime.now())
+    env._data_collector = None
+    env._mongo = None
+    env._redis = connect_redis()
+    env._settings = {}
+    env._data_loaded = {}
+    env._pid = os.getpid()
+    results.put(LatencyCheck(env, env).run().passing)
+
+
+class LatencyCheckTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        try:
+            self.redis = connect_redis()
+        except Exception as e:
+            self.skipTest(f'redis server unavailable: {e}')
+        self.redis.client.delete(self.redis.metrics_worker.get_prefix() + 'METRICS-EVENTS-alpaca.order_errors')
+        self.redis.clear_metrics_snapshots()
+
+    def run_check_in_process(self) -> bool:
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        check_process = context.Process(target=run_latency_check, args=(results,))
+        check_process.start()
+        passed = results.get(timeout=60)
+        check_process.join()
+        self.assertEqual(check_process.exitcode, 0)
+        return passed
+
+    def test_order_errors_outside_window_are_forgotten_across_processes(self) -> None:
+        from tc2.health_checking.health_check.LatencyCheck import LatencyCheck
+        from tc2.metrics.Metrics import Metrics, EVENT_RETENTION_SECS
+
+        # An error from before the window shouldn't fail a check run in a new process
+        self.redis.record_metric_event('alpaca.order_errors',
+                                       pytime.time() - LatencyCheck.ORDER_ERROR_WINDOW_SECS - 60,
+                                       EVENT_RETENTION_SECS)
+        self.assertTrue(self.run_check_in_process())
+
+        # A recent error recorded by this process should fail a check run in another new process
+        Metrics.record_event('alpaca.order_errors', self.redis)
+        self.assertFalse(self.run_check_in_process())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Feeds PolygonDataCollector fake pages of trades to check that failures while fetching or aggregating a day
+fail the whole day, and never leave the fetcher thread running.
+"""
+import threading
+import unittest
+from datetime import datetime, date
+from unittest import mock
+
+from pytz import timezone
+
+from tc2.data.stock_data_collection.PolygonDataCollector import PolygonDataCollector
+from tc2.data.stock_data_collection.TickAggregator import TickAggregator, NS_PER_SEC
+from tc2.env.TimeEnv import TimeEnv
+from tc2.util.market_util import OPEN_TIME
+
+DAY = date(2020, 3, 2)
+
+# The number of trades in each fake page, and the number of pages before trades run out
+TRADES_PER_PAGE = 5
+NUM_PAGES = 20
+
+
+class FakePolygonClient:
+    """Returns pages of one trade per second, starting after the requested timestamp."""
+
+    def __init__(self, malformed_page: int = -1) -> None:
+        self.malformed_page = malformed_page
+        self.pages_fetched = 0
+        self.polygon = self
+
+    def get(self, path: str, params: dict, version: str) -> dict:
+        start_ns = int(timezone('America/New_York').localize(datetime.combine(DAY, OPEN_TIME)).timestamp()) \
+                   * NS_PER_SEC
+        if self.pages_fetched >= NUM_PAGES:
+            return {'results': []}
+        ticks = [{'t': params['timestamp'] + (i + 1) * NS_PER_SEC, 'p': 10.0 + i, 's': 100}
+                 for i in range(TRADES_PER_PAGE)]
+        if self.pages_fetched == 0:
+            ticks[0]['t'] = start_ns
+        if self.pages_fetched == self.malformed_page:
+            del ticks[2]['p']
+        self.pages_fetched += 1
+        return {'results': ticks}
+
+
+class PolygonDataCollectorTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.collector = PolygonDataCollector(None, None, TimeEnv(datetime.combine(DAY, OPEN_TIME)))
+        self.threads_before = set(threading.enumerate())
+
+    def collect(self, client: FakePolygonClient):
+        with mock.patch.object(PolygonDataCollector, '_rest_client', return_value=client), \
+                mock.patch.object(PolygonDataCollector.rate_limiter, 'acquire'):
+            return self.collector.collect_candles_for_day(DAY, 'SPY')
+
+    def assert_no_threads_left(self) -> None:
+        self.assertEqual(set(threading.enumerate()) - self.threads_before, set())
+
+    def test_complete_day_is_collected(self) -> None:
+        day_data = self.collect(FakePolygonClient())
+        self.assertIsNotNone(day_data)
+        self.assertEqual(len(day_data.candles), TRADES_PER_PAGE * NUM_PAGES)
+        self.assert_no_threads_left()
+
+    def test_malformed_page_fails_the_day(self) -> None:
+        client = FakePolygonClient(malformed_page=3)
+        self.assertIsNone(self.collect(client))
+        self.assertEqual(client.pages_fetched, 4)
+        self.assert_no_threads_left()
+
+    def test_aggregation_error_fails_the_day_and_stops_the_fetcher(self) -> None:
+        client = FakePolygonClient()
+        with mock.patch.object(TickAggregator, 'fold', side_effect=ValueError('bad page')):
+            self.assertIsNone(self.collect(client))
+        self.assertLess(client.pages_fetched, NUM_PAGES)
+        self.assert_no_threads_left()
+
+
+if __name__ == '__main__':
+    unittest.main()
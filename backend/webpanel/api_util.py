@@ -56,10 +56,9 @@ def fork_sim_env_health() -> 'ExecEnv':
                                                redis=RedisManager(None, EnvType.HEALTH_CHECKING))
         return shared.sim_env_health
 
-    # Wipe databases
-    shared.sim_env_visuals.reset_dbs()
-
+    # Create new database connections for this thread, then wipe the databases
     shared.sim_env_health.fork_new_thread(creator_env=shared.sim_env_health)
+    shared.sim_env_health.reset_dbs()
     return shared.sim_env_health
 
 
@@ -90,45 +89,45 @@ def fork_sim_env_visuals() -> 'ExecEnv':
                                                                    EnvType.VISUAL_GENERATION))
         return shared.sim_env_visuals
 
-    # Wipe databases
-    shared.sim_env_visuals.reset_dbs()
-
+    # Create new database connections for this thread, then wipe the databases
     shared.sim_env_visuals.fork_new_thread(creator_env=shared.sim_env_visuals)
+    shared.sim_env_visuals.reset_dbs()
     return shared.sim_env_visuals
 
 
 def fork_sim_env_simulations() -> 'ExecEnv':
     """
-    Returns an execution environment of type SIMULATION that can be used by the calling thread.
+    Returns a new execution environment of type SIMULATION that can be used by the calling thread.
+    Its databases are kept in memory and belong to it alone, so simulations can't wipe each other's data.
+    """
+    sim_env = create_private_sim_env(shared.program.logfeed_api)
+    shared.sim_env_simulations = sim_env
+    return sim_env
+
+
+def create_private_sim_env(logfeed_process: 'LogFeed') -> 'ExecEnv':
+    """
+    Returns a new execution environment of type SIMULATION that can be used by the calling thread.
+    Its databases are kept in memory and belong to it alone.
     """
     from tc2.env.ExecEnv import ExecEnv
     from tc2.env.EnvType import EnvType
     from tc2.env.TimeEnv import TimeEnv
-    from tc2.data.data_storage.redis.RedisManager import RedisManager
-    from tc2.data.data_storage.mongo.MongoManager import MongoManager
+    from tc2.data.data_storage.storage_backends import create_mongo_manager, create_redis_manager
     from tc2.data.stock_data_collection.PolygonDataCollector import PolygonDataCollector
 
-    if shared.sim_env_visuals is None:
-        shared.sim_env_simulations = ExecEnv(shared.program.logfeed_program, shared.program.logfeed_api)
-        sim_time = TimeEnv(datetime.now())
-        shared.sim_env_simulations.setup_first_time(env_type=EnvType.SIMULATION,
-                                                    time=sim_time,
-                                                    data_collector=PolygonDataCollector(
-                                                        logfeed_program=shared.program.logfeed_program,
-                                                        logfeed_process=shared.program.logfeed_api,
-                                                        time_env=sim_time
-                                                    ),
-                                                    mongo=MongoManager(shared.program.logfeed_api,
-                                                                       EnvType.SIMULATION),
-                                                    redis=RedisManager(shared.program.logfeed_api,
-                                                                       EnvType.SIMULATION))
-        return shared.sim_env_simulations
-
-    # Wipe databases
-    shared.sim_env_simulations.reset_dbs()
-
-    shared.sim_env_visuals.fork_new_thread(creator_env=shared.sim_env_simulations)
-    return shared.sim_env_simulations
+    sim_env = ExecEnv(shared.program.logfeed_program, logfeed_process)
+    sim_time = TimeEnv(datetime.now())
+    sim_env.setup_first_time(env_type=EnvType.SIMULATION,
+                             time=sim_time,
+                             data_collector=PolygonDataCollector(
+                                 logfeed_program=shared.program.logfeed_program,
+                                 logfeed_process=logfeed_process,
+                                 time_env=sim_time
+                             ),
+                             mongo=create_mongo_manager(logfeed_process, EnvType.SIMULATION),
+                             redis=create_redis_manager(logfeed_process, EnvType.SIMULATION))
+    return sim_env
 
 
 url_encode_mappings = {
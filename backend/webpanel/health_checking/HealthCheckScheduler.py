@@ -0,0 +1,334 @@
+import threading
+import time as pytime
+import traceback
+from collections import deque
+from datetime import datetime, timedelta
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from threading import Thread
+from typing import Dict, Optional, Tuple
+
+
+class HealthCheckScheduler:
+    """
+    Runs health checks in the background, several at a time, and caches their results.
+
+    Each check runs in its own process with its own database connections and its own simulated environment,
+    so checks neither block the API nor compete with live trading for a connection. A check that runs past its
+    timeout is terminated and recorded as failing. A check whose latest result is younger than its TTL is not
+    run again unless forced.
+
+    Check processes are forked by a single-threaded launcher process (see start()) instead of by the webpanel
+    process, whose other threads could hold locks that a forked process would inherit in a locked state.
+    Visuals requested through the webpanel are generated by processes forked the same way.
+
+    All modules under the tc2 package must be imported locally, as in HealthChecker.
+    """
+
+    # Max number of health checks (and visual generations) to run at the same time
+    MAX_CONCURRENT_CHECKS = 3
+
+    # Max number of seconds each type of check may run before being terminated
+    CHECK_TIMEOUTS = {
+        'MODEL_FEEDING': 15 * 60,
+        'SIM_OUTPUT': 15 * 60,
+        'SIM_TIMINGS': 15 * 60,
+        'MONGO': 3 * 60
+    }
+    DEFAULT_TIMEOUT = 5 * 60
+
+    # Max number of seconds a visual's generation may run before being terminated
+    VISUAL_TIMEOUT = 15 * 60
+
+    # Number of seconds for which each type of check's latest result is considered fresh
+    RESULT_TTLS = {
+        'ALPACA': 5 * 60,
+        'LATENCY': 5 * 60,
+        'POLYGON': 10 * 60,
+        'DATA': 6 * 3600,
+        'DIP45': 6 * 3600,
+        'MODEL_FEEDING': 6 * 3600,
+        'SIM_OUTPUT': 6 * 3600,
+        'SIM_TIMINGS': 6 * 3600
+    }
+    DEFAULT_RESULT_TTL = 60 * 60
+
+    # Check types whose checks exercise the simulated environment's database servers instead of in-memory databases
+    DB_SERVER_CHECKS = ['MONGO']
+
+    # Number of seconds the launcher waits for a new job before checking on running ones
+    LAUNCHER_POLL_INTERVAL = 0.5
+
+    # The kinds of jobs the launcher runs
+    CHECK_JOB = 'check'
+    VISUAL_JOB = 'visual'
+
+    def __init__(self) -> None:
+        # Private variables
+        self._lock = threading.Lock()
+        self._running: Dict[str, Tuple[str, any, Dict[str, any], int]] = {}
+        self._conn: Optional[Connection] = None
+        self._launcher: Optional[Process] = None
+        self._listener: Optional[Thread] = None
+
+    def start(self) -> None:
+        """
+        Forks the launcher process, which forks every check's process from then on, and starts a thread that
+        records each check's outcome. Must be called once the program's live environment is set up.
+        """
+        if self._launcher is not None:
+            return
+        self._conn, launcher_conn = Pipe()
+        self._launcher = Process(target=self._launch_jobs, args=(launcher_conn,))
+        self._launcher.start()
+        launcher_conn.close()
+        self._listener = Thread(target=self._receive_outcomes, daemon=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Stops the launcher, terminating any checks still running."""
+        if self._launcher is None:
+            return
+        try:
+            with self._lock:
+                self._conn.send(None)
+        except OSError:
+            pass
+        self._launcher.join(10)
+        if self._launcher.is_alive():
+            self._launcher.terminate()
+            self._launcher.join()
+        self._conn.close()
+        self._launcher = None
+
+    def submit(self,
+               check_type: 'HealthCheckType',
+               check_params: Dict[str, any],
+               force: bool = False,
+               live_env: Optional['ExecEnv'] = None) -> bool:
+        """
+        Schedules the check to run in the background, unless it is already running or (if not forced) its
+        latest result is still fresh.
+        :param live_env: the calling thread's live environment, used to read the latest result; if not given, a
+            new one is forked
+        :return: True if the check was scheduled
+        """
+        if not force and self.is_fresh(check_type, check_params, live_env=live_env):
+            return False
+        return self._submit_job(job_key=self._check_key(check_type, check_params),
+                                job_kind=self.CHECK_JOB,
+                                job_type=check_type,
+                                job_params=check_params,
+                                timeout=self.CHECK_TIMEOUTS.get(check_type.value, self.DEFAULT_TIMEOUT))
+
+    def submit_visual(self,
+                      visual_type: 'VisualType',
+                      visual_params: Dict[str, any]) -> bool:
+        """
+        Schedules the visual's data to be generated in the background and saved in redis, unless it is already
+        being generated. Clears shared.program_updating_visual once generation finishes or fails.
+        :return: True if the visual's generation was scheduled
+        """
+        return self._submit_job(job_key='VISUAL_' + self._check_key(visual_type, visual_params),
+                                job_kind=self.VISUAL_JOB,
+                                job_type=visual_type,
+                                job_params=visual_params,
+                                timeout=self.VISUAL_TIMEOUT)
+
+    def is_running(self,
+                   check_type: 'HealthCheckType',
+                   check_params: Dict[str, any]) -> bool:
+        """Returns True if the check is running or waiting for a free slot."""
+        with self._lock:
+            return self._check_key(check_type, check_params) in self._running
+
+    def is_fresh(self,
+                 check_type: 'HealthCheckType',
+                 check_params: Dict[str, any],
+                 live_env: Optional['ExecEnv'] = None) -> bool:
+        """Returns True if the check's latest result was produced less than its TTL ago."""
+        from webpanel import api_util
+
+        live_env = live_env or api_util.fork_live_env()
+        result = live_env.redis().load_health_check_result(check_type=check_type, check_params=check_params)
+        ttl = self.RESULT_TTLS.get(check_type.value, self.DEFAULT_RESULT_TTL)
+        return result is not None and datetime.now() - result.last_updated < timedelta(seconds=ttl)
+
+    def _submit_job(self,
+                    job_key: str,
+                    job_kind: str,
+                    job_type: any,
+                    job_params: Dict[str, any],
+                    timeout: int) -> bool:
+        """Sends the job to the launcher, unless it is already running. Returns True if the job was sent."""
+        with self._lock:
+            if self._launcher is None:
+                raise RuntimeError('Tried to schedule a background job before starting the HealthCheckScheduler')
+            if job_key in self._running:
+                return False
+            self._conn.send((job_key, job_kind, job_type, job_params, timeout))
+            self._running[job_key] = (job_kind, job_type, job_params, timeout)
+        return True
+
+    def _receive_outcomes(self) -> None:
+        """Records the outcome of each job the launcher finishes, until the launcher stops."""
+        from webpanel import api_util, shared
+        from tc2.health_checking.HealthCheckResult import HealthCheckResult
+
+        while True:
+            try:
+                job_key, timed_out, exitcode = self._conn.recv()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job_kind, job_type, job_params, timeout = self._running[job_key]
+            try:
+                description = 'Health check' if job_kind == self.CHECK_JOB else 'Visual generation'
+                failure_msg = None
+                if timed_out:
+                    failure_msg = f'{description} was terminated after exceeding its {timeout}s timeout'
+                elif exitcode is None:
+                    failure_msg = f'{description} process could not be started'
+                elif exitcode != 0:
+                    failure_msg = f'{description} process exited with code {exitcode}'
+
+                # Record a failing result if the check couldn't record its own
+                if job_kind == self.CHECK_JOB and failure_msg is not None:
+                    api_util.fork_live_env().redis().save_health_check_result(
+                        check_type=job_type,
+                        check_params=job_params,
+                        result=HealthCheckResult(False, [failure_msg], datetime.now()))
+
+                # Unblock visual generation
+                if job_kind == self.VISUAL_JOB:
+                    shared.program_updating_visual.value = False
+                    if failure_msg is not None:
+                        api_util.log_stacktrace(f'generating {job_type.value.lower()} visual data', failure_msg)
+            except Exception:
+                api_util.log_stacktrace(f'recording the outcome of background job {job_key}', traceback.format_exc())
+            finally:
+                with self._lock:
+                    self._running.pop(job_key, None)
+
+    def _launch_jobs(self,
+                     conn: Connection) -> None:
+        """
+        Runs in the launcher process, using a single thread so that forking it is safe.
+        Forks a process for each job received, MAX_CONCURRENT_CHECKS at a time, terminates jobs that run past their
+        timeouts, and sends back each finished job's key, whether it timed out, and its exit code.
+        Stops when it receives None or the webpanel's end of the pipe is closed.
+        """
+        self._conn.close()
+        pending = deque()
+        running: Dict[str, Tuple[Process, float]] = {}
+        while True:
+
+            # Queue newly submitted jobs
+            try:
+                if conn.poll(self.LAUNCHER_POLL_INTERVAL):
+                    job = conn.recv()
+                    if job is None:
+                        break
+                    pending.append(job)
+            except (EOFError, OSError):
+                break
+
+            # Start queued jobs while there are free slots
+            while len(pending) > 0 and len(running) < self.MAX_CONCURRENT_CHECKS:
+                job_key, job_kind, job_type, job_params, timeout = pending.popleft()
+                try:
+                    running[job_key] = (self._fork_job(job_kind, job_type, job_params), pytime.monotonic() + timeout)
+                except Exception:
+                    traceback.print_exc()
+                    conn.send((job_key, False, None))
+
+            # Report finished jobs, terminating those that are taking too long
+            for job_key, (job_process, deadline) in list(running.items()):
+                timed_out = job_process.is_alive() and pytime.monotonic() > deadline
+                if job_process.is_alive() and not timed_out:
+                    continue
+                if timed_out:
+                    job_process.terminate()
+                job_process.join()
+                del running[job_key]
+                conn.send((job_key, timed_out, job_process.exitcode))
+
+        # Don't leave jobs running after the launcher stops
+        for job_process, _ in running.values():
+            job_process.terminate()
+            job_process.join()
+
+    def _fork_job(self,
+                  job_kind: str,
+                  job_type: any,
+                  job_params: Dict[str, any]) -> Process:
+        """Starts the job in a process forked from the launcher."""
+        from webpanel import api_util, shared
+
+        # Database-backed simulated environments must be set up before being forked into a process
+        if job_kind == self.CHECK_JOB:
+            if job_type.value in self.DB_SERVER_CHECKS and shared.sim_env_health is None:
+                api_util.fork_sim_env_health()
+            job_process = Process(target=self._run_check_in_process, args=(job_type, job_params))
+        else:
+            if shared.sim_env_visuals is None:
+                api_util.fork_sim_env_visuals()
+            job_process = Process(target=self._generate_visual_in_process, args=(job_type, job_params))
+        job_process.start()
+        return job_process
+
+    def _run_check_in_process(self,
+                              check_type: 'HealthCheckType',
+                              check_params: Dict[str, any]) -> None:
+        """Performs the check using new database connections, and saves its result in redis."""
+        from webpanel import api_util, shared
+        from webpanel.health_checking.HealthChecker import HealthChecker
+
+        # Fork environments into this process so they create their own database connections
+        live_env = api_util.fork_live_env()
+        if check_type.value in self.DB_SERVER_CHECKS:
+            sim_env = api_util.fork_sim_env_health()
+        else:
+            sim_env = api_util.create_private_sim_env(shared.program.logfeed_api)
+
+        try:
+            result = HealthChecker.perform_check(program=shared.program,
+                                                 live_env=live_env,
+                                                 sim_env=sim_env,
+                                                 check_type=check_type,
+                                                 **check_params)
+        except Exception:
+            api_util.log_stacktrace(f'running a {check_type.value.lower()} health check', traceback.format_exc())
+            raise
+        live_env.redis().save_health_check_result(check_type=check_type,
+                                                  check_params=check_params,
+                                                  result=result)
+
+    @staticmethod
+    def _generate_visual_in_process(visual_type: 'VisualType',
+                                    visual_params: Dict[str, any]) -> None:
+        """Generates the visual's data using new database connections, and saves it in redis."""
+        from webpanel import api_util, shared
+        from webpanel.visuals_generation.VisualsGenerator import VisualsGenerator
+
+        # Fork environments into this process so they create their own database connections
+        live_env = api_util.fork_live_env(logfeed_process=shared.program.logfeed_visuals)
+        sim_env = api_util.fork_sim_env_visuals()
+
+        try:
+            visual_data = VisualsGenerator.generate_visual(program=shared.program,
+                                                           live_env=live_env,
+                                                           sim_env=sim_env,
+                                                           visual_type=visual_type,
+                                                           **visual_params)
+        except Exception:
+            api_util.log_stacktrace('generating visual data', traceback.format_exc())
+            raise
+        live_env.redis().save_visual_data(visual_type=visual_type,
+                                          visual_params=visual_params,
+                                          data=visual_data)
+
+    @staticmethod
+    def _check_key(check_type: 'HealthCheckType', check_params: Dict[str, any]) -> str:
+        """Returns a string identifying the check and its parameters."""
+        return check_type.value + '_' + '_'.join([f'{key}:{str(val)}' for key, val in check_params.items()])
@@ -52,6 +52,12 @@ class HealthChecker:
                 env=live_env,
                 sim_env=sim_env).run()
 
+        elif check_type is HealthCheckType.LATENCY:
+            from tc2.health_checking.health_check.LatencyCheck import LatencyCheck
+            return LatencyCheck(
+                env=live_env,
+                sim_env=sim_env).run()
+
         elif check_type is HealthCheckType.MONGO:
             from tc2.health_checking.health_check.MongoCheck import MongoCheck
             return MongoCheck(
@@ -3,6 +3,8 @@ from ctypes import c_bool
 from threading import Thread
 from typing import Optional
 
+from webpanel.health_checking.HealthCheckScheduler import HealthCheckScheduler
+
 # The main program to be accessed by django worker threads
 program: Optional['TC2Program'] = None
 
@@ -15,26 +17,21 @@ patching_data = multiprocessing.Value(c_bool, False)
 # noinspection PyTypeChecker
 healing_data = multiprocessing.Value(c_bool, False)
 # noinspection PyTypeChecker
-program_checking_health = multiprocessing.Value(c_bool, False)
-# noinspection PyTypeChecker
 program_updating_visual = multiprocessing.Value(c_bool, False)
 # noinspection PyTypeChecker
 running_panel_simulation = multiprocessing.Value(c_bool, False)
 
-# Thread that performs (resource-intensive) health checking
-health_check_thread: Optional[Thread] = None
+# Runs health checks and visual generation in the background, and caches check results
+health_check_scheduler = HealthCheckScheduler()
 
-# Environment for running a health check
+# Environment for running health checks that use the database servers
 sim_env_health: Optional['ExecEnv'] = None
 
-# Thread that performs (resource-intensive) visual generation
-visuals_thread: Optional[Thread] = None
-
 # Environment for generating visuals
 sim_env_visuals: Optional['ExecEnv'] = None
 
 # Thread that performs (resource-intensive) strategy simulation
 simulations_thread: Optional[Thread] = None
 
-# Environment for running simulations
+# Environment of the latest simulation
 sim_env_simulations: Optional['ExecEnv'] = None
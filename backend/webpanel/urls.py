@@ -18,7 +18,7 @@ from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 
 from webpanel.views import views
 from webpanel.views import views_logs as logs_views, views_visuals as visuals_views, views_health as health_views, \
-    views_data as data_views, views_strategies as strategy_views
+    views_data as data_views, views_strategies as strategy_views, views_metrics as metrics_views
 
 urlpatterns = [
     # Auth endpoint.
@@ -32,6 +32,7 @@ urlpatterns = [
     path('api/logs/logfile/', logs_views.logfile),
     path('api/logs/logfeed_filenames/', logs_views.logfeed_filenames),
     path('api/logs/latest/', logs_views.latest_messages),
+    path('api/logs/query/', logs_views.query_records),
     path('api/logs/delete', logs_views.clear_logs),
 
     # Visuals endpoint.
@@ -42,6 +43,9 @@ urlpatterns = [
     path('api/health_checks/get/', health_views.get_check_result),
     path('api/health_checks/perform/', health_views.perform_check),
 
+    # Metrics endpoint.
+    path('api/metrics/get/', metrics_views.get_metrics),
+
     # Data endpoint.
     path('api/data/patch/', data_views.patch_data),
     path('api/data/heal', data_views.heal_data),
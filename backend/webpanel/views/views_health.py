@@ -1,6 +1,5 @@
 import traceback
 from datetime import datetime
-from threading import Thread
 from typing import List, Union, Dict, Optional
 
 from django.http import QueryDict
@@ -9,7 +8,6 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from webpanel import shared, api_util
-from webpanel.health_checking.HealthChecker import HealthChecker
 
 """
 Handles API requests on the /api/health_checks endpoint.
@@ -51,7 +49,10 @@ def get_check_result(request):
             return Response('You must perform this health check before getting its result',
                             status=status.HTTP_204_NO_CONTENT)
 
-        return Response(health_check_data.to_json())
+        # Indicate whether a newer result is on the way
+        result_json = health_check_data.to_json()
+        result_json['in_progress'] = shared.health_check_scheduler.is_running(check_type, kwargs)
+        return Response(result_json)
     except Exception:
         api_util.log_stacktrace('fetching health check data', traceback.format_exc())
         return Response('Error fetching health check data',
@@ -61,8 +62,9 @@ def get_check_result(request):
 @api_view(['GET'])
 def perform_check(request) -> Response:
     """
-    Tries to perform a health check off-thread, print its output, and store it in redis.
-    Returns a message indicating status: invalid request parameters, program busy, error, or success.
+    Schedules a health check to run in the background, where its output will be stored in redis.
+    The check is skipped if it's already running, or if its latest result is still fresh (unless 'force' is true).
+    Returns a message indicating status: invalid request parameters, skipped, error, or scheduled.
     """
     from tc2.health_checking.HealthCheckType import HealthCheckType
 
@@ -76,51 +78,20 @@ def perform_check(request) -> Response:
         return params
     check_type: HealthCheckType = params[0]
     kwargs: Dict[str, any] = params[1]
+    force = (_string_param(request.GET, 'force') or '').lower() == 'true'
 
-    # Ensure that the program isn't already performing another check.
-    if shared.program_checking_health.value:
-        return Response('Already busy performing a health check',
-                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-    # Fetch the program instance.
-    from tc2.TC2Program import TC2Program
-    program: TC2Program = shared.program
-
-    # Run the health check in another thread.
-    shared.program_checking_health.value = True
-
-    def perform_check_logic():
-        try:
-            # Fork the live environment so it can run in this thread.
-            live_env = api_util.fork_live_env()
-
-            # Create a simulated environment in case we need to run simulations in order to perform the health check.
-            sim_env = api_util.fork_sim_env_health()
-
-            # Perform check.
-            result = HealthChecker.perform_check(program=program,
-                                                 live_env=live_env,
-                                                 sim_env=sim_env,
-                                                 check_type=check_type,
-                                                 **kwargs)
-
-            # Save result in redis.
-            live_env.redis().save_health_check_result(check_type=check_type,
-                                                      check_params=kwargs,
-                                                      result=result)
-
-            # Unblock health checking operations.
-            shared.program_checking_health.value = False
-            shared.health_check_thread = None
-        except Exception:
-            api_util.log_stacktrace('running a health check', traceback.format_exc())
-            shared.program_checking_health.value = False
-            shared.health_check_thread = None
-
-    shared.health_check_thread = Thread(target=perform_check_logic)
-    shared.health_check_thread.start()
-
-    return Response(f'Started {check_type.value.lower()} check off-thread. The new output will be available soon.')
+    # Schedule the health check.
+    try:
+        if shared.health_check_scheduler.submit(check_type=check_type, check_params=kwargs, force=force):
+            return Response(f'Started {check_type.value.lower()} check off-thread. '
+                            f'The new output will be available soon.')
+        if shared.health_check_scheduler.is_running(check_type, kwargs):
+            return Response(f'Already busy performing this {check_type.value.lower()} check')
+        return Response(f'The latest {check_type.value.lower()} check result is still fresh')
+    except Exception:
+        api_util.log_stacktrace('scheduling a health check', traceback.format_exc())
+        return Response('Error scheduling health check',
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 def _get_params(req: QueryDict) -> Union[Response, List[any]]:
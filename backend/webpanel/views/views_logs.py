@@ -139,6 +139,61 @@ def latest_messages(request):
     return Response(lines)
 
 
+@api_view(['GET'])
+def query_records(request):
+    """
+    Displays structured log records for the specified log feed, filtered by level, time range, and substring.
+    e.g. /api/logs/query/?logfeed=data&levels=ERROR,WARNING&start=2020/03/10_09:30:00&contains=polygon
+    """
+    from tc2.TC2Program import TC2Program
+    from tc2.log.LogFeed import LogCategory
+
+    # Extract parameters
+    logfeed_name = api_util.parse_param_str(request, 'logfeed')
+    if logfeed_name is None:
+        return Response('You must specify a logfeed, i.e. /api/logs/query/?logfeed=program&levels=ERROR',
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        log_category = LogCategory(logfeed_name)
+    except ValueError:
+        return Response(f'Invalid logfeed specified: "{logfeed_name}"',
+                        status=status.HTTP_400_BAD_REQUEST)
+    levels = api_util.parse_param_str_list(request, 'levels')
+    start = api_util.parse_param_datetime(request, 'start')
+    end = api_util.parse_param_datetime(request, 'end')
+    contains = api_util.parse_param_str(request, 'contains')
+    limit = api_util.parse_param_int(request, 'limit')
+
+    # Fetch the program instance
+    program: TC2Program = shared.program
+
+    # Get the logfeed corresponding to the log category
+    logfeed = {
+        LogCategory.PROGRAM: program.logfeed_program,
+        LogCategory.DATA: program.logfeed_data,
+        LogCategory.LIVE_TRADING: program.logfeed_trading,
+        LogCategory.OPTIMIZATION: program.logfeed_optimization,
+        LogCategory.API: program.logfeed_api,
+        LogCategory.VISUALS: program.logfeed_visuals
+    }[log_category]
+    if logfeed.store is None:
+        return Response(f'Structured logs are disabled for the {log_category.value} logfeed',
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # Query the logfeed's structured store
+    try:
+        records = logfeed.store.query(levels=levels,
+                                      start=start,
+                                      end=end,
+                                      contains=contains,
+                                      limit=limit if limit is not None else 1000)
+    except Exception:
+        api_util.log_stacktrace('querying structured log records', traceback.format_exc())
+        return Response('Error querying log records',
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response([record.to_json() for record in records])
+
+
 @api_view(['GET'])
 def clear_logs(request):
     """Clears the log files."""
@@ -150,6 +205,13 @@ def clear_logs(request):
         for log_category in LogCategory:
             os.system(f'rm -rf logs/{log_category.value}')
 
+        # Delete structured log records
+        for logfeed in [shared.program.logfeed_program, shared.program.logfeed_data, shared.program.logfeed_trading,
+                        shared.program.logfeed_optimization, shared.program.logfeed_api,
+                        shared.program.logfeed_visuals]:
+            if logfeed.store is not None:
+                logfeed.store.clear()
+
         # Print a log message
         shared.program.logfeed_program.log(LogLevel.INFO, 'Cleared program log feed')
         shared.program.logfeed_data.log(LogLevel.INFO, 'Cleared data log feed')
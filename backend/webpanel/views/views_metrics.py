@@ -0,0 +1,30 @@
+import traceback
+
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from webpanel import api_util
+
+"""
+Handles API requests on the /api/metrics endpoint.
+"""
+
+
+@api_view(['GET'])
+def get_metrics(request):
+    """
+    Returns the latency histograms (count, mean, p50, p95, p99, max) and counters recorded by every process.
+    """
+    from tc2.metrics.Metrics import Metrics
+
+    try:
+        # Fork the live environment so it can run in this thread.
+        live_env = api_util.fork_live_env()
+
+        # Merge this process's metrics with the latest snapshots of the other processes.
+        return Response(Metrics.collect(live_env.redis()))
+    except Exception:
+        api_util.log_stacktrace('fetching latency metrics', traceback.format_exc())
+        return Response('Error fetching latency metrics',
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,6 +1,5 @@
 import traceback
 from datetime import datetime
-from threading import Thread
 from typing import Union, List, Dict, Optional
 
 from django.http import QueryDict
@@ -57,9 +56,7 @@ def generate_visual(request) -> Response:
     Tries to update data needed for a visual and store the new result.
     Returns a message indicating status: invalid request parameters, program busy, error, or success.
     """
-    from webpanel.visuals_generation.VisualsGenerator import VisualsGenerator
     from tc2.visualization.VisualType import VisualType
-    from tc2.TC2Program import TC2Program
 
     # Get and validate parameters from the request
     try:
@@ -77,42 +74,18 @@ def generate_visual(request) -> Response:
         return Response('Already busy updating a visual',
                         status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-    # Fetch the program instance
-    program: TC2Program = shared.program
-
-    # Update the visual in another thread
+    # Update the visual in a background process
     shared.program_updating_visual.value = True
-
-    def perform_check_logic():
-        try:
-            # Fork the live environment so it can run in this thread
-            live_env = api_util.fork_live_env(logfeed_process=shared.program.logfeed_visuals)
-
-            # Create a simulated environment in case we need to run simulations in order to generate the visual
-            sim_env = api_util.fork_sim_env_visuals()
-
-            # Generate visual
-            visual_data = VisualsGenerator.generate_visual(program=program,
-                                                           live_env=live_env,
-                                                           sim_env=sim_env,
-                                                           visual_type=visual_type,
-                                                           **kwargs)
-
-            # Save visual's data in redis
-            live_env.redis().save_visual_data(visual_type=visual_type,
-                                              visual_params=kwargs,
-                                              data=visual_data)
-
-            # Unblock health checking operations
-            shared.program_updating_visual.value = False
-            shared.visuals_thread = None
-        except Exception:
-            api_util.log_stacktrace('generating visual data', traceback.format_exc())
+    try:
+        if not shared.health_check_scheduler.submit_visual(visual_type=visual_type, visual_params=kwargs):
             shared.program_updating_visual.value = False
-            shared.visuals_thread = None
-
-    shared.health_check_thread = Thread(target=perform_check_logic)
-    shared.health_check_thread.start()
+            return Response('Already busy updating this visual',
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception:
+        shared.program_updating_visual.value = False
+        api_util.log_stacktrace('scheduling visual data generation', traceback.format_exc())
+        return Response('Error scheduling visual data generation',
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     return Response(f'Started {visual_type.value.lower()} data generation off-thread. '
                     'The new data will be available soon.')